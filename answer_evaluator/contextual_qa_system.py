@@ -1,14 +1,36 @@
+import os
+import sys
 import json
 import re
 from sentence_transformers import SentenceTransformer, util
 from nltk.corpus import wordnet
 from transformers import pipeline
 import torch
+import numpy as np
 import nltk
 
+# allow `python answer_evaluator/contextual_qa_system.py` to import sibling modules
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from answer_evaluator.kg_binary import load_graph
+from answer_evaluator.relation_graph import RelationGraph
+from nlp_analysis.text_index import get_text_index, STOPWORDS
+from utils import metrics, profiling
+
 # Ensure required NLTK data is available
 nltk.download('wordnet')
 nltk.download('omw-1.4')
+nltk.download('stopwords', quiet=True)
+
+LEXICAL_WEIGHT = 0.3  # share of the BM25 score in hybrid file and chunk ranking (0 = embeddings only)
+GRAPH_HOPS = 0        # relation-graph hops used to expand the question (0 = off until its effect is measured)
+try:
+    from nltk.corpus import stopwords
+    GRAPH_STOPWORDS = set(stopwords.words("english")) | STOPWORDS
+except LookupError:
+    GRAPH_STOPWORDS = set(STOPWORDS)
 
 
 class HybridQASystem:
@@ -17,12 +39,16 @@ class HybridQASystem:
     document sections based on semantic and structural signals.
     """
 
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    def __init__(self, model_name='all-MiniLM-L6-v2', lexical_weight=LEXICAL_WEIGHT):
         print(f"Loading sentence-transformer model: {model_name}...")
         self.model = SentenceTransformer(model_name)
-        self.keyword_data = None
+        self.lexical_weight = lexical_weight
+        self.text_index = None
+        self.graph = None
+        self.relation_graph = None
         self.text_data = None
         self.unique_keywords = []
+        self.unique_keyword_ids = None
         self.keyword_embeddings = None
         print("✅ Model loaded.")
 
@@ -138,60 +164,93 @@ class HybridQASystem:
                 matches.append(block.strip())
         return list(set(matches))
 
+    def _lexical_file_scores(self, question):
+        """BM25 score of every graph file for the question, scaled to [0, 1]."""
+        scores = np.zeros(len(self.graph.filenames))
+        position = {name: i for i, name in enumerate(self.graph.filenames)}
+        hits = self.text_index.search_files(question, self.text_data.get("subject"), top_n=len(scores))
+        for hit in hits:
+            if hit["filename"] in position:
+                scores[position[hit["filename"]]] = hit["score"]
+        return scores / scores.max() if scores.max() > 0 else scores
+
+    def _lexical_chunk_scores(self, question, filename, chunks, top_n=50):
+        """Best BM25 sentence hit inside each chunk, scaled to [0, 1]."""
+        hits = self.text_index.search_sentences(question, self.text_data.get("subject"), filename, top_n=top_n)
+        scores = np.zeros(len(chunks))
+        if not hits:
+            return scores
+        best = hits[0]["score"]
+        for hit in hits:
+            sentence = self._clean_text(hit["sentence"])
+            for i, chunk in enumerate(chunks):
+                if sentence and sentence in chunk:
+                    scores[i] = max(scores[i], hit["score"] / best)
+        return scores
+
     # ------------------------------------------------------------------------
     # Core logic
     # ------------------------------------------------------------------------
 
     def load_data(self, keywords_path, text_path):
-        """Loads keyword index and text corpus."""
+        """
+        Loads keyword index and text corpus. The keyword index may be the
+        knowledge_graph.json layout or its memory-mapped .kgb form.
+        """
         print(f"Loading data from '{keywords_path}' and '{text_path}'...")
-        with open(keywords_path, "r", encoding="utf-8") as f:
-            self.keyword_data = json.load(f)
+        self.graph = load_graph(keywords_path)
         with open(text_path, "r", encoding="utf-8") as f:
             self.text_data = json.load(f)
+        if self.lexical_weight > 0:
+            # BM25 retriever next to the embeddings; a no-op when extract already indexed the subject
+            self.text_index = get_text_index()
+            self.text_index.update_subject(self.text_data)
 
-        all_kw = {
-            kw_obj["keyword"]
-            for file_info in self.keyword_data.get("files", [])
-            for kw_obj in file_info.get("ranked_keywords", [])
-        }
-        self.unique_keywords = list(all_kw)
+        self.relation_graph = RelationGraph.from_compact(self.graph)
+        self.unique_keyword_ids = self.graph.keyword_ids()
+        strings = self.graph.strings()
+        self.unique_keywords = [strings[i] for i in self.unique_keyword_ids]
 
         if self.unique_keywords:
-            self.keyword_embeddings = self.model.encode(
-                self.unique_keywords, convert_to_tensor=True, show_progress_bar=True
-            )
+            with metrics.span("embed.encode", items=len(self.unique_keywords)):
+                self.keyword_embeddings = self.model.encode(
+                    self.unique_keywords, convert_to_tensor=True, show_progress_bar=True
+                )
             print(f"✅ Data loaded. Indexed {len(self.unique_keywords)} unique keywords.")
         else:
             print("⚠️ No keywords found in the provided file.")
 
-    def ask_question(self, question, top_n_keywords=8, top_k_chunks=5, expand_window=2):
+    @metrics.timed("qa.ask_question")
+    def ask_question(self, question, top_n_keywords=8, top_k_chunks=5, expand_window=2, graph_hops=GRAPH_HOPS):
         """Enhanced Q&A with content filtering and relevance boosting."""
         if not self.unique_keywords:
             return "⚠️ Keyword index is empty."
 
         expanded_question = self._expand_question(question)
-        question_embedding = self.model.encode(expanded_question, convert_to_tensor=True)
+        if self.relation_graph is not None and graph_hops > 0:
+            # add concepts linked to the question's terms by extracted relations
+            words = re.findall(r"[a-z0-9]+", question.lower())
+            related = self.relation_graph.expand_terms(words, k=graph_hops, top_n=5, stopwords=GRAPH_STOPWORDS)
+            if related:
+                expanded_question += " " + " ".join(related)
+        with metrics.span("embed.encode"):
+            question_embedding = self.model.encode(expanded_question, convert_to_tensor=True)
 
         # --- Step 1: Find best document ---
         cos_scores_kw = util.cos_sim(question_embedding, self.keyword_embeddings)[0]
         top_keywords_results = cos_scores_kw.topk(k=min(top_n_keywords, len(self.unique_keywords)))
-        relevant_keywords = {self.unique_keywords[idx] for _, idx in zip(top_keywords_results[0], top_keywords_results[1])}
-
-        file_scores = {}
-        for file_info in self.keyword_data["files"]:
-            score = sum(
-                kw_obj.get("rank", 0)
-                for kw_obj in file_info.get("ranked_keywords", [])
-                if kw_obj.get("keyword") in relevant_keywords
-            )
-            if score > 0:
-                file_scores[file_info["filename"]] = score
-
-        if not file_scores:
+        relevant_ids = self.unique_keyword_ids[top_keywords_results[1].cpu().numpy()]
+
+        file_scores = self.graph.file_scores(relevant_ids)
+        if self.text_index is not None and len(file_scores):
+            # hybrid: keyword-embedding file score and BM25 over the file text, both scaled to [0, 1]
+            semantic = file_scores / file_scores.max() if file_scores.max() > 0 else file_scores
+            file_scores = (1 - self.lexical_weight) * semantic + \
+                self.lexical_weight * self._lexical_file_scores(question)
+        if not len(file_scores) or file_scores.max() <= 0:
             return "❌ No relevant document found."
 
-        best_filename = max(file_scores, key=file_scores.get)
+        best_filename = self.graph.filenames[int(file_scores.argmax())]
         print(f"📄 Found best document via keywords: '{best_filename}'")
 
         # --- Step 2: Load and clean text ---
@@ -216,8 +275,13 @@ class HybridQASystem:
         if not chunks:
             return "⚠️ No meaningful chunks found."
 
-        chunk_embeddings = self.model.encode(chunks, convert_to_tensor=True)
+        with metrics.span("embed.encode", items=len(chunks)):
+            chunk_embeddings = self.model.encode(chunks, convert_to_tensor=True)
         cos_scores_chunks = util.cos_sim(question_embedding, chunk_embeddings)[0]
+        if self.text_index is not None:
+            lexical = torch.tensor(self._lexical_chunk_scores(question, best_filename, chunks),
+                                   dtype=cos_scores_chunks.dtype, device=cos_scores_chunks.device)
+            cos_scores_chunks = (1 - self.lexical_weight) * cos_scores_chunks + self.lexical_weight * lexical
         top_chunks_results = cos_scores_chunks.topk(k=min(top_k_chunks, len(chunks)))
 
         selected_indices = [int(i) for i in top_chunks_results[1].tolist()]
@@ -240,19 +304,22 @@ class HybridQASystem:
 # ------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    keywords_json_path = "output/knowledge_graph.json"
-    source_text_path = "data/processed_text/Big Data Analytics.json"
-
-    qa_system = HybridQASystem()
-    qa_system.load_data(keywords_json_path, source_text_path)
-
-    while True:
-        user_question = input("\nAsk a question (or type 'quit' to exit): ")
-        if user_question.lower() in ["quit", "exit"]:
-            print("Exiting...")
-            break
-
-        answer = qa_system.ask_question(user_question)
-        print("\n💡 Contextual Answer:\n---")
-        print(answer)
-        print("\n" + "=" * 50)
+    with profiling.from_argv("contextual_qa"):
+        keywords_json_path = "output/knowledge_graph.json"
+        if os.path.exists("output/knowledge_graph.kgb"):
+            keywords_json_path = "output/knowledge_graph.kgb"
+        source_text_path = "data/processed_text/Big Data Analytics.json"
+
+        qa_system = HybridQASystem()
+        qa_system.load_data(keywords_json_path, source_text_path)
+
+        while True:
+            user_question = input("\nAsk a question (or type 'quit' to exit): ")
+            if user_question.lower() in ["quit", "exit"]:
+                print("Exiting...")
+                break
+
+            answer = qa_system.ask_question(user_question)
+            print("\n💡 Contextual Answer:\n---")
+            print(answer)
+            print("\n" + "=" * 50)
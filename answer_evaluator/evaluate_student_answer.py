@@ -1,15 +1,66 @@
+import os
+import sys
 import json
-from fuzzywuzzy import fuzz
+import glob
+import time
+import numpy as np
+from multiprocessing import Pool
+
+# allow `python answer_evaluator/evaluate_student_answer.py` to import sibling modules
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from answer_evaluator.keyword_matcher import KeywordAutomaton
+from answer_evaluator.fuzzy_engine import FuzzyEngine
+from utils import metrics, db_utils
+from utils.file_utils import save_json
 
 def keyword_match_score(expected_keywords, student_text):
-    found, missing = [], []
-    for kw in expected_keywords:
-        if kw.lower() in student_text.lower():
-            found.append(kw)
-        else:
-            missing.append(kw)
-    score = len(found) / len(expected_keywords) if expected_keywords else 0
-    return round(score, 2), found, missing
+    """Whole-word keyword matching for a single keyword list."""
+    return KeywordAutomaton({0: expected_keywords}).match(student_text)[0]
+
+
+class ModelAnswerSet:
+    """
+    Model answers of one subject with their keyword automaton and fuzzy
+    engine prepared once, so any number of students can be scored against them.
+    """
+
+    def __init__(self, model_data):
+        self.files = model_data["files"]
+        self.topics = [file["filename"] for file in self.files]
+        # one automaton over every topic's keywords; each answer is scanned once
+        self.automaton = KeywordAutomaton({i: file.get("keywords", []) for i, file in enumerate(self.files)})
+        self.fuzzy = FuzzyEngine([file.get("model_answer", "") for file in self.files])
+
+    @classmethod
+    def load(cls, model_json_path):
+        with open(model_json_path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def score(self, student_answer):
+        """Per-topic evaluation of one student answer."""
+        with metrics.span("grading.keywords", nbytes=len(student_answer.encode("utf-8"))):
+            keyword_results = self.automaton.match(student_answer)
+        with metrics.span("grading.fuzzy", items=len(self.topics)):
+            fuzzy_scores = self.fuzzy.score(student_answer)
+
+        evaluations = []
+        for i, topic in enumerate(self.topics):
+            keyword_score, found, missing = keyword_results[i]
+            fuzzy_score = float(fuzzy_scores[i])
+            total_score = round(0.7 * keyword_score + 0.3 * fuzzy_score, 2)
+
+            evaluations.append({
+                "topic": topic,
+                "keyword_score": keyword_score,
+                "fuzzy_score": fuzzy_score,
+                "final_score": total_score,
+                "keywords_found": found,
+                "keywords_missing": missing
+            })
+        return evaluations
 
 
 def evaluate_student_answer(student_answer_path, model_json_path, output_path):
@@ -17,34 +68,147 @@ def evaluate_student_answer(student_answer_path, model_json_path, output_path):
         student_data = json.load(f)
     student_answer = student_data["answer"]
 
-    with open(model_json_path, "r", encoding="utf-8") as f:
-        model_data = json.load(f)
-
-    evaluations = []
-
-    for file in model_data["files"]:
-        keywords = file.get("keywords", [])
-        model_text = file.get("model_answer", "")
-        keyword_score, found, missing = keyword_match_score(keywords, student_answer)
-        fuzzy_score = fuzz.partial_ratio(model_text.lower(), student_answer.lower()) / 100.0
-        total_score = round(0.7 * keyword_score + 0.3 * fuzzy_score, 2)
-
-        evaluations.append({
-            "topic": file["filename"],
-            "keyword_score": keyword_score,
-            "fuzzy_score": fuzzy_score,
-            "final_score": total_score,
-            "keywords_found": found,
-            "keywords_missing": missing
-        })
+    evaluations = ModelAnswerSet.load(model_json_path).score(student_answer)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(evaluations, f, indent=2, ensure_ascii=False)
+    save_json(evaluations, output_path)
     print(f"✅ Evaluation saved to {output_path}")
 
 
+# ------------------------------------------------------------------------
+# Class-wide batch grading
+# ------------------------------------------------------------------------
+
+_worker_answers = None
+
+def _init_worker(model_json_path, metrics_on=None):
+    """Loads the model answers; in a pool worker (metrics_on given) also sets up its metrics."""
+    global _worker_answers
+    if metrics_on is not None:
+        metrics.init_worker(metrics_on)
+    _worker_answers = ModelAnswerSet.load(model_json_path)
+
+def _grade(item):
+    student_id, answer = item
+    return {"student": student_id, "evaluations": _worker_answers.score(answer)}
+
+def _grade_collected(item):
+    """_grade in a pool worker, with the worker's grading spans for the parent."""
+    return metrics.collected(_grade, item)
+
+def _student_record(data, default_id):
+    """(student_id, answer) of one parsed record; raises ValueError when it has no usable answer."""
+    if not isinstance(data, dict) or not isinstance(data.get("answer"), str):
+        raise ValueError('expected an object with a string "answer"')
+    return data.get("student_id", data.get("id", default_id)), data["answer"]
+
+def iter_student_answers(source):
+    """
+    Yields (student_id, answer) from a directory of student JSON files
+    ({"answer": ...}) or from a JSONL file with one student per line.
+    Malformed records are reported and skipped so one bad file or line
+    doesn't abort the whole class.
+    """
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, "*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield _student_record(json.load(f), os.path.splitext(os.path.basename(path))[0])
+            except ValueError as e:  # json.JSONDecodeError is a ValueError
+                print(f"⚠️ Skipping {path}: {e}")
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield _student_record(json.loads(line), f"line{line_no}")
+                except ValueError as e:
+                    print(f"⚠️ Skipping {source} line {line_no}: {e}")
+
+def summarize_scores(scores_by_topic):
+    """Per-topic final score distribution."""
+    summary = []
+    for topic, scores in scores_by_topic.items():
+        arr = np.asarray(scores, dtype=np.float64)
+        if not arr.size:
+            continue
+        p25, p50, p75 = np.percentile(arr, [25, 50, 75])
+        summary.append({
+            "topic": topic, "students": int(arr.size), "mean": round(float(arr.mean()), 3),
+            "std": round(float(arr.std()), 3), "min": float(arr.min()), "p25": round(float(p25), 3),
+            "median": round(float(p50), 3), "p75": round(float(p75), 3), "max": float(arr.max()),
+        })
+    return summary
+
+def print_summary(summary):
+    print(f"\n{'topic':<45} {'n':>5} {'mean':>6} {'std':>6} {'min':>5} {'p25':>5} {'med':>5} {'p75':>5} {'max':>5}")
+    for row in summary:
+        print(f"{row['topic'][:45]:<45} {row['students']:>5} {row['mean']:>6.2f} {row['std']:>6.2f} {row['min']:>5.2f} "
+              f"{row['p25']:>5.2f} {row['median']:>5.2f} {row['p75']:>5.2f} {row['max']:>5.2f}")
+
+def evaluate_batch(student_source, model_json_path, output_jsonl, workers=None, chunksize=8):
+    """
+    Grades a whole class: student answers are streamed through a process pool
+    whose workers each load the model answers and keyword automaton once.
+    Results are appended to `output_jsonl` as they finish; a per-topic
+    score summary is written next to it (<output>.summary.json).
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(os.path.dirname(output_jsonl) or ".", exist_ok=True)
+    scores_by_topic = {}
+    start = time.perf_counter()
+    graded = 0
+    db = db_utils.get_store()
+    with open(model_json_path, "r", encoding="utf-8") as f:
+        subject = json.load(f).get("subject") or os.path.basename(model_json_path).replace("_model.json", "")
+    pending = []  # results waiting for the next bulk write
+
+    with open(output_jsonl, "w", encoding="utf-8") as out:
+        if workers == 1:
+            _init_worker(model_json_path)
+            results = ((result, None) for result in map(_grade, iter_student_answers(student_source)))
+            pool = None
+        else:
+            pool = Pool(workers, initializer=_init_worker, initargs=(model_json_path, metrics.enabled()))
+            results = pool.imap_unordered(_grade_collected, iter_student_answers(student_source), chunksize=chunksize)
+        try:
+            for result, spans in results:
+                metrics.merge(spans)
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                for ev in result["evaluations"]:
+                    scores_by_topic.setdefault(ev["topic"], []).append(ev["final_score"])
+                graded += 1
+                if db is not None:
+                    pending.append(result)
+                    if len(pending) >= db_utils.BULK_SIZE:
+                        db_utils.save_grades(db, subject, pending)
+                        pending = []
+                if graded % 100 == 0:
+                    print(f"... graded {graded} students")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if pending:
+                db_utils.save_grades(db, subject, pending)
+
+    elapsed = time.perf_counter() - start
+    summary = summarize_scores(scores_by_topic)
+    summary_path = os.path.splitext(output_jsonl)[0] + ".summary.json"
+    save_json({"students": graded, "seconds": round(elapsed, 2), "topics": summary}, summary_path)
+
+    print_summary(summary)
+    print(f"\n✅ Graded {graded} students in {elapsed:.1f}s ({workers} workers)")
+    print(f"✅ Results: {output_jsonl} | Summary: {summary_path}")
+    return summary
+
+
 if __name__ == "__main__":
-    student_path = "data/student_answers/student1_bda.json"
-    model_path = "data/processed_text/Big Data Analytics_model.json"
-    output_path = "data/results/student1_evaluation.json"
-    evaluate_student_answer(student_path, model_path, output_path)
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # python answer_evaluator/evaluate_student_answer.py --batch <dir|answers.jsonl> <model.json> <results.jsonl>
+        evaluate_batch(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        student_path = "data/student_answers/student1_bda.json"
+        model_path = "data/processed_text/Big Data Analytics_model.json"
+        output_path = "data/results/student1_evaluation.json"
+        evaluate_student_answer(student_path, model_path, output_path)
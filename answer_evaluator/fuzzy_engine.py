@@ -0,0 +1,60 @@
+import numpy as np
+
+# rapidfuzz is a much faster replacement for fuzzywuzzy; fall back when it isn't installed
+try:
+    from rapidfuzz import fuzz
+    from rapidfuzz.distance import Levenshtein
+    BACKEND = "rapidfuzz"
+except ImportError:
+    from fuzzywuzzy import fuzz
+    BACKEND = "fuzzywuzzy"
+
+
+def compat_partial_ratio(s1, s2):
+    """
+    fuzzywuzzy's partial_ratio (matching-block heuristic) built on rapidfuzz's
+    C editops and ratio, so scores are the same as fuzzywuzzy's. Each window
+    of the longer string is scored once, with the best score so far as the
+    cutoff so rapidfuzz can give up early on worse windows.
+    """
+    shorter, longer = (s1, s2) if len(s1) <= len(s2) else (s2, s1)
+    if not shorter:
+        return 0
+    best, seen = 0.0, set()
+    for block in Levenshtein.editops(shorter, longer).as_matching_blocks():
+        long_start = max(0, block.b - block.a)
+        if long_start in seen:
+            continue
+        seen.add(long_start)
+        r = fuzz.ratio(shorter, longer[long_start:long_start + len(shorter)], score_cutoff=best)
+        if r > 99.5:
+            return 100
+        best = max(best, r)
+    return int(round(best))
+
+
+class FuzzyEngine:
+    """
+    partial_ratio of every model answer against student answers, with the
+    model texts lowercased once. Scores are the same as fuzzywuzzy's
+    partial_ratio (falls back to fuzzywuzzy without rapidfuzz), in 0..1.
+    """
+
+    def __init__(self, model_texts):
+        self.model_texts = [t.lower() for t in model_texts]
+        self.backend = BACKEND
+
+    def score(self, student_answer):
+        """Scores for one student, one per model text."""
+        return self.score_many([student_answer])[0]
+
+    def score_many(self, student_answers):
+        """Score matrix of shape (n_students, n_model_texts)."""
+        students = [s.lower() for s in student_answers]
+        if not students or not self.model_texts:
+            return np.zeros((len(students), len(self.model_texts)))
+        scorer = compat_partial_ratio if BACKEND == "rapidfuzz" else fuzz.partial_ratio
+        return np.array([
+            [scorer(model_text, student) for model_text in self.model_texts]
+            for student in students
+        ], dtype=np.float64) / 100.0
@@ -1,20 +1,65 @@
 import json
 import re
 import os
+import sys
+import glob
 import spacy
 import pytextrank
+from spacy.language import Language
 
-# Load the spaCy model
-try:
-    nlp = spacy.load("en_core_web_md")
-except OSError:
-    print("Downloading 'en_core_web_md' model...")
-    os.system("python -m spacy download en_core_web_md")
-    nlp = spacy.load("en_core_web_md")
+# allow `python answer_evaluator/generate_keywords.py` to import sibling modules
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from answer_evaluator.kg_store import KnowledgeGraphStore
+from answer_evaluator.kg_binary import CompactKnowledgeGraph
+from utils import metrics, profiling, db_utils
+from utils.file_utils import save_json
+
+SEGMENT_CHARS = 100_000  # longer documents are parsed in segments so spaCy memory stays flat
+BATCH_SIZE = 4
+
+
+@Language.component("kg_extract")
+def kg_extract(doc):
+    """
+    Turns textrank phrases and dependency parses into plain keyword/relation
+    lists stored in doc.user_data, so docs can travel between nlp.pipe workers.
+    """
+    doc.user_data["kg"] = {
+        "keywords": _consolidate_phrases(doc._.phrases),
+        "relations": _extract_relations(doc),
+    }
+    # the textrank objects hold Spans and can't be serialized
+    doc._.phrases = []
+    doc._.textrank = None
+    return doc
+
+
+def load_nlp(model_name="en_core_web_md"):
+    """
+    Loads spaCy with textrank and kg_extract added. Every enabled component of
+    en_core_web_md is read: POS tags and lemmas (tagger, attribute_ruler,
+    lemmatizer) and dependencies (parser) for relations, and entities (ner)
+    next to noun chunks for textrank, so none of them is removed.
+    """
+    try:
+        nlp = spacy.load(model_name)
+    except OSError:
+        print(f"Downloading '{model_name}' model...")
+        os.system(f"python -m spacy download {model_name}")
+        nlp = spacy.load(model_name)
 
-# Add the PyTextRank component to the spaCy pipeline
-if "textrank" not in nlp.pipe_names:
-    nlp.add_pipe("textrank")
+    # Add the PyTextRank component to the spaCy pipeline
+    if "textrank" not in nlp.pipe_names:
+        nlp.add_pipe("textrank")
+    nlp.add_pipe("kg_extract", last=True)
+    return nlp
+
+
+# Load the spaCy model
+nlp = load_nlp()
 
 def clean_text(text: str) -> str:
     """Basic cleanup for extracted PDF text."""
@@ -22,19 +67,25 @@ def clean_text(text: str) -> str:
     text = re.sub(r"http\S+", "", text)
     return text.strip()
 
-def create_knowledge_graph(text: str):
-    """
-    Extracts ranked keywords and explicit relations (Subject-Verb-Object triplets)
-    using pure NLP algorithms.
-    """
-    if not text or not text.strip():
-        return [], []
+def split_segments(text: str, max_chars: int = SEGMENT_CHARS):
+    """Splits long text into segments of at most max_chars, cutting at sentence ends."""
+    if len(text) <= max_chars:
+        return [text]
+    segments, start = [], 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            cut = text.rfind(". ", start, end)
+            if cut > start:
+                end = cut + 1
+        segments.append(text[start:end].strip())
+        start = end
+    return [s for s in segments if s]
 
-    doc = nlp(text)
-    
-    # --- 1. Extract Ranked Keywords using TextRank ---
+def _consolidate_phrases(phrases):
+    """Extracts Ranked Keywords from TextRank phrases, merging case variants."""
     consolidated_phrases = {}
-    for phrase in doc._.phrases:
+    for phrase in phrases:
         normalized_text = phrase.text.lower()
         if len(normalized_text) < 3:
             continue
@@ -43,11 +94,10 @@ def create_knowledge_graph(text: str):
         else:
             consolidated_phrases[normalized_text]["rank"] = max(consolidated_phrases[normalized_text]["rank"], phrase.rank)
             consolidated_phrases[normalized_text]["count"] += phrase.count
-            
-    ranked_keywords = [{"keyword": key, **value} for key, value in consolidated_phrases.items()]
-    ranked_keywords.sort(key=lambda x: x["rank"], reverse=True)
+    return [{"keyword": key, **value} for key, value in consolidated_phrases.items()]
 
-    # --- 2. Extract Relations (Graph Edges) using Dependency Parsing ---
+def _extract_relations(doc):
+    """Extracts Relations (Graph Edges) using Dependency Parsing."""
     relations = []
     for sent in doc.sents:
         for token in sent:
@@ -59,36 +109,133 @@ def create_knowledge_graph(text: str):
                     for sub in subjects:
                         for obj in objects:
                             relations.append([sub, token.lemma_, obj]) # [Subject, Verb, Object]
-    
-    return ranked_keywords, relations
+    return relations
 
-def process_all_files(input_json: str, output_dir: str):
-    """Generates a knowledge graph file from the source documents."""
+def _merge_segments(parts):
+    """Merges per-segment results of one document into its keyword list and relations."""
+    if len(parts) == 1:
+        keywords, relations = parts[0]["keywords"], parts[0]["relations"]
+    else:
+        merged, relations = {}, []
+        for part in parts:
+            for kw in part["keywords"]:
+                if kw["keyword"] not in merged:
+                    merged[kw["keyword"]] = {"rank": kw["rank"], "count": kw["count"]}
+                else:
+                    merged[kw["keyword"]]["rank"] = max(merged[kw["keyword"]]["rank"], kw["rank"])
+                    merged[kw["keyword"]]["count"] += kw["count"]
+            relations.extend(part["relations"])
+        keywords = [{"keyword": key, **value} for key, value in merged.items()]
+    keywords = sorted(keywords, key=lambda x: x["rank"], reverse=True)
+    return keywords, relations
+
+def create_knowledge_graph(text: str):
+    """
+    Extracts ranked keywords and explicit relations (Subject-Verb-Object triplets)
+    using pure NLP algorithms.
+    """
+    if not text or not text.strip():
+        return [], []
+
+    with metrics.span("spacy.parse", nbytes=len(text.encode("utf-8"))):
+        parts = [doc.user_data["kg"] for doc in nlp.pipe(split_segments(text))]
+    return _merge_segments(parts)
+
+def build_knowledge_graphs(texts, n_process=1, batch_size=BATCH_SIZE, segment_chars=SEGMENT_CHARS):
+    """
+    Streams many documents through nlp.pipe (optionally multi-process) and
+    yields (index, ranked_keywords, relations) in input order.
+    Long documents are split into segments and their results merged.
+    """
+    def segments():
+        for idx, text in enumerate(texts):
+            for seg in split_segments(text, segment_chars) if text and text.strip() else []:
+                yield seg, idx
+
+    current, parts, next_idx = None, [], 0
+    docs = nlp.pipe(segments(), as_tuples=True, n_process=n_process, batch_size=batch_size)
+    for doc, idx in metrics.timed_iter("spacy.parse", docs, nbytes=lambda item: len(item[0].text.encode("utf-8"))):
+        if idx != current:
+            if current is not None:
+                yield (current, *_merge_segments(parts))
+                next_idx = current + 1
+            # documents with no text produce no segments
+            while next_idx < idx:
+                yield next_idx, [], []
+                next_idx += 1
+            current, parts = idx, []
+        parts.append(doc.user_data["kg"])
+    if current is not None:
+        yield (current, *_merge_segments(parts))
+        next_idx = current + 1
+    while next_idx < len(texts):
+        yield next_idx, [], []
+        next_idx += 1
+
+def update_subject(store: KnowledgeGraphStore, data: dict, n_process: int = 1, batch_size: int = BATCH_SIZE):
+    """Re-parses only the new or changed files of one processed-text subject into the store."""
+    subject = data.get("subject", "Unknown")
+    files = [(file.get("filename", "Unknown file"), clean_text(file.get("text", ""))) for file in data.get("files", [])]
+    stale = store.stale_files(subject, files)
+    print(f"📚 {subject}: {len(files)} files, {len(stale)} new or changed.")
+
+    def build(texts):
+        for idx, keywords, relations in build_knowledge_graphs(texts, n_process=n_process, batch_size=batch_size):
+            print(f"✅ Processed: {stale[idx][0]} | Found {len(keywords)} keywords and {len(relations)} relations.")
+            yield idx, keywords, relations
+
+    rebuilt, removed = store.update_subject(subject, files, build)
+    for name in removed:
+        print(f"🗑️ Removed: {name}")
+    db = db_utils.get_store()
+    if db is not None:
+        # rebuilt files, plus any the store is missing or has at another hash
+        # (e.g. the store was switched on after the graph was built)
+        entries = store.subjects[subject]
+        stored = {d["filename"]: d.get("hash") for d in db.find("kg_files", subject)}
+        changed = {name: entry for name, entry in entries.items()
+                   if name in rebuilt or stored.get(name) != entry.get("hash")}
+        db_utils.save_kg_files(db, subject, changed, list(entries))
+    return subject
+
+def process_all_files(input_json: str, output_dir: str, n_process: int = 1, batch_size: int = BATCH_SIZE):
+    """
+    Updates the subject's knowledge graph in the shared store and exports it
+    as knowledge_graph.json.
+    """
     os.makedirs(output_dir, exist_ok=True)
     with open(input_json, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    output_data = {"subject": data.get("subject", "Unknown"), "files": []}
-
-    for file in data.get("files", []):
-        filename = file.get("filename", "Unknown file")
-        print(f"Processing: {filename}...")
-        cleaned = clean_text(file.get("text", ""))
-        keywords, relations = create_knowledge_graph(cleaned)
-        
-        output_data["files"].append({
-            "filename": filename,
-            "ranked_keywords": keywords,
-            "relations": relations
-        })
-        print(f"✅ Processed: {filename} | Found {len(keywords)} keywords and {len(relations)} relations.")
+    store = KnowledgeGraphStore(os.path.join(output_dir, "knowledge_graph_store.json"))
+    subject = update_subject(store, data, n_process, batch_size)
+    store.save()
 
+    graph = store.subject_graph(subject)
     output_path = os.path.join(output_dir, "knowledge_graph.json")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    save_json(graph, output_path)
+    # compact copy that HybridQASystem can memory-map at startup
+    CompactKnowledgeGraph.from_json(graph).save(os.path.join(output_dir, "knowledge_graph.kgb"))
     print(f"\n✅ Knowledge Graph saved to: {output_path}")
+    return store
+
+def process_all_subjects(processed_dir: str, output_dir: str, n_process: int = 1, batch_size: int = BATCH_SIZE):
+    """Brings every subject in processed_dir up to date in one knowledge graph store."""
+    store = KnowledgeGraphStore(os.path.join(output_dir, "knowledge_graph_store.json"))
+    for path in sorted(glob.glob(os.path.join(processed_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            update_subject(store, json.load(f), n_process, batch_size)
+        store.save()  # save after each subject so an interrupted run keeps its progress
+    print(f"\n✅ Knowledge graph store saved to: {store.path}")
+    return store
 
 if __name__ == "__main__":
-    input_path = "data/processed_text/Big Data Analytics.json"
-    output_folder = "./output"
-    process_all_files(input_path, output_folder)
\ No newline at end of file
+    with profiling.from_argv("generate_keywords"):
+        # profiled runs parse in-process so cProfile sees the spaCy work
+        n_process = 1 if profiling.active() else max(1, min(4, os.cpu_count() or 1))
+        if len(sys.argv) > 1 and sys.argv[1] == "--all":
+            process_all_subjects("data/processed_text", "./output", n_process=n_process)
+        else:
+            input_path = sys.argv[1] if len(sys.argv) > 1 else "data/processed_text/Big Data Analytics.json"
+            output_folder = "./output"
+            process_all_files(input_path, output_folder, n_process=n_process)
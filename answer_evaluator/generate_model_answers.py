@@ -1,5 +1,14 @@
+import os
+import sys
 import json
-from gensim.summarization import summarize
+
+# allow `python answer_evaluator/generate_model_answers.py` to import sibling modules
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from answer_evaluator.summarizer import summarize
+from utils.file_utils import save_json
 
 def generate_model_answers(input_json, output_json, ratio=0.05):
     with open(input_json, "r", encoding="utf-8") as f:
@@ -13,8 +22,7 @@ def generate_model_answers(input_json, output_json, ratio=0.05):
             file["model_answer"] = text[:500]
         print(f"✅ Summarized: {file['filename']}")
 
-    with open(output_json, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    save_json(data, output_json)
     print(f"✅ Model answers saved to {output_json}")
 
 
@@ -0,0 +1,90 @@
+from collections import deque
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick automaton over the keywords of many topics.
+
+    The student text is lowercased and scanned once; every keyword occurrence
+    that sits on word boundaries is reported, whichever topic it belongs to.
+    """
+
+    def __init__(self, keywords_by_topic):
+        self.topics = {topic: list(kws) for topic, kws in keywords_by_topic.items()}
+        self.patterns = []       # distinct lowercase keywords
+        self._pattern_ids = {}
+        self._goto = [{}]        # state -> {char: state}
+        self._fail = [0]
+        self._out = [[]]         # state -> pattern ids ending here (incl. via fail links)
+
+        for kws in self.topics.values():
+            for kw in kws:
+                self._add(kw.lower())
+        self._build_links()
+
+    def _add(self, pattern):
+        if not pattern or pattern in self._pattern_ids:
+            return
+        pid = self._pattern_ids[pattern] = len(self.patterns)
+        self.patterns.append(pattern)
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pid)
+
+    def _build_links(self):
+        # depth-1 states keep fail = root; BFS fills the deeper ones
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """Ids of the patterns that occur in `text` as whole words/phrases."""
+        text = text.lower()
+        n = len(text)
+        found = set()
+        state = 0
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                if pid in found:
+                    continue
+                start = i - len(patterns[pid]) + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (i + 1 == n or not text[i + 1].isalnum()):
+                    found.add(pid)
+        return found
+
+    def match(self, text):
+        """
+        Scans `text` once and returns {topic: (score, found, missing)} with the
+        same score/found/missing meaning as keyword_match_score.
+        """
+        found_ids = self.scan(text)
+        results = {}
+        for topic, kws in self.topics.items():
+            found, missing = [], []
+            for kw in kws:
+                if self._pattern_ids.get(kw.lower()) in found_ids:
+                    found.append(kw)
+                else:
+                    missing.append(kw)
+            score = len(found) / len(kws) if kws else 0
+            results[topic] = (round(score, 2), found, missing)
+        return results
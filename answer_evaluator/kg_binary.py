@@ -0,0 +1,300 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import numpy as np
+
+# allow `python answer_evaluator/kg_binary.py` to import the shared utils package
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from utils.file_utils import save_json, atomic_open
+
+MAGIC = b"KGB1"
+ALIGN = 8
+
+# file-level list fields and the arrays that hold them
+LIST_FIELDS = ("ranked_keywords", "relations", "concepts", "semantically_related")
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class CompactKnowledgeGraph:
+    """
+    Array-backed knowledge graph for one subject.
+
+    Every keyword, relation term and concept is interned once in a UTF-8
+    string table; files refer to them by integer id:
+      - postings:  (file, keyword_id, rank, count) as parallel arrays,
+                   with optional original_forms as id lists
+      - relations: (subject_id, verb_id, object_id) rows
+      - concepts / semantically_related (contextual graph) likewise.
+    Per-file slices are found through `*_offsets` arrays (CSR style).
+    Saved as one file (.kgb) that `load` memory-maps without parsing.
+    """
+
+    def __init__(self, subject, filenames, arrays, fields=None, keyword_fields=None, _mmap=None):
+        self.subject = subject
+        self.filenames = list(filenames)
+        self.arrays = arrays
+        self.fields = fields or ["filename", "ranked_keywords", "relations"]
+        self.keyword_fields = keyword_fields or ["keyword", "rank", "count"]
+        self._mmap = _mmap  # keeps the mapping alive for the zero-copy arrays
+        self._strings = None
+        self._string_ids = None
+
+    # ------------------------------------------------------------------------
+    # String table
+    # ------------------------------------------------------------------------
+
+    @property
+    def n_strings(self):
+        return len(self.arrays["string_offsets"]) - 1
+
+    def string(self, idx):
+        off = self.arrays["string_offsets"]
+        return self.arrays["string_data"][off[idx]:off[idx + 1]].tobytes().decode("utf-8")
+
+    def strings(self):
+        """All interned strings, decoded once and cached."""
+        if self._strings is None:
+            off = self.arrays["string_offsets"]
+            data = self.arrays["string_data"].tobytes()
+            self._strings = [data[off[i]:off[i + 1]].decode("utf-8") for i in range(self.n_strings)]
+        return self._strings
+
+    def string_id(self, text):
+        """Id of an interned string, or None."""
+        if self._string_ids is None:
+            self._string_ids = {s: i for i, s in enumerate(self.strings())}
+        return self._string_ids.get(text)
+
+    # ------------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------------
+
+    def keyword_ids(self):
+        """Distinct keyword ids across all files, ascending."""
+        return np.unique(self.arrays["post_keyword"])
+
+    def file_scores(self, keyword_ids):
+        """Sum of ranks of the given keywords per file (shape: n_files)."""
+        a = self.arrays
+        mask = np.isin(a["post_keyword"], np.asarray(keyword_ids, dtype=np.uint32))
+        post_file = np.repeat(np.arange(len(self.filenames)), np.diff(a["file_post_offsets"]))
+        return np.bincount(post_file[mask], weights=a["post_rank"][mask], minlength=len(self.filenames))
+
+    def keywords(self, file_idx):
+        a = self.arrays
+        start, end = a["file_post_offsets"][file_idx], a["file_post_offsets"][file_idx + 1]
+        out = []
+        for p in range(start, end):
+            kw = {}
+            for field in self.keyword_fields:
+                if field == "keyword":
+                    kw["keyword"] = self.string(a["post_keyword"][p])
+                elif field == "rank":
+                    kw["rank"] = float(a["post_rank"][p])
+                elif field == "count":
+                    kw["count"] = int(a["post_count"][p])
+                elif field == "original_forms":
+                    lo, hi = a["form_offsets"][p], a["form_offsets"][p + 1]
+                    kw["original_forms"] = [self.string(i) for i in a["form_ids"][lo:hi]]
+            out.append(kw)
+        return out
+
+    def relations(self, file_idx):
+        a = self.arrays
+        lo, hi = a["file_rel_offsets"][file_idx], a["file_rel_offsets"][file_idx + 1]
+        return [[self.string(i) for i in row] for row in a["rel_ids"][lo:hi]]
+
+    def concepts(self, file_idx):
+        a = self.arrays
+        lo, hi = a["file_concept_offsets"][file_idx], a["file_concept_offsets"][file_idx + 1]
+        return [self.string(i) for i in a["concept_ids"][lo:hi]]
+
+    def semantically_related(self, file_idx):
+        a = self.arrays
+        lo, hi = a["file_related_offsets"][file_idx], a["file_related_offsets"][file_idx + 1]
+        return [
+            [self.string(x), self.string(y), float(score)]
+            for (x, y), score in zip(a["related_ids"][lo:hi], a["related_score"][lo:hi])
+        ]
+
+    # ------------------------------------------------------------------------
+    # JSON conversion
+    # ------------------------------------------------------------------------
+
+    @classmethod
+    def from_json(cls, data):
+        """Builds the compact graph from the knowledge_graph.json style dict."""
+        strings, index = [], {}
+
+        def intern(text):
+            idx = index.get(text)
+            if idx is None:
+                idx = index[text] = len(strings)
+                strings.append(text)
+            return idx
+
+        files = data.get("files", [])
+        fields, keyword_fields = [], []
+        for file in files:
+            fields += [k for k in file if k not in fields]
+            for kw in file.get("ranked_keywords", []):
+                keyword_fields += [k for k in kw if k not in keyword_fields]
+        has_forms = "original_forms" in keyword_fields
+
+        post_kw, post_rank, post_count, post_off = [], [], [], [0]
+        form_ids, form_off = [], [0]
+        rel_ids, rel_off = [], [0]
+        concept_ids, concept_off = [], [0]
+        related_ids, related_score, related_off = [], [], [0]
+        for file in files:
+            for kw in file.get("ranked_keywords", []):
+                post_kw.append(intern(kw["keyword"]))
+                post_rank.append(kw.get("rank", 0.0))
+                post_count.append(kw.get("count", 0))
+                if has_forms:
+                    form_ids += [intern(f) for f in kw.get("original_forms", [])]
+                    form_off.append(len(form_ids))
+            post_off.append(len(post_kw))
+            for rel in file.get("relations", []):
+                rel_ids.append([intern(t) for t in rel])
+            rel_off.append(len(rel_ids))
+            concept_ids += [intern(c) for c in file.get("concepts", [])]
+            concept_off.append(len(concept_ids))
+            for x, y, score in file.get("semantically_related", []):
+                related_ids.append([intern(x), intern(y)])
+                related_score.append(score)
+            related_off.append(len(related_ids))
+
+        encoded = [s.encode("utf-8") for s in strings]
+        string_off = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(b) for b in encoded], out=string_off[1:])
+        u32 = lambda x: np.asarray(x, dtype=np.uint32)
+        arrays = {
+            "string_offsets": string_off,
+            "string_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "file_post_offsets": u32(post_off),
+            "post_keyword": u32(post_kw),
+            "post_rank": np.asarray(post_rank, dtype=np.float64),
+            "post_count": u32(post_count),
+            "file_rel_offsets": u32(rel_off),
+            "rel_ids": u32(rel_ids).reshape(-1, 3),
+        }
+        if has_forms:
+            arrays["form_offsets"] = u32(form_off)
+            arrays["form_ids"] = u32(form_ids)
+        if "concepts" in fields:
+            arrays["file_concept_offsets"] = u32(concept_off)
+            arrays["concept_ids"] = u32(concept_ids)
+        if "semantically_related" in fields:
+            arrays["file_related_offsets"] = u32(related_off)
+            arrays["related_ids"] = u32(related_ids).reshape(-1, 2)
+            arrays["related_score"] = np.asarray(related_score, dtype=np.float64)
+
+        graph = cls(data.get("subject", "Unknown"), [f.get("filename", "") for f in files], arrays,
+                    fields or None, keyword_fields or None)
+        graph._strings = strings
+        graph._string_ids = index
+        return graph
+
+    def to_json(self):
+        """Converts back to the knowledge_graph.json style dict."""
+        readers = {
+            "ranked_keywords": self.keywords,
+            "relations": self.relations,
+            "concepts": self.concepts,
+            "semantically_related": self.semantically_related,
+        }
+        files = []
+        for i, name in enumerate(self.filenames):
+            entry = {}
+            for field in self.fields:
+                entry[field] = name if field == "filename" else readers[field](i)
+            files.append(entry)
+        return {"subject": self.subject, "files": files}
+
+    # ------------------------------------------------------------------------
+    # Binary file
+    # ------------------------------------------------------------------------
+
+    def save(self, path):
+        """Writes the header (JSON meta) followed by 8-byte aligned raw arrays."""
+        layout, offset = {}, 0
+        for name, arr in self.arrays.items():
+            arr = np.ascontiguousarray(arr)
+            layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset = _aligned(offset + arr.nbytes)
+        meta = json.dumps({
+            "subject": self.subject,
+            "filenames": self.filenames,
+            "fields": self.fields,
+            "keyword_fields": self.keyword_fields,
+            "arrays": layout,
+        }, ensure_ascii=False).encode("utf-8")
+
+        header_len = _aligned(len(MAGIC) + 4 + len(meta))
+        # atomic: readers may have the previous file memory-mapped
+        with atomic_open(path) as f:
+            f.write(MAGIC + struct.pack("<I", len(meta)) + meta)
+            f.write(b"\0" * (header_len - f.tell()))
+            for name, arr in self.arrays.items():
+                f.write(np.ascontiguousarray(arr).tobytes())
+                f.write(b"\0" * (header_len + _aligned(f.tell() - header_len) - f.tell()))
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps a .kgb file; arrays are views into the mapping (no parsing)."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:4] != MAGIC:
+            raise ValueError(f"{path} is not a compact knowledge graph file")
+        (meta_len,) = struct.unpack_from("<I", mm, 4)
+        meta = json.loads(mm[8:8 + meta_len].decode("utf-8"))
+        header_len = _aligned(len(MAGIC) + 4 + meta_len)
+
+        arrays = {}
+        for name, info in meta["arrays"].items():
+            dtype = np.dtype(info["dtype"])
+            count = int(np.prod(info["shape"])) if info["shape"] else 1
+            arr = np.frombuffer(mm, dtype=dtype, count=count, offset=header_len + info["offset"])
+            arrays[name] = arr.reshape(info["shape"])
+        return cls(meta["subject"], meta["filenames"], arrays, meta["fields"], meta["keyword_fields"], _mmap=mm)
+
+
+def json_to_binary(json_path, kgb_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        CompactKnowledgeGraph.from_json(json.load(f)).save(kgb_path)
+    print(f"✅ {json_path} ({os.path.getsize(json_path) / 1024:.0f} KB) -> "
+          f"{kgb_path} ({os.path.getsize(kgb_path) / 1024:.0f} KB)")
+
+
+def binary_to_json(kgb_path, json_path):
+    data = CompactKnowledgeGraph.load(kgb_path).to_json()
+    save_json(data, json_path)
+    print(f"✅ {kgb_path} -> {json_path}")
+
+
+def load_graph(path):
+    """Loads a knowledge graph from either a .kgb file or the JSON layout."""
+    if path.endswith(".kgb"):
+        return CompactKnowledgeGraph.load(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return CompactKnowledgeGraph.from_json(json.load(f))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-binary", "to-json"):
+        print("Usage: python answer_evaluator/kg_binary.py to-binary <graph.json> <graph.kgb>")
+        print("       python answer_evaluator/kg_binary.py to-json <graph.kgb> <graph.json>")
+        sys.exit(1)
+    if sys.argv[1] == "to-binary":
+        json_to_binary(sys.argv[2], sys.argv[3])
+    else:
+        binary_to_json(sys.argv[2], sys.argv[3])
@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+from utils.file_utils import save_json
+
+GRAPH_VERSION = 1  # bump when keyword/relation extraction changes so every file is rebuilt
+STORE_PATH = "output/knowledge_graph_store.json"
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class KnowledgeGraphStore:
+    """
+    Per-file knowledge graph results for every subject, kept in one store.
+
+    Each file entry carries the hash of the text it was built from, so an
+    update only re-parses files whose content changed or that are new.
+    Layout:
+        {"version": 1, "subjects": {subject: {filename: {"hash", "ranked_keywords", "relations"}}}}
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.subjects = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == GRAPH_VERSION:
+                self.subjects = data.get("subjects", {})
+            else:
+                print(f"⚠️ Knowledge graph store {path} is from an older version; rebuilding.")
+
+    def save(self):
+        save_json({"version": GRAPH_VERSION, "subjects": self.subjects}, self.path)
+
+    def stale_files(self, subject, files):
+        """Returns the (filename, text) pairs whose text differs from what is stored."""
+        stored = self.subjects.get(subject, {})
+        return [
+            (name, text) for name, text in files
+            if stored.get(name, {}).get("hash") != content_hash(text)
+        ]
+
+    def update_subject(self, subject, files, build):
+        """
+        Brings a subject up to date with `files` [(filename, text), ...].
+        `build(texts)` must yield (index, ranked_keywords, relations) for the
+        texts it is given; it is only called for changed files.
+        Files that disappeared from the subject are dropped.
+        Returns (rebuilt, removed) filename lists.
+        """
+        stored = self.subjects.get(subject, {})
+        stale = self.stale_files(subject, files)
+        rebuilt = {}
+        if stale:
+            for idx, keywords, relations in build([text for _, text in stale]):
+                name, text = stale[idx]
+                rebuilt[name] = {"hash": content_hash(text), "ranked_keywords": keywords, "relations": relations}
+
+        names = [name for name, _ in files]
+        removed = [name for name in stored if name not in set(names)]
+        # keep the subject's files in source order
+        self.subjects[subject] = {name: rebuilt.get(name, stored.get(name)) for name in names}
+        return list(rebuilt), removed
+
+    def subject_graph(self, subject):
+        """The subject in the knowledge_graph.json layout used by the QA system."""
+        return {
+            "subject": subject,
+            "files": [
+                {"filename": name, "ranked_keywords": entry["ranked_keywords"], "relations": entry["relations"]}
+                for name, entry in self.subjects.get(subject, {}).items()
+            ],
+        }
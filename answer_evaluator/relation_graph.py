@@ -0,0 +1,161 @@
+import numpy as np
+
+
+def _csr(src, dst, n_nodes):
+    """Sorts edges by source into CSR (indptr, indices, edge order)."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=indptr[1:])
+    return indptr, dst[order].astype(np.int32, copy=False), order
+
+
+def _gather(indptr, indices, nodes):
+    """Concatenated CSR rows of `nodes`, without a Python loop."""
+    starts = indptr[nodes]
+    lens = indptr[nodes + 1] - starts
+    total = int(lens.sum())
+    if total == 0:
+        return np.zeros(0, dtype=indices.dtype)
+    # position of each output element inside `indices`
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lens)[:-1])), lens)
+    return indices[offsets + np.arange(total)]
+
+
+class RelationGraph:
+    """
+    Subject-verb-object relations as a directed graph over term ids, with
+    CSR adjacency for outgoing and incoming edges. Supports neighbour
+    lookups, k-hop expansion and PageRank / degree centrality.
+    """
+
+    def __init__(self, src, verb, dst, names):
+        self.names = list(names)
+        self.n_nodes = len(self.names)
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.verb = np.asarray(verb, dtype=np.int32)
+        self.out_indptr, self.out_indices, self.out_order = _csr(self.src, self.dst, self.n_nodes)
+        self.in_indptr, self.in_indices, _ = _csr(self.dst, self.src, self.n_nodes)
+        self._ids = None
+        self._pagerank = None
+
+    @classmethod
+    def from_triples(cls, triples):
+        """Builds the graph from [subject, verb, object] string triples."""
+        index, names = {}, []
+
+        def intern(term):
+            idx = index.get(term)
+            if idx is None:
+                idx = index[term] = len(names)
+                names.append(term)
+            return idx
+
+        ids = np.array([[intern(s), intern(v), intern(o)] for s, v, o in triples], dtype=np.int32).reshape(-1, 3)
+        graph = cls(ids[:, 0], ids[:, 1], ids[:, 2], names)
+        graph._ids = index
+        return graph
+
+    @classmethod
+    def from_compact(cls, compact):
+        """Reuses the interned ids of a CompactKnowledgeGraph (all files)."""
+        rel = compact.arrays["rel_ids"]
+        return cls(rel[:, 0], rel[:, 1], rel[:, 2], compact.strings())
+
+    # ------------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------------
+
+    def node_id(self, name):
+        if self._ids is None:
+            self._ids = {n: i for i, n in enumerate(self.names)}
+        return self._ids.get(name)
+
+    def neighbors(self, node, direction="both"):
+        """Distinct neighbour ids of one node ('out', 'in' or 'both')."""
+        nodes = np.array([node], dtype=np.int64)
+        parts = []
+        if direction in ("out", "both"):
+            parts.append(_gather(self.out_indptr, self.out_indices, nodes))
+        if direction in ("in", "both"):
+            parts.append(_gather(self.in_indptr, self.in_indices, nodes))
+        return np.unique(np.concatenate(parts))
+
+    def edges_from(self, node):
+        """(verb, object) name pairs for the node's outgoing relations."""
+        lo, hi = self.out_indptr[node], self.out_indptr[node + 1]
+        edges = self.out_order[lo:hi]
+        return [(self.names[self.verb[e]], self.names[self.dst[e]]) for e in edges]
+
+    def k_hop(self, seeds, k=2, direction="both"):
+        """
+        Breadth-first expansion from seed ids, one vectorized frontier per hop.
+        Returns {node_id: hop distance} including the seeds at distance 0.
+        """
+        dist = np.full(self.n_nodes, -1, dtype=np.int32)
+        frontier = np.unique(np.asarray(seeds, dtype=np.int64))
+        dist[frontier] = 0
+        for hop in range(1, k + 1):
+            if frontier.size == 0:
+                break
+            parts = []
+            if direction in ("out", "both"):
+                parts.append(_gather(self.out_indptr, self.out_indices, frontier))
+            if direction in ("in", "both"):
+                parts.append(_gather(self.in_indptr, self.in_indices, frontier))
+            nxt = np.unique(np.concatenate(parts))
+            nxt = nxt[dist[nxt] < 0]
+            dist[nxt] = hop
+            frontier = nxt.astype(np.int64)
+        reached = np.flatnonzero(dist >= 0)
+        return dict(zip(reached.tolist(), dist[reached].tolist()))
+
+    # ------------------------------------------------------------------------
+    # Centrality
+    # ------------------------------------------------------------------------
+
+    def degree_centrality(self):
+        deg = np.diff(self.out_indptr) + np.diff(self.in_indptr)
+        return deg / max(1, self.n_nodes - 1)
+
+    def pagerank(self, damping=0.85, iters=50, tol=1e-8):
+        """PageRank by power iteration over the edge arrays (cached)."""
+        if self._pagerank is not None:
+            return self._pagerank
+        n = self.n_nodes
+        if n == 0:
+            self._pagerank = np.zeros(0)
+            return self._pagerank
+        out_deg = np.diff(self.out_indptr).astype(np.float64)
+        rank = np.full(n, 1.0 / n)
+        dangling = out_deg == 0
+        weight = 1.0 / np.where(dangling, 1.0, out_deg)
+        for _ in range(iters):
+            contrib = np.bincount(self.dst, weights=(rank * weight)[self.src], minlength=n)
+            new = (1 - damping) / n + damping * (contrib + rank[dangling].sum() / n)
+            if np.abs(new - rank).sum() < tol:
+                rank = new
+                break
+            rank = new
+        self._pagerank = rank
+        return rank
+
+    def expand_terms(self, terms, k=1, top_n=5, stopwords=(), min_len=3):
+        """
+        Related concepts for a set of terms: nodes within k hops of the terms
+        that are graph nodes, closest first, then by PageRank. Stopwords
+        (pronouns included) and terms shorter than `min_len` are neither used
+        as seeds nor returned.
+        """
+        def usable(term):
+            return len(term) >= min_len and term not in stopwords
+
+        seeds = [i for i in (self.node_id(t) for t in terms if usable(t)) if i is not None]
+        if not seeds:
+            return []
+        hops = self.k_hop(seeds, k)
+        seed_set = set(seeds)
+        rank = self.pagerank()
+        candidates = [n for n in hops if n not in seed_set and usable(self.names[n])]
+        candidates.sort(key=lambda n: (hops[n], -rank[n]))
+        return [self.names[n] for n in candidates[:top_n]]
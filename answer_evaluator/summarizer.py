@@ -0,0 +1,77 @@
+import re
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils import metrics
+
+DAMPING = 0.85
+MAX_ITERS = 100
+TOL = 1e-6
+
+
+def split_sentences(text):
+    """
+    Sentence / slide-line splitter used for lecture text. Repeated lines
+    (slide titles on every page) are kept once, at their first occurrence.
+    """
+    seen, out = set(), []
+    for sent in re.split(r'(?<=[.!?])\s+|\n+', text):
+        sent = sent.strip()
+        key = sent.lower()
+        if len(sent) > 10 and key not in seen:
+            seen.add(key)
+            out.append(sent)
+    return out
+
+
+def similarity_graph(sentences, embedder=None):
+    """
+    Sparse sentence similarity matrix without self loops: cosine over
+    TF-IDF vectors, or over sentence embeddings when an embedder is given.
+    """
+    if embedder is not None:
+        with metrics.span("embed.encode", items=len(sentences)):
+            emb = embedder.encode(sentences, convert_to_numpy=True, normalize_embeddings=True)
+        sim = np.clip(emb @ emb.T, 0.0, None)
+        np.fill_diagonal(sim, 0.0)
+        return sp.csr_matrix(sim)
+    # raises ValueError when nothing but stop words is left
+    tfidf = TfidfVectorizer(stop_words="english", sublinear_tf=True).fit_transform(sentences)
+    sim = (tfidf @ tfidf.T).tocsr()
+    sim.setdiag(0.0)
+    sim.eliminate_zeros()
+    return sim
+
+
+def textrank(sim, damping=DAMPING, max_iters=MAX_ITERS, tol=TOL):
+    """Weighted PageRank scores of a (symmetric) similarity graph by power iteration."""
+    n = sim.shape[0]
+    out_weight = np.asarray(sim.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    # column-stochastic transition: rank flows along edges proportionally to weight
+    transition = sp.diags(1.0 / np.where(dangling, 1.0, out_weight)) @ sim
+    transition = transition.T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iters):
+        new = (1 - damping) / n + damping * (transition @ rank + rank[dangling].sum() / n)
+        if np.abs(new - rank).sum() < tol:
+            return new
+        rank = new
+    return rank
+
+
+@metrics.timed("summarize")
+def summarize(text, ratio=0.2, embedder=None):
+    """
+    Extractive summary: the top `ratio` share of sentences by TextRank,
+    joined in their original order. Raises ValueError for text with fewer
+    than two sentences, like gensim's summarize did.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) < 2:
+        raise ValueError("input must have more than one sentence")
+
+    rank = textrank(similarity_graph(sentences, embedder))
+    k = max(1, int(len(sentences) * ratio))
+    top = np.sort(np.argsort(-rank, kind="stable")[:k])
+    return "\n".join(sentences[i] for i in top)
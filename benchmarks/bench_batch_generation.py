@@ -0,0 +1,75 @@
+# benchmarks/bench_batch_generation.py
+"""
+Aggregate generation throughput with 1 / 4 / 16 concurrent clients,
+unbatched (max_batch_size=1) vs batched.
+
+    python benchmarks/bench_batch_generation.py [model_name] [max_new_tokens]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+from utils.batch_generator import BatchGenerationScheduler
+
+MODEL_NAME = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+CLIENT_COUNTS = [1, 4, 16]
+PROMPTS_PER_CLIENT = 2
+PROMPTS = [
+    "Explain the CAP theorem in distributed systems.",
+    "What are the 5 Vs of big data?",
+    "Describe the architecture of Hadoop HDFS.",
+    "Compare supervised and unsupervised learning.",
+    "What is a fuzzy membership function?",
+    "Explain MapReduce with an example.",
+    "What is eventual consistency in NoSQL databases?",
+    "Describe the working of a perceptron.",
+]
+
+
+def run_clients(scheduler, n_clients):
+    def client(idx):
+        tokens = 0
+        for j in range(PROMPTS_PER_CLIENT):
+            req = scheduler.submit(PROMPTS[(idx + j) % len(PROMPTS)])
+            req.result()
+            tokens += req.num_tokens
+        return tokens
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_clients) as pool:
+        tokens = sum(pool.map(client, range(n_clients)))
+    return tokens, time.perf_counter() - start
+
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else MODEL_NAME
+    max_new_tokens = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+        device_map="auto"
+    )
+
+    print(f"Model: {model_name} | max_new_tokens={max_new_tokens} | prompts/client={PROMPTS_PER_CLIENT}\n")
+    print(f"{'clients':>8} {'max_batch':>10} {'tokens':>8} {'seconds':>9} {'tok/s':>8} {'batches':>8}")
+    for n_clients in CLIENT_COUNTS:
+        for max_batch in (1, 16):
+            # greedy decoding keeps the work per prompt comparable across runs
+            with BatchGenerationScheduler(model, tokenizer, max_batch_size=max_batch,
+                                          max_new_tokens=max_new_tokens, do_sample=False) as scheduler:
+                tokens, elapsed = run_clients(scheduler, n_clients)
+                batches = scheduler.stats["batches"]
+            print(f"{n_clients:>8} {max_batch:>10} {tokens:>8} {elapsed:>9.2f} {tokens / elapsed:>8.1f} {batches:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_batch_grading.py
+"""
+Class-wide grading: one evaluate_student_answer call per student (model
+JSON re-read and matchers rebuilt every time) vs evaluate_batch over a
+JSONL cohort. Model answers and keywords are synthesized from
+data/processed_text, students are paraphrased slices of the material.
+
+    python benchmarks/bench_batch_grading.py [n_students] [workers]
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import random
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from answer_evaluator.evaluate_student_answer import evaluate_student_answer, evaluate_batch
+
+N_STUDENTS = 1000
+N_SINGLE = 20              # the per-call path is timed on a sample and extrapolated
+MODEL_ANSWER_CHARS = 500
+KEYWORDS_PER_TOPIC = 40
+STUDENT_WORDS = 150
+
+
+def build_model_json(path):
+    files = []
+    for src in sorted(glob.glob(os.path.join(ROOT_DIR, "data", "processed_text", "*.json"))):
+        with open(src, "r", encoding="utf-8") as f:
+            for file in json.load(f)["files"]:
+                text = file.get("text", "")
+                if not text:
+                    continue
+                words = list(dict.fromkeys(re.findall(r"[a-z]{6,}", text.lower())))
+                files.append({"filename": file["filename"], "model_answer": text[:MODEL_ANSWER_CHARS],
+                              "keywords": words[:KEYWORDS_PER_TOPIC]})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"subject": "bench", "files": files}, f)
+    return files
+
+
+def build_students(files, n, path, rng):
+    words = " ".join(f["model_answer"] for f in files).split()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            start = rng.randrange(0, max(1, len(words) - STUDENT_WORDS))
+            answer = " ".join(w for w in words[start:start + STUDENT_WORDS] if rng.random() > 0.15)
+            f.write(json.dumps({"student_id": f"student{i:04d}", "answer": answer}) + "\n")
+
+
+def main():
+    n_students = int(sys.argv[1]) if len(sys.argv) > 1 else N_STUDENTS
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    tmp = tempfile.mkdtemp(prefix="bench_grading_")
+    model_path = os.path.join(tmp, "model.json")
+    students_path = os.path.join(tmp, "students.jsonl")
+    files = build_model_json(model_path)
+    build_students(files, n_students, students_path, random.Random(0))
+    print(f"{n_students} students x {len(files)} topics")
+
+    with open(students_path, "r", encoding="utf-8") as f:
+        sample = [json.loads(line) for _, line in zip(range(N_SINGLE), f)]
+    start = time.perf_counter()
+    for i, student in enumerate(sample):
+        single_path = os.path.join(tmp, f"single{i}.json")
+        with open(single_path, "w", encoding="utf-8") as f:
+            json.dump(student, f)
+        evaluate_student_answer(single_path, model_path, os.path.join(tmp, f"single{i}_eval.json"))
+    per_student = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    evaluate_batch(students_path, model_path, os.path.join(tmp, "results.jsonl"), workers=workers)
+    batch = time.perf_counter() - start
+
+    print(f"\n{'per-student calls (extrapolated)':<35} {per_student * n_students:>8.1f} s")
+    print(f"{'evaluate_batch':<35} {batch:>8.1f} s")
+    print(f"speedup: {per_student * n_students / batch:.1f}x")
+
+if __name__ == "__main__":
+    main()
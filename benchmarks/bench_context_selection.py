@@ -0,0 +1,109 @@
+# benchmarks/bench_context_selection.py
+"""
+Compares the old `content[:3000]` prompt context with ContextBuilder packing
+on the question banks in data/processed_text.
+
+Reports prompt tokens, a recall proxy (share of the question's 10 most similar
+sentences anywhere in the subject that made it into the context) and, with
+--generate, keypoint generation latency.
+
+    python benchmarks/bench_context_selection.py [--generate] [model_name]
+"""
+import os
+import sys
+import glob
+import json
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer
+from keypoint_model.utils.context_builder import ContextBuilder, split_sentences
+from keypoint_model.utils.keypoint_logic import build_keypoint_prompt, CONTEXT_TOKEN_BUDGET, TOP_K_FILES
+
+MODEL_NAME = "microsoft/Phi-3-mini-4k-instruct"
+INPUT_FOLDER = os.path.join(ROOT_DIR, "data", "processed_text")
+ORACLE_K = 10
+
+
+def load_subject(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    questions, contents, names = [], [], []
+    for item in data.get("files", []):
+        name = item.get("filename", "")
+        text = item.get("text", "").strip()
+        if not text:
+            continue
+        if "qb" in name.lower() or "question" in name.lower():
+            questions += [l.strip() for l in text.split("\n") if l.strip() and any(c.isalpha() for c in l)]
+        else:
+            contents.append(text)
+            names.append(name)
+    return questions, contents, names
+
+
+def main():
+    generate = "--generate" in sys.argv
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    model_name = args[0] if args else MODEL_NAME
+
+    embedder = SentenceTransformer("all-MiniLM-L6-v2")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    generator = None
+    if generate:
+        from transformers import pipeline
+        generator = pipeline("text-generation", model=model_name, max_new_tokens=200, device_map="auto")
+
+    print(f"{'subject':<40} {'q':>4} {'old tok':>8} {'new tok':>8} {'old rec':>8} {'new rec':>8} {'build ms':>9}")
+    for path in sorted(glob.glob(os.path.join(INPUT_FOLDER, "*.json"))):
+        questions, contents, names = load_subject(path)
+        if not questions or not contents:
+            continue
+
+        # oracle: the sentences most similar to each question across the whole subject
+        all_sents = [s for text in contents for s in split_sentences(text)]
+        sent_emb = embedder.encode(all_sents, convert_to_numpy=True, normalize_embeddings=True)
+        doc_emb = embedder.encode(contents, convert_to_numpy=True, normalize_embeddings=True)
+
+        builder = ContextBuilder(embedder, tokenizer, token_budget=CONTEXT_TOKEN_BUDGET, top_k_files=TOP_K_FILES)
+        builder.index(contents, names)
+
+        old_tok, new_tok, old_rec, new_rec, build_s, old_gen, new_gen = [], [], [], [], 0.0, 0.0, 0.0
+        for q in questions:
+            q_emb = embedder.encode(q, convert_to_numpy=True, normalize_embeddings=True)
+            oracle = [all_sents[i] for i in np.argsort(-(sent_emb @ q_emb))[:ORACLE_K]]
+
+            old_ctx = contents[int(np.argmax(doc_emb @ q_emb))][:3000]
+            start = time.perf_counter()
+            new_ctx, _ = builder.build(q)
+            build_s += time.perf_counter() - start
+
+            old_prompt = build_keypoint_prompt(q, old_ctx)
+            new_prompt = build_keypoint_prompt(q, new_ctx)
+            old_tok.append(len(tokenizer.encode(old_prompt)))
+            new_tok.append(len(tokenizer.encode(new_prompt)))
+            old_rec.append(sum(s in old_ctx for s in oracle) / len(oracle))
+            new_rec.append(sum(s in new_ctx for s in oracle) / len(oracle))
+
+            if generator is not None:
+                start = time.perf_counter()
+                generator(old_prompt)
+                old_gen += time.perf_counter() - start
+                start = time.perf_counter()
+                generator(new_prompt)
+                new_gen += time.perf_counter() - start
+
+        subject = os.path.splitext(os.path.basename(path))[0][:40]
+        print(f"{subject:<40} {len(questions):>4} {np.mean(old_tok):>8.0f} {np.mean(new_tok):>8.0f} "
+              f"{np.mean(old_rec):>8.2f} {np.mean(new_rec):>8.2f} {build_s / len(questions) * 1000:>9.2f}")
+        if generator is not None:
+            print(f"{'':<40} generation s/question: old {old_gen / len(questions):.2f} | new {new_gen / len(questions):.2f}")
+
+
+if __name__ == "__main__":
+    main()
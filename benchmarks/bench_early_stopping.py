@@ -0,0 +1,116 @@
+# benchmarks/bench_early_stopping.py
+"""
+Average tokens generated and latency per prompt on a fixed prompt suite,
+with and without the structured stop conditions (and optionally with a
+draft model for assisted decoding).
+
+    python benchmarks/bench_early_stopping.py [model_name] [draft_model_name]
+"""
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteriaList
+from utils.stopping_criteria import TextStoppingCriteria, qna_stop_condition, keypoint_stop_condition
+from qna_system.qna import build_prompt
+from keypoint_model.utils.keypoint_logic import build_keypoint_prompt
+
+MODEL_NAME = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+QNA_MAX_NEW_TOKENS = 1500
+KEYPOINT_MAX_NEW_TOKENS = 300
+SEED = 0
+
+QNA_SUITE = [
+    "Explain the CAP theorem in distributed systems.",
+    "What are the 5 Vs of big data? Explain each.",
+    "Describe the architecture of Hadoop HDFS.",
+]
+KEYPOINT_SUITE = [
+    ("What is NoSQL? Explain its types.",
+     "NoSQL databases store data as key-value pairs, documents, wide columns or graphs. "
+     "They scale horizontally over a shared nothing architecture and relax ACID guarantees."),
+    ("Explain MapReduce.",
+     "MapReduce splits a job into map tasks that emit key-value pairs and reduce tasks that "
+     "aggregate values per key. Hadoop schedules tasks close to the data blocks in HDFS."),
+]
+
+
+def load(model_name):
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+        device_map="auto"
+    )
+    return model, tokenizer
+
+
+def run_suite(model, tokenizer, prompts, max_new_tokens, condition=None, assistant_model=None):
+    tokens, seconds = [], []
+    for prompt in prompts:
+        torch.manual_seed(SEED)
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        kwargs = {}
+        if condition is not None:
+            kwargs["stopping_criteria"] = StoppingCriteriaList(
+                [TextStoppingCriteria(tokenizer, condition(), inputs["input_ids"].shape[1])])
+        if assistant_model is not None:
+            kwargs["assistant_model"] = assistant_model
+        start = time.perf_counter()
+        with torch.inference_mode():
+            out = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=True,
+                temperature=0.6,
+                top_p=0.9,
+                repetition_penalty=1.15,
+                pad_token_id=tokenizer.eos_token_id,
+                **kwargs
+            )
+        seconds.append(time.perf_counter() - start)
+        tokens.append(out.shape[1] - inputs["input_ids"].shape[1])
+    return sum(tokens) / len(tokens), sum(seconds) / len(seconds)
+
+
+def report(name, baseline, variant):
+    base_tok, base_s = baseline
+    tok, s = variant
+    saved = (1 - s / base_s) * 100 if base_s else 0.0
+    print(f"{name:<28} {tok:>9.1f} {s:>9.2f}s {saved:>8.1f}%")
+
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else MODEL_NAME
+    draft_name = sys.argv[2] if len(sys.argv) > 2 else None
+    model, tokenizer = load(model_name)
+    draft = load(draft_name)[0] if draft_name else None
+
+    qna_prompts = [build_prompt(q) for q in QNA_SUITE]
+    kp_prompts = [build_keypoint_prompt(q, c) for q, c in KEYPOINT_SUITE]
+
+    print(f"Model: {model_name}" + (f" | draft: {draft_name}" if draft_name else ""))
+    print(f"{'suite':<28} {'avg tok':>9} {'avg lat':>10} {'saved':>9}")
+
+    qna_base = run_suite(model, tokenizer, qna_prompts, QNA_MAX_NEW_TOKENS)
+    report("qna / no stopping", qna_base, qna_base)
+    report("qna / stop conditions", qna_base,
+           run_suite(model, tokenizer, qna_prompts, QNA_MAX_NEW_TOKENS, qna_stop_condition))
+
+    kp_base = run_suite(model, tokenizer, kp_prompts, KEYPOINT_MAX_NEW_TOKENS)
+    report("keypoints / no stopping", kp_base, kp_base)
+    kp_stop = lambda: keypoint_stop_condition(6)
+    report("keypoints / stop conditions", kp_base,
+           run_suite(model, tokenizer, kp_prompts, KEYPOINT_MAX_NEW_TOKENS, kp_stop))
+    if draft is not None:
+        report("keypoints / stop + draft", kp_base,
+               run_suite(model, tokenizer, kp_prompts, KEYPOINT_MAX_NEW_TOKENS, kp_stop, assistant_model=draft))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_fuzzy_scoring.py
+"""
+Fuzzy scoring throughput: the old per-topic fuzzywuzzy loop (with and
+without python-Levenshtein) vs FuzzyEngine (rapidfuzz when installed),
+with the score differences so both stay comparable. Model answers are taken from data/processed_text.
+
+    python benchmarks/bench_fuzzy_scoring.py [n_students]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+from answer_evaluator.fuzzy_engine import FuzzyEngine, BACKEND
+
+N_STUDENTS = 50
+MODEL_ANSWER_CHARS = 500   # generate_model_answers falls back to text[:500]
+STUDENT_WORDS = 120
+
+
+def load_model_texts():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, "data", "processed_text", "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            texts += [file["text"][:MODEL_ANSWER_CHARS] for file in json.load(f)["files"] if file.get("text")]
+    return texts
+
+
+def synthetic_students(model_texts, n, rng):
+    words = " ".join(model_texts).split()
+    students = []
+    for _ in range(n):
+        start = rng.randrange(0, max(1, len(words) - STUDENT_WORDS))
+        chunk = words[start:start + STUDENT_WORDS]
+        # drop some words to look like a paraphrase
+        students.append(" ".join(w for w in chunk if rng.random() > 0.15))
+    return students
+
+
+def main():
+    n_students = int(sys.argv[1]) if len(sys.argv) > 1 else N_STUDENTS
+    model_texts = load_model_texts()
+    students = synthetic_students(model_texts, n_students, random.Random(0))
+    pairs = n_students * len(model_texts)
+    print(f"{n_students} students x {len(model_texts)} topics ({pairs} pairs), engine backend: {BACKEND}")
+
+    engine = FuzzyEngine(model_texts)
+    start = time.perf_counter()
+    scores = engine.score_many(students)
+    elapsed = time.perf_counter() - start
+    print(f"{'FuzzyEngine':<30} {pairs / elapsed:>10.0f} pairs/s")
+
+    try:
+        import difflib
+        from fuzzywuzzy import fuzz as fw
+    except ImportError:
+        print("fuzzywuzzy not installed; skipping the old path")
+        return
+    olds = {}
+    for label, matcher in (("fuzzywuzzy (installed)", None), ("fuzzywuzzy (pure difflib)", difflib.SequenceMatcher)):
+        if matcher is not None:
+            fw.SequenceMatcher = matcher  # what fuzzywuzzy uses without python-Levenshtein
+        start = time.perf_counter()
+        olds[label] = np.array([[fw.partial_ratio(m.lower(), s.lower()) for m in model_texts] for s in students]) / 100.0
+        elapsed = time.perf_counter() - start
+        print(f"{label:<30} {pairs / elapsed:>10.0f} pairs/s")
+
+    for label, old in olds.items():
+        diff = np.abs(old - scores)
+        print(f"FuzzyEngine vs {label}: mean diff {diff.mean():.3f}, max {diff.max():.3f}, "
+              f"identical {np.mean(diff == 0) * 100:.0f}%")
+
+if __name__ == "__main__":
+    main()
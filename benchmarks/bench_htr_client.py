@@ -0,0 +1,80 @@
+# benchmarks/bench_htr_client.py
+"""
+Handwriting-recognition client throughput against the local Gradio
+stand-in (benchmarks/standins.py): the old one-image-at-a-time blocking
+`requests` flow of qna_system/test.py vs utils.ocr_utils.HandwritingClient
+at several concurrency limits, with and without injected failures (every
+5th POST answers 503 and every 5th result stream ends in an error event).
+
+    python benchmarks/bench_htr_client.py [n_images] [latency_s]
+"""
+import os
+import sys
+import json
+import time
+import base64
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (ROOT_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import requests
+from standins import GradioStandin
+from synthetic import generate_corpus
+from utils.ocr_utils import recognize_images, API_PATH
+
+CONCURRENCY = [1, 4, 8, 16]
+
+
+def blocking_recognize(base_url, path):
+    """The previous test.py flow: one POST, then the SSE stream parsed by string splitting."""
+    with open(path, "rb") as f:
+        image_b64 = base64.b64encode(f.read()).decode("utf-8")
+    payload = {"data": [{"path": None, "url": f"data:image/png;base64,{image_b64}",
+                         "meta": {"_type": "gradio.FileData"}, "orig_name": os.path.basename(path), "is_stream": False}]}
+    event_id = requests.post(base_url + API_PATH, json=payload).json()["event_id"]
+    text, buffer = None, ""
+    with requests.get(f"{base_url}{API_PATH}/{event_id}", stream=True) as resp:
+        for chunk in resp.iter_content(chunk_size=None):
+            buffer += chunk.decode("utf-8", errors="ignore")
+            while "\n\n" in buffer:
+                part, buffer = buffer.split("\n\n", 1)
+                if "data:" in part and "complete" in part:
+                    text = json.loads(part.split("data:", 1)[1])[0]
+    return text
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.25
+    corpus = os.path.join(BENCH_DIR, ".corpus", "medium")
+    manifest = generate_corpus(corpus, "medium")
+    images = [os.path.join(corpus, "answers", subject, a["image"])
+              for subject, info in manifest["subjects"].items() for a in info["answers"]]
+    images = (images * (n // len(images) + 1))[:n]
+    print(f"📚 {n} answer images, simulated recognition latency {latency * 1000:.0f} ms")
+
+    print(f"\n{'client':<32} {'seconds':>8} {'images/s':>9} {'requests':>9} {'injected':>9} {'failed':>7}")
+    with GradioStandin(latency=latency) as server:
+        start = time.perf_counter()
+        for path in images:
+            blocking_recognize(server.url, path)
+        elapsed = time.perf_counter() - start
+        print(f"{'blocking requests (before)':<32} {elapsed:>8.2f} {n / elapsed:>9.1f} {server.requests:>9} {0:>9} {0:>7}")
+
+    for fail_every in (0, 5):
+        for concurrency in CONCURRENCY:
+            with GradioStandin(latency=latency, fail_every=fail_every) as server:
+                start = time.perf_counter()
+                results = recognize_images(images, base_url=server.url, concurrency=concurrency, backoff=0.05)
+                elapsed = time.perf_counter() - start
+                failed = sum(isinstance(r, Exception) for r in results)
+                name = f"async c={concurrency}" + (f" fail 1/{fail_every}" if fail_every else "")
+                print(f"{name:<32} {elapsed:>8.2f} {n / elapsed:>9.1f} {server.requests:>9} "
+                      f"{server.failures:>9} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_json_output.py
+"""
+Serialization time and size of the pipeline's JSON outputs (output/*.json
+and data/processed_text/*.json by default) for each writer configuration:
+the old json.dump(indent=2), compact json, orjson pretty/compact, and
+compact output compressed with gzip / zstd (when zstandard is installed).
+Every variant is written through the atomic writer in utils/file_utils.
+
+    python benchmarks/bench_json_output.py [file_or_dir ...]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from utils import file_utils
+from utils.file_utils import atomic_open, save_json, load_json
+
+REPEAT = 5
+
+
+def stdlib(compact):
+    def dumps(obj, _compact=None):
+        if compact:
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return dumps
+
+
+def variants():
+    yield "json indent=2 (before)", stdlib(False), ".json"
+    yield "json compact", stdlib(True), ".json"
+    if file_utils.orjson is not None:
+        yield "orjson indent=2", lambda obj, _c=None: file_utils.dumps(obj, compact=False), ".json"
+        yield "orjson compact", lambda obj, _c=None: file_utils.dumps(obj, compact=True), ".json"
+    yield "compact + gzip", None, ".json.gz"
+    try:
+        import zstandard  # noqa: F401
+        yield "compact + zstd", None, ".json.zst"
+    except ImportError:
+        pass
+
+
+def write(obj, path, dumps):
+    if dumps is None:
+        return save_json(obj, path, compact=True)
+    with atomic_open(path) as f:
+        f.write(dumps(obj))
+
+
+def main():
+    targets = sys.argv[1:] or [os.path.join(ROOT_DIR, "output"), os.path.join(ROOT_DIR, "data", "processed_text")]
+    paths = []
+    for t in targets:
+        paths += sorted(glob.glob(os.path.join(t, "*.json"))) if os.path.isdir(t) else [t]
+    docs = []
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            docs.append(json.load(f))
+    if not docs:
+        print("❌ No JSON files found.")
+        return
+    print(f"📚 {len(docs)} files, {sum(os.path.getsize(p) for p in paths) / 1e6:.2f} MB on disk "
+          f"(orjson {'available' if file_utils.orjson is not None else 'not installed'})")
+
+    tmp = tempfile.mkdtemp()
+    # reads always go through load_json (orjson when installed)
+    print(f"\n{'writer':<24} {'size MB':>9} {'vs before':>10} {'write ms':>10} {'read ms':>9}")
+    base_size = None
+    for name, dumps, suffix in variants():
+        size, write_s, read_s = 0, 0.0, 0.0
+        for i, obj in enumerate(docs):
+            path = os.path.join(tmp, f"{i}{suffix}")
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                write(obj, path, dumps)
+            write_s += (time.perf_counter() - start) / REPEAT
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                loaded = load_json(path)
+            read_s += (time.perf_counter() - start) / REPEAT
+            if loaded != obj:
+                print(f"⚠️ {name}: {paths[i]} did not round-trip")
+            size += os.path.getsize(path)
+        base_size = base_size or size
+        print(f"{name:<24} {size / 1e6:>9.3f} {size / base_size - 1:>+10.0%} {write_s * 1000:>10.1f} {read_s * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
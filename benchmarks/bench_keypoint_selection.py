@@ -0,0 +1,99 @@
+# benchmarks/bench_keypoint_selection.py
+"""
+Keypoint selection on the biggest subject in data/processed_text: the old
+single-centroid top-k over the whole combined text vs the streaming
+KeypointEngine (MMR and k-means). Reports wall time, peak traced memory
+(Python + NumPy allocations), redundancy (mean similarity of each keypoint
+to its closest other keypoint) and how many files the keypoints come from.
+
+    python benchmarks/bench_keypoint_selection.py [top_k]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+from nlp_analysis.keypoint_engine import KeypointEngine
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+TOP_K = 6
+
+
+def split_into_sentences(text):
+    # same splitter as nlp_analysis.keypoint_extractor (not imported: it loads the model at import)
+    import re
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.strip()) > 10]
+
+
+def biggest_subject():
+    best = None
+    for path in glob.glob(os.path.join(ROOT_DIR, "data", "processed_text", "*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        size = sum(len(file.get("text", "")) for file in data.get("files", []))
+        if best is None or size > best[0]:
+            best = (size, data)
+    return best[1]
+
+
+def old_selection(model, files, k):
+    combined = "\n\n".join(text for _, text in files)
+    sentences = split_into_sentences(combined)
+    emb = model.encode(sentences, convert_to_numpy=True)
+    centroid = emb.mean(axis=0)
+    sims = emb @ centroid / (np.linalg.norm(emb, axis=1) * np.linalg.norm(centroid) + 1e-12)
+    return [sentences[i] for i in np.argsort(-sims)[:k]]
+
+
+def engine_selection(model, files, k, method):
+    engine = KeypointEngine(model, top_k=k, method=method)
+    for name, text in files:
+        engine.add_file(name, split_into_sentences(text))
+    return [kp["sentence"] for kp in engine.select()]
+
+
+def redundancy(model, keypoints):
+    if len(keypoints) < 2:
+        return 0.0
+    emb = model.encode(keypoints, convert_to_numpy=True, normalize_embeddings=True)
+    sim = emb @ emb.T
+    np.fill_diagonal(sim, -np.inf)
+    return float(sim.max(axis=1).mean())
+
+
+def run(model, data, k=TOP_K):
+    files = [(f.get("filename", ""), f["text"]) for f in data.get("files", []) if f.get("text")]
+    n_sents = sum(len(split_into_sentences(text)) for _, text in files)
+    print(f"{data['subject']}: {len(files)} files, {n_sents} sentences, top_k={k}")
+    print(f"{'method':<16} {'seconds':>8} {'peak MB':>8} {'redund.':>8} {'files':>6}")
+
+    methods = {
+        "centroid (old)": lambda: old_selection(model, files, k),
+        "engine mmr": lambda: engine_selection(model, files, k, "mmr"),
+        "engine kmeans": lambda: engine_selection(model, files, k, "kmeans"),
+    }
+    for label, fn in methods.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        keypoints = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        sources = {name for name, text in files for kp in keypoints if kp in text}
+        print(f"{label:<16} {elapsed:>8.2f} {peak / 1e6:>8.1f} {redundancy(model, keypoints):>8.3f} {len(sources):>6}")
+
+
+def main():
+    from sentence_transformers import SentenceTransformer
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else TOP_K
+    run(SentenceTransformer(MODEL_NAME), biggest_subject(), k)
+
+if __name__ == "__main__":
+    main()
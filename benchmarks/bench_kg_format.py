@@ -0,0 +1,57 @@
+# benchmarks/bench_kg_format.py
+"""
+Size on disk and load time of the knowledge-graph outputs as pretty JSON
+vs the compact memory-mapped .kgb format, plus a file-scoring query.
+
+    python benchmarks/bench_kg_format.py
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from answer_evaluator.kg_binary import CompactKnowledgeGraph
+
+OUTPUT_FILES = ["knowledge_graph.json", "ranked_keywords.json", "contextual_keywords_graph.json"]
+REPEATS = 20
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        out = fn()
+    return out, (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    print(f"{'file':<34} {'json KB':>8} {'kgb KB':>7} {'json load ms':>13} {'kgb load ms':>12} {'query ms':>9} {'equal':>6}")
+    for name in OUTPUT_FILES:
+        json_path = os.path.join(ROOT_DIR, "output", name)
+        if not os.path.exists(json_path):
+            continue
+        kgb_path = os.path.join(tmp, name.replace(".json", ".kgb"))
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        CompactKnowledgeGraph.from_json(data).save(kgb_path)
+
+        def load_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        _, json_ms = timed(load_json)
+        graph, kgb_ms = timed(lambda: CompactKnowledgeGraph.load(kgb_path))
+        ids = graph.keyword_ids()[:8]
+        _, query_ms = timed(lambda: graph.file_scores(ids))
+        equal = graph.to_json() == data
+        print(f"{name:<34} {os.path.getsize(json_path) / 1024:>8.0f} {os.path.getsize(kgb_path) / 1024:>7.0f} "
+              f"{json_ms:>13.2f} {kgb_ms:>12.3f} {query_ms:>9.3f} {str(equal):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_knowledge_graph.py
+"""
+Knowledge-graph build throughput (docs/sec) and peak RSS at 1, 4 and 8
+spaCy processes over every file in data/processed_text. Each setting runs
+in a fresh interpreter so peak memory is measured in isolation.
+
+    python benchmarks/bench_knowledge_graph.py
+"""
+import os
+import sys
+import glob
+import json
+import time
+import resource
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+PROCESS_COUNTS = [1, 4, 8]
+INPUT_FOLDER = os.path.join(ROOT_DIR, "data", "processed_text")
+
+
+def worker(n_process):
+    from answer_evaluator.generate_keywords import build_knowledge_graphs, clean_text
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(INPUT_FOLDER, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            texts += [clean_text(file.get("text", "")) for file in json.load(f).get("files", [])]
+
+    start = time.perf_counter()
+    keywords = relations = 0
+    for _, kws, rels in build_knowledge_graphs(texts, n_process=n_process):
+        keywords += len(kws)
+        relations += len(rels)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in KB on Linux; children covers the nlp.pipe worker processes
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(json.dumps({"docs": len(texts), "seconds": elapsed, "peak_rss_mb": peak_kb / 1024,
+                      "keywords": keywords, "relations": relations}))
+
+
+def main():
+    print(f"{'processes':>10} {'docs':>6} {'seconds':>9} {'docs/s':>8} {'peak MB':>9} {'keywords':>9} {'relations':>10}")
+    for n in PROCESS_COUNTS:
+        out = subprocess.run([sys.executable, __file__, "--worker", str(n)],
+                             capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{n:>10} {r['docs']:>6} {r['seconds']:>9.2f} {r['docs'] / r['seconds']:>8.2f} "
+              f"{r['peak_rss_mb']:>9.0f} {r['keywords']:>9} {r['relations']:>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--worker":
+        worker(int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_relation_graph.py
+"""
+RelationGraph build and query latency on a synthetic 100k-triple graph
+(power-law node popularity, like terms extracted from lecture text).
+
+    python benchmarks/bench_relation_graph.py [n_triples]
+"""
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+from answer_evaluator.relation_graph import RelationGraph
+
+N_TRIPLES = 100_000
+N_TERMS = 20_000
+N_VERBS = 500
+QUERIES = 1000
+
+
+def synthetic_graph(n_triples, rng):
+    popularity = 1.0 / np.arange(1, N_TERMS + 1) ** 0.8
+    popularity /= popularity.sum()
+    src = rng.choice(N_TERMS, n_triples, p=popularity)
+    dst = rng.choice(N_TERMS, n_triples, p=popularity)
+    verb = N_TERMS + rng.integers(0, N_VERBS, n_triples)
+    names = [f"term{i}" for i in range(N_TERMS)] + [f"verb{i}" for i in range(N_VERBS)]
+    return src, verb, dst, names
+
+
+def per_query_us(fn, seeds):
+    start = time.perf_counter()
+    for s in seeds:
+        fn(s)
+    return (time.perf_counter() - start) / len(seeds) * 1e6
+
+
+def main():
+    n_triples = int(sys.argv[1]) if len(sys.argv) > 1 else N_TRIPLES
+    rng = np.random.default_rng(0)
+    src, verb, dst, names = synthetic_graph(n_triples, rng)
+
+    start = time.perf_counter()
+    graph = RelationGraph(src, verb, dst, names)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    graph.pagerank()
+    pagerank_ms = (time.perf_counter() - start) * 1000
+
+    seeds = rng.integers(0, N_TERMS, QUERIES)
+    words = [[f"term{s}", f"term{(s * 7) % N_TERMS}"] for s in seeds]
+    print(f"{n_triples} triples, {N_TERMS} terms")
+    print(f"build CSR:            {build_ms:9.1f} ms")
+    print(f"pagerank (cached):    {pagerank_ms:9.1f} ms")
+    print(f"neighbors:            {per_query_us(graph.neighbors, seeds):9.1f} µs/query")
+    print(f"1-hop expansion:      {per_query_us(lambda s: graph.k_hop([s], 1), seeds):9.1f} µs/query")
+    print(f"2-hop expansion:      {per_query_us(lambda s: graph.k_hop([s], 2), seeds):9.1f} µs/query")
+    print(f"expand_terms (k=1):   {per_query_us(lambda w: graph.expand_terms(w, 1), words):9.1f} µs/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_summarizer.py
+"""
+Model answer summarization on data/processed_text: latency of the built-in
+TextRank summarizer vs gensim's summarize (only importable with gensim < 4)
+and ROUGE-1/2 overlap between their outputs. Without gensim the summaries
+are compared with the text[:500] fallback, and ROUGE recall against the
+full source text is reported for both as a coverage measure.
+
+    python benchmarks/bench_summarizer.py [ratio]
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from answer_evaluator.summarizer import summarize
+
+RATIO = 0.05
+
+try:
+    from gensim.summarization import summarize as gensim_summarize
+except ImportError:
+    gensim_summarize = None
+
+
+def ngrams(text, n):
+    tokens = re.findall(r"\w+", text.lower())
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def rouge(candidate, reference, n):
+    """(precision, recall, f1) of n-gram overlap."""
+    cand, ref = ngrams(candidate, n), ngrams(reference, n)
+    overlap = sum((cand & ref).values())
+    p = overlap / max(1, sum(cand.values()))
+    r = overlap / max(1, sum(ref.values()))
+    return p, r, (2 * p * r / (p + r) if p + r else 0.0)
+
+
+def run(fn, text, ratio):
+    start = time.perf_counter()
+    try:
+        out = fn(text, ratio=ratio)
+    except ValueError:
+        out = text[:500]
+    return out, time.perf_counter() - start
+
+
+def main():
+    ratio = float(sys.argv[1]) if len(sys.argv) > 1 else RATIO
+    texts = []
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, "data", "processed_text", "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            texts += [file["text"] for file in json.load(f)["files"] if file.get("text")]
+    print(f"{len(texts)} files, {sum(map(len, texts)) / 1e6:.2f}M chars, ratio={ratio}")
+
+    baseline_label = "gensim" if gensim_summarize else "text[:500]"
+    if gensim_summarize is None:
+        print("gensim.summarization not available (removed in gensim 4); comparing with the text[:500] fallback")
+    baseline_fn = gensim_summarize or (lambda text, ratio: text[:500])
+
+    times = {"textrank": 0.0, baseline_label: 0.0}
+    scores = {key: [] for key in ("r1_f", "r2_f", "cov_new", "cov_base")}
+    for text in texts:
+        new, t_new = run(summarize, text, ratio)
+        base, t_base = run(baseline_fn, text, ratio)
+        times["textrank"] += t_new
+        times[baseline_label] += t_base
+        scores["r1_f"].append(rouge(new, base, 1)[2])
+        scores["r2_f"].append(rouge(new, base, 2)[2])
+        scores["cov_new"].append(rouge(new, text, 1)[1])
+        scores["cov_base"].append(rouge(base, text, 1)[1])
+
+    mean = lambda xs: sum(xs) / max(1, len(xs))
+    for label, total in times.items():
+        print(f"{label:<15} {total * 1000 / len(texts):>8.1f} ms/file")
+    print(f"ROUGE-1 F1 textrank vs {baseline_label}: {mean(scores['r1_f']):.3f}")
+    print(f"ROUGE-2 F1 textrank vs {baseline_label}: {mean(scores['r2_f']):.3f}")
+    print(f"ROUGE-1 recall of source text: textrank {mean(scores['cov_new']):.3f}, "
+          f"{baseline_label} {mean(scores['cov_base']):.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/bench_text_index.py
+"""
+Lexical search over processed course text: SQLite FTS5/BM25 index vs the
+current approach (load the subject JSON and scan every sentence for the
+query terms), with the embedding SentenceIndex as a reference.
+
+Reports index build time, incremental update time (nothing changed / one
+file changed) and per-query latency p50/p95. Uses data/processed_text when
+it exists, otherwise the synthetic benchmark corpus.
+
+    python benchmarks/bench_text_index.py [small|medium|large]
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (ROOT_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import numpy as np
+from nlp_analysis.text_index import TextIndex, match_query, DERIVED_SUFFIXES
+from nlp_analysis.sentence_index import SentenceIndex, sentence_spans
+from standins import HashingEmbedder
+
+QUERIES_PER_SUBJECT = 50
+
+
+def load_subjects(scale):
+    paths = [p for p in sorted(glob.glob(os.path.join(ROOT_DIR, "data", "processed_text", "*.json")))
+             if not p.endswith(DERIVED_SUFFIXES)]
+    if paths:
+        subjects = []
+        for p in paths:
+            with open(p, "r", encoding="utf-8") as f:
+                subjects.append(json.load(f))
+        return "data/processed_text", subjects, None
+
+    from synthetic import generate_corpus
+    manifest = generate_corpus(os.path.join(BENCH_DIR, ".corpus", scale), scale)
+    subjects, questions = [], {}
+    for name, info in manifest["subjects"].items():
+        subjects.append({"subject": name, "files": [{"filename": f["filename"], "text": f["text"]} for f in info["files"]]})
+        questions[name] = info["questions"]
+    return f"synthetic corpus ({scale})", subjects, questions
+
+
+def sample_queries(data, n):
+    """Sentences of the subject with half their words dropped, as stand-in questions."""
+    sents = [s for f in data["files"] for _, s in sentence_spans(f.get("text", ""))]
+    step = max(1, len(sents) // n)
+    return [" ".join(s.split()[::2]) for s in sents[::step][:n]]
+
+
+def scan(path, query):
+    """What the JSON consumers do today: load the subject and count term hits per sentence."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    terms = [t.strip('"') for t in match_query(query).split(" OR ") if t]
+    hits = []
+    for file in data["files"]:
+        for sent in re.split(r"(?<=[.!?])\s+", file.get("text", "")):
+            low = sent.lower()
+            score = sum(low.count(t) for t in terms)
+            if score:
+                hits.append((score, sent))
+    hits.sort(key=lambda h: -h[0])
+    return hits[:10]
+
+
+def latency(fn, queries):
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.percentile(times, 50), np.percentile(times, 95)
+
+
+def main():
+    scale = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    source, subjects, questions = load_subjects(scale)
+    n_files = sum(len(d["files"]) for d in subjects)
+    n_chars = sum(len(f.get("text", "")) for d in subjects for f in d["files"])
+    print(f"📚 {source}: {len(subjects)} subjects, {n_files} files, {n_chars / 1e6:.2f}M chars")
+
+    tmp = tempfile.mkdtemp()
+    index = TextIndex(os.path.join(tmp, "text_index.sqlite"))
+    start = time.perf_counter()
+    for data in subjects:
+        index.update_subject(data)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in subjects:
+        index.update_subject(data)
+    noop = time.perf_counter() - start
+
+    changed = json.loads(json.dumps(subjects[0]))
+    changed["files"][0]["text"] += "\nAn appended sentence about incremental indexing."
+    start = time.perf_counter()
+    index.update_subject(changed)
+    one_file = time.perf_counter() - start
+    index.update_subject(subjects[0])
+
+    print(f"\nindex build {build * 1000:.1f} ms | update, nothing changed {noop * 1000:.1f} ms | "
+          f"update, one file changed {one_file * 1000:.1f} ms | "
+          f"size {sum(os.path.getsize(p) for p in glob.glob(index.path + '*')) / 1e6:.2f} MB")
+
+    embedder = HashingEmbedder()
+    rows = {"FTS5 sentences (BM25)": [], "FTS5 files (BM25)": [], "JSON load + scan": [],
+            "SentenceIndex (embeddings)": []}
+    for data in subjects:
+        subject = data["subject"]
+        queries = (questions or {}).get(subject) or sample_queries(data, QUERIES_PER_SUBJECT)
+        path = os.path.join(tmp, f"{subject}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        sent_index = SentenceIndex.build(data, embedder)
+
+        rows["FTS5 sentences (BM25)"].append(latency(lambda q: index.search_sentences(q, subject), queries))
+        rows["FTS5 files (BM25)"].append(latency(lambda q: index.search_files(q, subject), queries))
+        rows["JSON load + scan"].append(latency(lambda q: scan(path, q), queries))
+        rows["SentenceIndex (embeddings)"].append(
+            latency(lambda q: sent_index.search(embedder.encode(q, normalize_embeddings=True)), queries))
+
+    print(f"\n{'retriever':<30} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, values in rows.items():
+        p50 = np.mean([v[0] for v in values])
+        p95 = np.mean([v[1] for v in values])
+        print(f"{name:<30} {p50:>9.3f} {p95:>9.3f}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# benchmarks/run_suite.py
+"""
+End-to-end benchmark suite on a synthetic course corpus, fully offline.
+
+Stages: extract (PDF/PPTX, PNG with --ocr), clean, keypoints, sentence index
++ QA retrieval, LLM context packing, model-answer summaries, knowledge graph
+(spaCy when en_core_web_md is installed, the compact graph + relation graph
+always) and grading. Local stand-in models (benchmarks/standins.py) replace
+the downloaded ones.
+
+Each stage runs once to warm up, then reports its median time over
+--repeat runs, items/sec and a quality number, and is compared with
+benchmarks/baselines/<scale>.json: slower by more than --tolerance or a
+changed quality number is flagged, and the exit code is 1 if anything
+regressed.
+
+    python benchmarks/run_suite.py [--scale small|medium|large] [--repeat 3]
+                                   [--tolerance 0.25] [--ocr] [--save-baseline]
+"""
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import statistics
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (ROOT_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import numpy as np
+from synthetic import generate_corpus
+from standins import HashingEmbedder, WhitespaceTokenizer
+from utils.file_utils import save_json, load_json
+
+CORPUS_DIR = os.path.join(BENCH_DIR, ".corpus")
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+QUALITY_TOLERANCE = 0.01
+MIN_DELTA_S = 0.02  # millisecond stages are too noisy for a relative threshold alone
+
+
+def words(text):
+    return set(re.findall(r"[a-z]+", text.lower()))
+
+
+# ------------------------------------------------------------------------
+# Stages: each returns (items, quality) and works on the shared `ctx` dict
+# ------------------------------------------------------------------------
+
+def stage_extract(ctx):
+    from extractor.pdf_extractor import extract_pages_pdf
+    from extractor.ppt_extractor import extract_slides_pptx
+    from extractor.image_extractor import extract_text_image
+    readers = {".pdf": extract_pages_pdf, ".pptx": extract_slides_pptx}
+    if ctx["ocr"]:
+        readers[".png"] = lambda path: [extract_text_image(path)]
+
+    raw, recalls, n = {}, [], 0
+    for subject, info in ctx["manifest"]["subjects"].items():
+        truth = {f["filename"]: f["text"] for f in info["files"]}
+        mat_dir = os.path.join(ctx["corpus"], "materials", subject)
+        for name in sorted(os.listdir(mat_dir)):
+            reader = readers.get(os.path.splitext(name)[1].lower())
+            if reader is None:
+                continue
+            raw[(subject, name)] = reader(os.path.join(mat_dir, name))
+            n += 1
+            if name in truth:
+                expected = words(truth[name])
+                recalls.append(len(expected & words(" ".join(raw[(subject, name)]))) / max(1, len(expected)))
+    ctx["raw_pages"] = raw
+    return n, float(np.mean(recalls)) if recalls else None
+
+
+def stage_clean(ctx):
+    from extractor.text_cleaner import clean_text
+    subjects = {}
+    for (subject, name), pages in ctx["raw_pages"].items():
+        text = "\n".join(c for c in (clean_text(p) for p in pages) if c)
+        subjects.setdefault(subject, []).append({"filename": name, "text": text})
+    ctx["processed"] = {s: {"subject": s, "files": files} for s, files in subjects.items()}
+    chars = sum(len(f["text"]) for d in ctx["processed"].values() for f in d["files"])
+    return len(ctx["raw_pages"]), chars
+
+
+def _content_files(data):
+    return [f for f in data["files"] if "qb" not in f["filename"].lower()]
+
+
+def _split(text):
+    # same splitter as nlp_analysis.keypoint_extractor, which loads MiniLM at import
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.strip()) > 10]
+
+
+def stage_keypoints(ctx):
+    from nlp_analysis.keypoint_engine import KeypointEngine
+    model = ctx["embedder"]
+    redundancy, n = [], 0
+    for data in ctx["processed"].values():
+        engine = KeypointEngine(model, top_k=6)
+        for f in _content_files(data):
+            sents = _split(f["text"])
+            n += len(sents)
+            engine.add_file(f["filename"], sents)
+        kps = [kp["sentence"] for kp in engine.select()]
+        if len(kps) > 1:
+            emb = model.encode(kps, normalize_embeddings=True)
+            sim = emb @ emb.T
+            np.fill_diagonal(sim, -np.inf)
+            redundancy.append(float(sim.max(axis=1).mean()))
+    return n, float(np.mean(redundancy)) if redundancy else None
+
+
+def _questions(ctx, subject):
+    return ctx["manifest"]["subjects"][subject]["questions"]
+
+
+def stage_qa_retrieval(ctx):
+    from nlp_analysis.sentence_index import SentenceIndex
+    model = ctx["embedder"]
+    hits, n = [], 0
+    for subject, data in ctx["processed"].items():
+        index = SentenceIndex.build(data, model)
+        for q in _questions(ctx, subject):
+            terms = re.findall(r"how (.+) and (.+) are related", q)[0]
+            top = index.search(model.encode(q, normalize_embeddings=True), top_n=5)
+            hits.append(any(t in h["sentence"].lower() for h in top for t in terms))
+            n += 1
+    return n, float(np.mean(hits)) if hits else None
+
+
+def stage_context_packing(ctx):
+    from keypoint_model.utils.context_builder import ContextBuilder
+    tokens, n = [], 0
+    for subject, data in ctx["processed"].items():
+        files = _content_files(data)
+        builder = ContextBuilder(ctx["embedder"], WhitespaceTokenizer(), token_budget=768)
+        builder.index([f["text"] for f in files], [f["filename"] for f in files])
+        for q in _questions(ctx, subject):
+            context, _ = builder.build(q)
+            tokens.append(len(context.split()))
+            n += 1
+    return n, float(np.mean(tokens)) if tokens else None
+
+
+def stage_model_answers(ctx):
+    from answer_evaluator.summarizer import summarize
+    lengths, n = [], 0
+    ctx["model_answers"] = {}
+    for subject, data in ctx["processed"].items():
+        answers = []
+        for f in _content_files(data):
+            try:
+                answer = summarize(f["text"], ratio=0.2)
+            except ValueError:
+                answer = f["text"][:500]
+            answers.append(answer)
+            lengths.append(len(answer))
+            n += 1
+        ctx["model_answers"][subject] = answers
+    return n, float(np.mean(lengths)) if lengths else None
+
+
+def stage_kg_spacy(ctx):
+    import spacy
+    if not spacy.util.is_package("en_core_web_md"):
+        # generate_keywords would try to download the model at import
+        return None, "skipped: en_core_web_md not installed"
+    from answer_evaluator.generate_keywords import build_knowledge_graphs
+    texts = [f["text"] for data in ctx["processed"].values() for f in data["files"]]
+    keywords = [len(kw) for _, kw, _ in build_knowledge_graphs(texts)]
+    return len(texts), float(np.mean(keywords)) if keywords else None
+
+
+def stage_kg_compact(ctx):
+    from answer_evaluator.kg_binary import CompactKnowledgeGraph
+    from answer_evaluator.relation_graph import RelationGraph
+    pattern = re.compile(r"^(.+?) relies on (.+?) and (.+?) for", re.IGNORECASE)
+    expanded, n = [], 0
+    for subject, data in ctx["processed"].items():
+        terms = ctx["manifest"]["subjects"][subject]["terms"]
+        files = []
+        for f in data["files"]:
+            relations = []
+            for sent in _split(f["text"]):
+                m = pattern.match(sent)
+                if m:
+                    relations += [[m.group(1).lower(), "relies on", m.group(2)], [m.group(1).lower(), "relies on", m.group(3)]]
+            ranked = [{"keyword": t, "rank": f["text"].lower().count(t) / 10, "count": f["text"].lower().count(t)}
+                      for t in terms if t in f["text"].lower()]
+            files.append({"filename": f["filename"], "ranked_keywords": ranked, "relations": relations})
+        path = os.path.join(ctx["corpus"], f"{subject}.kgb")
+        CompactKnowledgeGraph.from_json({"subject": subject, "files": files}).save(path)
+        graph = CompactKnowledgeGraph.load(path)
+        relation_graph = RelationGraph.from_compact(graph)
+        for t in terms:
+            ids = [i for i in [graph.string_id(t)] if i is not None]
+            graph.file_scores(ids)
+            expanded.append(len(relation_graph.expand_terms([t], k=2)))
+            n += 1
+    return n, float(np.mean(expanded)) if expanded else None
+
+
+def stage_grading(ctx):
+    from answer_evaluator.evaluate_student_answer import ModelAnswerSet
+    scores, n = [], 0
+    for subject, info in ctx["manifest"]["subjects"].items():
+        data = ctx["processed"].get(subject, {"files": []})
+        files = _content_files(data)
+        answers = ctx.get("model_answers", {}).get(subject) or [f["text"][:500] for f in files]
+        model_set = ModelAnswerSet({"files": [
+            {"filename": f["filename"], "model_answer": a, "keywords": [t for t in info["terms"] if t in a.lower()]}
+            for f, a in zip(files, answers)
+        ]})
+        for student in info["answers"]:
+            evaluations = model_set.score(student["answer"])
+            scores.append(max((e["final_score"] for e in evaluations), default=0.0))
+            n += 1
+    return n, float(np.mean(scores)) if scores else None
+
+
+STAGES = [
+    ("extract", stage_extract, "text recall"),
+    ("clean", stage_clean, "chars"),
+    ("keypoints", stage_keypoints, "redundancy"),
+    ("qa_retrieval", stage_qa_retrieval, "hit@5"),
+    ("context_packing", stage_context_packing, "context tokens"),
+    ("model_answers", stage_model_answers, "answer chars"),
+    ("kg_spacy", stage_kg_spacy, "keywords/file"),
+    ("kg_compact", stage_kg_compact, "expanded terms"),
+    ("grading", stage_grading, "best score"),
+]
+
+
+def run_suite(scale="small", repeat=3, ocr=False):
+    corpus = os.path.join(CORPUS_DIR, scale)
+    start = time.perf_counter()
+    manifest = generate_corpus(corpus, scale)
+    print(f"📚 Corpus '{scale}' ready in {time.perf_counter() - start:.1f}s at {corpus}")
+
+    ctx = {"corpus": corpus, "manifest": manifest, "embedder": HashingEmbedder(), "ocr": ocr}
+    results = {}
+    for name, fn, quality_label in STAGES:
+        times, items, quality = [], None, None
+        items, quality = fn(ctx)  # warm-up: imports, lazy caches
+        for _ in range(repeat if items is not None else 0):
+            t0 = time.perf_counter()
+            items, quality = fn(ctx)
+            times.append(time.perf_counter() - t0)
+        if items is None:
+            results[name] = {"skipped": quality}
+            continue
+        seconds = statistics.median(times)
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "items": items,
+            "items_per_s": round(items / seconds, 1) if seconds else None,
+            "quality": round(quality, 4) if isinstance(quality, float) else quality,
+            "quality_label": quality_label,
+        }
+    return {"scale": scale, "repeat": repeat, "ocr": ocr, "stages": results}
+
+
+def compare(results, baseline, tolerance):
+    """Prints the result table with deltas; returns the names of regressed stages."""
+    regressions = []
+    base_stages = (baseline or {}).get("stages", {})
+    print(f"\n{'stage':<16} {'seconds':>9} {'base':>9} {'delta':>8} {'items/s':>10} {'quality':>12} {'base q':>10}")
+    for name, r in results["stages"].items():
+        if "skipped" in r:
+            print(f"{name:<16} {r['skipped']}")
+            continue
+        b = base_stages.get(name, {})
+        delta, flag = "", ""
+        if b.get("seconds"):
+            change = r["seconds"] / b["seconds"] - 1
+            delta = f"{change * 100:+.0f}%"
+            if change > tolerance and r["seconds"] - b["seconds"] > MIN_DELTA_S:
+                flag = "  ⚠️ slower"
+        bq = b.get("quality")
+        if isinstance(bq, (int, float)) and isinstance(r["quality"], (int, float)):
+            if abs(r["quality"] - bq) > QUALITY_TOLERANCE * max(1.0, abs(bq)):
+                flag += "  ⚠️ quality changed"
+        if flag:
+            regressions.append(name)
+        quality = f"{r['quality']:.3f}" if isinstance(r["quality"], float) else str(r["quality"])
+        base_q = f"{bq:.3f}" if isinstance(bq, float) else ("-" if bq is None else str(bq))
+        base_s = f"{b['seconds']:.3f}" if b.get("seconds") else "-"
+        print(f"{name:<16} {r['seconds']:>9.3f} {base_s:>9} {delta:>8} {r['items_per_s'] or 0:>10.1f} "
+              f"{quality:>12} {base_q:>10}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STUDIQ offline benchmark suite")
+    parser.add_argument("--scale", default="small", choices=["small", "medium", "large"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--ocr", action="store_true", help="also OCR the PNG slides (needs easyocr models/tesseract)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--fresh", action="store_true", help="regenerate the synthetic corpus")
+    args = parser.parse_args()
+
+    if args.fresh:
+        shutil.rmtree(os.path.join(CORPUS_DIR, args.scale), ignore_errors=True)
+    results = run_suite(args.scale, args.repeat, args.ocr)
+
+    save_json(results, os.path.join(RESULTS_DIR, f"latest_{args.scale}.json"))
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.scale}.json")
+    baseline = load_json(baseline_path)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        # baselines are committed, so they stay indented for readable diffs
+        save_json(results, baseline_path, compact=False)
+        print(f"\n✅ Baseline saved to {baseline_path}")
+    elif baseline is None:
+        print(f"\nℹ️ No baseline at {baseline_path}; run with --save-baseline to store one.")
+    elif regressions:
+        print(f"\n❌ Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+    else:
+        print("\n✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/standins.py
+"""
+Small offline stand-ins for the models and services the pipeline normally
+uses, so benchmarks run without network access. They keep the interfaces
+the pipeline uses, not the quality of the real models.
+"""
+import re
+import json
+import time
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+class HashingEmbedder:
+    """
+    SentenceTransformer-compatible bag-of-words embedder: each word is hashed
+    into one of `dim` buckets. Similar wording gives similar vectors, which
+    is enough to exercise retrieval, MMR and grading code paths.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vec[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        return vec
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, convert_to_tensor=False,
+               normalize_embeddings=False, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        emb = np.stack([self._embed(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(emb, axis=1, keepdims=True)
+            emb = emb / np.where(norms == 0, 1.0, norms)
+        if convert_to_tensor:
+            import torch
+            emb = torch.from_numpy(emb)
+        return emb[0] if single else emb
+
+
+class WhitespaceTokenizer:
+    """Counts whitespace tokens; stands in for the LLM tokenizer in ContextBuilder."""
+
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+
+class GradioStandin:
+    """
+    Local Gradio-like handwriting endpoint for utils.ocr_utils: POST
+    /gradio_api/call/predict returns an event id, GET .../predict/<id>
+    streams heartbeats and then the result as chunked server-sent events.
+    `latency` is the simulated recognition time. With `fail_every=n`, every
+    n-th POST answers 503 and every n-th result stream ends with an error
+    event, so both retry paths are exercised at a fixed rate.
+
+        with GradioStandin(latency=0.2) as server:
+            recognize_images(paths, base_url=server.url)
+    """
+
+    def __init__(self, latency=0.2, fail_every=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.streams = 0
+        self.failures = 0
+        self._events = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling matters
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with standin._lock:
+                    standin.requests += 1
+                    fail = standin._fails(standin.requests)
+                    event_id = f"ev{standin.requests}"
+                    standin._events[event_id] = body["data"][0]["orig_name"]
+                if fail:
+                    return self._json(503, {"error": "busy"})
+                self._json(200, {"event_id": event_id})
+
+            def _chunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                with standin._lock:
+                    name = standin._events.pop(self.path.rsplit("/", 1)[-1], None)
+                    if name is not None:
+                        standin.streams += 1
+                        fail = standin._fails(standin.streams)
+                if name is None:
+                    return self._json(404, {"error": "unknown event"})
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                steps = 4
+                for _ in range(steps):
+                    time.sleep(standin.latency / steps)
+                    self._chunk("event: heartbeat\ndata: null\n\n")
+                if fail:
+                    event = 'event: error\ndata: "GPU out of memory"\n\n'
+                else:
+                    event = f"event: complete\ndata: {json.dumps([f'recognized text of {name}'])}\n\n"
+                # split mid-event to exercise incremental parsing
+                self._chunk(event[:17])
+                self._chunk(event[17:])
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+    def _fails(self, count):
+        """Whether the count-th POST / stream fails; called under the lock."""
+        fail = bool(self.fail_every) and count % self.fail_every == 0
+        self.failures += fail
+        return fail
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
@@ -0,0 +1,190 @@
+# benchmarks/synthetic.py
+"""
+Deterministic synthetic course corpora for the benchmark suite.
+
+A corpus looks like data/materials after `main.py download`: one folder per
+subject with lecture PDFs, PPTX decks, PNG slide scans and a question bank
+(QB.pdf), plus handwritten-style answer images and their ground-truth text
+under <root>/answers/<subject>/.
+
+    python benchmarks/synthetic.py <out_dir> [small|medium|large]
+"""
+import os
+import sys
+import json
+import random
+
+SCALES = {
+    # subjects, lecture files per subject, pages per file, questions, student answers per subject
+    "small": dict(subjects=2, files=3, pages=4, questions=8, answers=4),
+    "medium": dict(subjects=4, files=6, pages=10, questions=20, answers=12),
+    "large": dict(subjects=8, files=10, pages=25, questions=40, answers=40),
+}
+
+SUBJECT_NAMES = ["Big Data Analytics", "Distributed Computing", "Soft Computing", "Machine Learning",
+                 "Computer Networks", "Database Systems", "Operating Systems", "Cloud Computing"]
+
+TERMS = ["hadoop", "mapreduce", "hdfs", "namenode", "datanode", "replication", "partitioning", "sharding",
+         "consistency", "availability", "latency", "throughput", "scheduler", "cluster", "node", "cache",
+         "index", "transaction", "checkpoint", "gradient", "neuron", "activation", "membership", "fuzzy set",
+         "genetic algorithm", "crossover", "mutation", "backpropagation", "perceptron", "kernel", "stream",
+         "window", "spark", "resilient dataset", "key-value store", "column family", "document store",
+         "graph database", "consensus", "leader election", "vector clock", "load balancer", "virtual machine",
+         "container", "hypervisor", "router", "packet", "protocol", "socket", "deadlock", "semaphore"]
+ADJECTIVES = ["distributed", "fault-tolerant", "scalable", "parallel", "incremental", "approximate",
+              "centralized", "probabilistic", "adaptive", "lightweight", "robust", "eventual"]
+NOUNS = ["component", "technique", "mechanism", "model", "structure", "framework", "strategy", "layer"]
+PURPOSES = ["storing large datasets", "coordinating worker nodes", "reducing network traffic",
+            "recovering from failures", "training classifiers", "answering queries quickly",
+            "balancing load across machines", "approximating uncertain values", "ordering events"]
+TEMPLATES = [
+    "{A} is a {adj} {noun} used for {purpose}.",
+    "In practice, {a} works together with {b} to support {purpose}.",
+    "The main advantage of {a} is that it remains {adj} even when {b} fails.",
+    "{A} can be compared with {b}: both are {adj}, but only one is used for {purpose}.",
+    "A typical exam question asks how {a} differs from {b}.",
+    "{A} relies on {b} and {c} for {purpose}.",
+]
+
+
+def sentence(rng, terms):
+    a, b, c = rng.sample(terms, 3)
+    text = rng.choice(TEMPLATES).format(a=a, b=b, c=c, A=a.capitalize(), adj=rng.choice(ADJECTIVES),
+                                        noun=rng.choice(NOUNS), purpose=rng.choice(PURPOSES))
+    return text
+
+
+def page_text(rng, terms, n_sentences=8):
+    title = f"{rng.choice(terms).title()} and {rng.choice(terms).title()}"
+    return title, [sentence(rng, terms) for _ in range(n_sentences)]
+
+
+def write_pdf(path, pages):
+    import fitz  # pymupdf
+    doc = fitz.open()
+    for title, lines in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), title, fontsize=16)
+        page.insert_textbox(fitz.Rect(72, 100, 540, 770), "\n".join(lines), fontsize=11)
+    doc.save(path)
+    doc.close()
+
+
+def write_pptx(path, pages):
+    from pptx import Presentation
+    prs = Presentation()
+    for title, lines in pages:
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = title
+        slide.placeholders[1].text = "\n".join(lines)
+    prs.save(path)
+
+
+def _font(size):
+    from PIL import ImageFont
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
+
+
+def write_slide_png(path, title, lines):
+    from PIL import Image, ImageDraw
+    img = Image.new("RGB", (1280, 720), "white")
+    draw = ImageDraw.Draw(img)
+    draw.text((60, 40), title, fill="black", font=_font(40))
+    for i, line in enumerate(lines[:10]):
+        draw.text((60, 120 + i * 56), "- " + line, fill="black", font=_font(24))
+    img.save(path)
+
+
+def write_handwritten_png(path, text, rng):
+    """Ink-on-paper look: jittered baselines, uneven ink, slight rotation and noise."""
+    from PIL import Image, ImageDraw, ImageFilter
+    words = text.split()
+    lines, line = [], []
+    for w in words:
+        line.append(w)
+        if len(" ".join(line)) > 48:
+            lines.append(" ".join(line))
+            line = []
+    if line:
+        lines.append(" ".join(line))
+
+    img = Image.new("L", (1240, 120 + 70 * len(lines)), 235)
+    draw = ImageDraw.Draw(img)
+    for i, text_line in enumerate(lines):
+        x = 50 + rng.randint(-10, 10)
+        for ch in text_line:
+            y = 60 + i * 70 + rng.randint(-4, 4)
+            draw.text((x, y), ch, fill=rng.randint(10, 90), font=_font(30 + rng.randint(-3, 3)))
+            x += 22 + rng.randint(-3, 3)
+    for _ in range(img.width * img.height // 400):
+        draw.point((rng.randrange(img.width), rng.randrange(img.height)), fill=rng.randint(150, 220))
+    img = img.rotate(rng.uniform(-2.0, 2.0), fillcolor=235).filter(ImageFilter.GaussianBlur(0.6))
+    img.save(path)
+
+
+def generate_corpus(out_dir, scale="small", seed=0):
+    """
+    Writes the corpus (skipped when <out_dir>/corpus.json already matches)
+    and returns its manifest: {"scale", "seed", "subjects": {name: {...}}}.
+    """
+    cfg = SCALES[scale]
+    manifest_path = os.path.join(out_dir, "corpus.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("scale") == scale and manifest.get("seed") == seed:
+            return manifest
+
+    rng = random.Random(seed)
+    manifest = {"scale": scale, "seed": seed, "subjects": {}}
+    for s in range(cfg["subjects"]):
+        subject = SUBJECT_NAMES[s % len(SUBJECT_NAMES)] + ("" if s < len(SUBJECT_NAMES) else f" {s}")
+        terms = rng.sample(TERMS, 20)
+        mat_dir = os.path.join(out_dir, "materials", subject)
+        ans_dir = os.path.join(out_dir, "answers", subject)
+        os.makedirs(mat_dir, exist_ok=True)
+        os.makedirs(ans_dir, exist_ok=True)
+
+        files = []
+        for i in range(cfg["files"]):
+            pages = [page_text(rng, terms) for _ in range(cfg["pages"])]
+            kind = ("pdf", "pptx", "png")[i % 3]
+            if kind == "pdf":
+                name = f"Module-{i // 3 + 1}-Week {i + 1}_L{i + 1}.pdf"
+                write_pdf(os.path.join(mat_dir, name), pages)
+            elif kind == "pptx":
+                name = f"Module-{i // 3 + 1}-Week {i + 1}_Slides.pptx"
+                write_pptx(os.path.join(mat_dir, name), pages)
+            else:
+                name = f"Module-{i // 3 + 1}-Week {i + 1}_Scan.png"
+                write_slide_png(os.path.join(mat_dir, name), *pages[0])
+                pages = pages[:1]
+            files.append({"filename": name, "text": "\n".join(t + "\n" + "\n".join(l) for t, l in pages)})
+
+        questions = [f"{q + 1}. Explain how {a} and {b} are related." for q, (a, b) in
+                     enumerate(rng.sample(terms, 2) for _ in range(cfg["questions"]))]
+        write_pdf(os.path.join(mat_dir, "QB.pdf"), [("Question Bank", questions)])
+
+        answers = []
+        for a in range(cfg["answers"]):
+            text = " ".join(sentence(rng, terms) for _ in range(5))
+            name = f"student{a:03d}.png"
+            write_handwritten_png(os.path.join(ans_dir, name), text, rng)
+            answers.append({"student_id": f"student{a:03d}", "image": name, "answer": text})
+
+        manifest["subjects"][subject] = {"terms": terms, "files": files, "questions": questions, "answers": answers}
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmarks/synthetic.py <out_dir> [small|medium|large]")
+        sys.exit(1)
+    m = generate_corpus(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "small")
+    print(f"✅ {len(m['subjects'])} subjects written to {sys.argv[1]}")
@@ -1,7 +1,6 @@
 # crawler/lms_scraper.py
 import os
 import time
-import json
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -9,6 +8,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
+from utils.file_utils import save_json
 
 load_dotenv()
 
@@ -200,8 +200,7 @@ def scrape_lms():
 
         # save gathered subjects
         out_path = "data/raw_lms_data.json"
-        with open(out_path, "w", encoding="utf-8") as wf:
-            json.dump(subjects, wf, indent=2, ensure_ascii=False)
+        save_json(subjects, out_path)
 
         print(f"\n[✓] Finished. Unique subjects found: {len(subjects)}")
         print(f"[+] Saved to {out_path}")
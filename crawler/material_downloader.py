@@ -2,6 +2,7 @@ import os
 import time
 import re
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import unquote
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -9,6 +10,7 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+from utils import metrics
 from .lms_scraper import LMS_URL, LMS_USERNAME, LMS_PASSWORD, wait_for_page_ready
 from PyPDF2 import PdfReader
 
@@ -50,13 +52,15 @@ def download_file(url, cookies, local_path, max_pages=MAX_PAGES):
     """
     Downloads a file using requests with cookies from Selenium session.
     If it's a PDF, counts the number of pages and deletes if it exceeds max_pages.
+    Returns the local path of a kept file, None otherwise.
     """
     try:
-        with requests.get(url, cookies=cookies, stream=True) as r:
+        with metrics.span("download.file") as sp, requests.get(url, cookies=cookies, stream=True) as r:
             r.raise_for_status()
             with open(local_path, 'wb') as f:
                 for chunk in r.iter_content(chunk_size=8192):
                     f.write(chunk)
+                    sp.bytes += len(chunk)
 
         print(f"[+] Downloaded: {local_path}")
 
@@ -67,9 +71,12 @@ def download_file(url, cookies, local_path, max_pages=MAX_PAGES):
             if pages > max_pages:
                 os.remove(local_path)
                 print(f"[!] Deleted {local_path} because it exceeds {max_pages} pages")
+                return None
+        return local_path
 
     except Exception as e:
         print(f"[!] Failed to download {url}: {e}")
+        return None
 
 
 def download_flexpaper_pdf(driver, flex_url, subject_title):
@@ -90,12 +97,14 @@ def download_flexpaper_pdf(driver, flex_url, subject_title):
         cookies = {c['name']: c['value'] for c in driver.get_cookies()}
 
         try:
-            download_file(pdf_url, cookies, local_path)
+            path = download_file(pdf_url, cookies, local_path)
             print(f"[+] FlexPaper PDF: {filename}")
+            return path
         except Exception as e:
             print(f"[!] Failed FlexPaper download: {e}")
     else:
         print("[!] No PDF URL found in FlexPaper viewer.")
+    return None
 
 
 def download_presentation_pdf(driver, presentation_url, subject_title):
@@ -121,19 +130,102 @@ def download_presentation_pdf(driver, presentation_url, subject_title):
         cookies = {c['name']: c['value'] for c in driver.get_cookies()}
 
         try:
-            download_file(pdf_url, cookies, local_path)
+            path = download_file(pdf_url, cookies, local_path)
             print(f"[+] Presentation PDF downloaded: {filename}")
             print(f"[✓] Saved: {local_path}")
+            return path
         except Exception as e:
             print(f"[!] Failed Presentation download {pdf_url}: {e}")
     else:
         print("[!] No embedded PDF found in presentation page.")
+    return None
 
 
-def download_materials():
+def _download_subject(driver, subj, title, on_file=None, pool=None):
+    """
+    Downloads one subject's materials. Plain resources only need the session
+    cookies, so with a thread `pool` they are fetched concurrently; the
+    viewer pages need the browser and stay sequential.
+    """
+    def kept(path):
+        if path and on_file:
+            on_file(title, path)
+
+    def fetch(href, cookies, local_path):
+        # reports from the worker thread as soon as the file lands
+        kept(download_file(href, cookies, local_path))
+
+    url = subj.get("url")
+    print(f"\n[*] Visiting subject: {title}")
+    driver.get(url)
+    wait_for_page_ready(driver, 5)
+    time.sleep(1)
+
+    # collect all resources, flexpapers, and presentations
+    resources = driver.find_elements(By.CSS_SELECTOR, RESOURCE_LINK_SELECTOR)
+    resource_hrefs = [r.get_attribute("href") for r in resources if r.get_attribute("href")]
+
+    flex_links = driver.find_elements(By.XPATH, FLEXPAPER_SELECTOR)
+    flex_hrefs = [a.get_attribute("href") for a in flex_links if a.get_attribute("href")]
+
+    pres_links = driver.find_elements(By.XPATH, PRESENTATION_SELECTOR)
+    pres_hrefs = [a.get_attribute("href") for a in pres_links if a.get_attribute("href")]
+
+    if not (resource_hrefs or flex_hrefs or pres_hrefs):
+        print("[DEBUG] No downloadable links found.")
+        return
+
+    cookies = {c['name']: c['value'] for c in driver.get_cookies()}
+
+    # --- Normal resources ---
+    pending, seen = [], set()
+    for href in resource_hrefs:
+        try:
+            filename = unquote(os.path.basename(href.split("?")[0]))
+            folder = os.path.join("data", "materials", title)
+            os.makedirs(folder, exist_ok=True)
+            local_path = os.path.join(folder, filename)
+            # pages often link the same file twice; two pool threads must not write one path
+            if local_path in seen:
+                continue
+            seen.add(local_path)
+            if pool is not None:
+                pending.append(pool.submit(fetch, href, cookies, local_path))
+                continue
+            kept(download_file(href, cookies, local_path))
+            print(f"[+] Downloaded: {filename}")
+        except Exception as e:
+            print(f"[!] Failed resource: {e}")
+
+    # --- FlexPaper ---
+    for href in flex_hrefs:
+        try:
+            kept(download_flexpaper_pdf(driver, href, title))
+        except Exception as e:
+            print(f"[!] FlexPaper error: {e}")
+
+    # --- Presentation plugin PDFs ---
+    for href in pres_hrefs:
+        try:
+            kept(download_presentation_pdf(driver, href, title))
+        except Exception as e:
+            print(f"[!] Presentation error: {e}")
+
+    # every pooled file has been reported before the subject is closed
+    wait(pending)
+
+
+def download_materials(on_file=None, on_subject_done=None, workers=1):
+    """
+    Downloads every subject's materials. The optional callbacks let a
+    streaming pipeline pick files up as they land: on_file(subject, path)
+    for each kept file, on_subject_done(subject) once a subject is finished.
+    With workers > 1 plain resources are fetched by a thread pool.
+    """
     os.makedirs("data/materials", exist_ok=True)
     driver = start_driver()
     wait = WebDriverWait(driver, 15)
+    pool = ThreadPoolExecutor(workers) if workers > 1 else None
 
     try:
         driver.get(LMS_URL)
@@ -159,53 +251,11 @@ def download_materials():
 
         for subj in subjects:
             title = subj.get("title", "Unknown Subject")
-            url = subj.get("url")
-            print(f"\n[*] Visiting subject: {title}")
-            driver.get(url)
-            wait_for_page_ready(driver, 5)
-            time.sleep(1)
-
-            # collect all resources, flexpapers, and presentations
-            resources = driver.find_elements(By.CSS_SELECTOR, RESOURCE_LINK_SELECTOR)
-            resource_hrefs = [r.get_attribute("href") for r in resources if r.get_attribute("href")]
-
-            flex_links = driver.find_elements(By.XPATH, FLEXPAPER_SELECTOR)
-            flex_hrefs = [a.get_attribute("href") for a in flex_links if a.get_attribute("href")]
-
-            pres_links = driver.find_elements(By.XPATH, PRESENTATION_SELECTOR)
-            pres_hrefs = [a.get_attribute("href") for a in pres_links if a.get_attribute("href")]
-
-            if not (resource_hrefs or flex_hrefs or pres_hrefs):
-                print("[DEBUG] No downloadable links found.")
-                continue
-
-            cookies = {c['name']: c['value'] for c in driver.get_cookies()}
-
-            # --- Normal resources ---
-            for href in resource_hrefs:
-                try:
-                    filename = unquote(os.path.basename(href.split("?")[0]))
-                    folder = os.path.join("data", "materials", title)
-                    os.makedirs(folder, exist_ok=True)
-                    local_path = os.path.join(folder, filename)
-                    download_file(href, cookies, local_path)
-                    print(f"[+] Downloaded: {filename}")
-                except Exception as e:
-                    print(f"[!] Failed resource: {e}")
-
-            # --- FlexPaper ---
-            for href in flex_hrefs:
-                try:
-                    download_flexpaper_pdf(driver, href, title)
-                except Exception as e:
-                    print(f"[!] FlexPaper error: {e}")
-
-            # --- Presentation plugin PDFs ---
-            for href in pres_hrefs:
-                try:
-                    download_presentation_pdf(driver, href, title)
-                except Exception as e:
-                    print(f"[!] Presentation error: {e}")
+            try:
+                _download_subject(driver, subj, title, on_file, pool)
+            finally:
+                if on_subject_done:
+                    on_subject_done(title)
 
         print("\n[✓] Finished downloading all materials")
 
@@ -213,6 +263,8 @@ def download_materials():
         print("[!] Error in material downloader:", e)
 
     finally:
+        if pool is not None:
+            pool.shutdown()
         try:
             driver.quit()
         except Exception:
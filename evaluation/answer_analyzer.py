@@ -3,9 +3,12 @@ import os, json
 from .answer_ocr import extract_text_from_answer
 from nlp_analysis.keypoint_extractor import MODEL, OUT_PATH
 from sentence_transformers import util
+from utils import metrics
+from utils.file_utils import save_json
 
 THRESHOLD = 0.60  # similarity threshold to consider a keypoint 'covered'
 
+@metrics.timed("grading.keypoint_coverage")
 def evaluate_answer_text(answer_text, subject):
     with open(OUT_PATH, "r", encoding="utf-8") as f:
         kp = json.load(f)
@@ -16,11 +19,13 @@ def evaluate_answer_text(answer_text, subject):
         return {"error": "No keypoints found."}
 
     # Encode keypoints and answer sentences
-    kp_emb = MODEL.encode(keypoints, convert_to_tensor=True)
+    with metrics.span("embed.encode", items=len(keypoints)):
+        kp_emb = MODEL.encode(keypoints, convert_to_tensor=True)
     ans_sents = [s.strip() for s in answer_text.splitlines() if len(s.strip())>10]
     if not ans_sents:
         return {"score": 0.0, "matched": [], "missing": keypoints, "feedback": "No readable answer text found."}
-    ans_emb = MODEL.encode(ans_sents, convert_to_tensor=True)
+    with metrics.span("embed.encode", items=len(ans_sents)):
+        ans_emb = MODEL.encode(ans_sents, convert_to_tensor=True)
 
     # For each keypoint, find max similarity with any answer sentence
     sims = util.cos_sim(kp_emb, ans_emb).cpu().numpy()  # shape (num_kp, num_ans_sents)
@@ -59,10 +64,8 @@ def evaluate_answer_file(filepath, subject):
     text = extract_text_from_answer(filepath)
     res = evaluate_answer_text(text, subject)
     # save results
-    os.makedirs("data/results", exist_ok=True)
     outpath = os.path.join("data/results", f"result_{os.path.basename(filepath)}.json")
-    with open(outpath, "w", encoding="utf-8") as f:
-        json.dump(res, f, indent=2, ensure_ascii=False)
+    save_json(res, outpath)
     print("Saved evaluation result to", outpath)
     print("Score:", res.get("score"))
     print("Feedback:", res.get("feedback")[:400])
@@ -1,24 +1,65 @@
 # extractor/content_formatter.py
 import os, json
-from .pdf_extractor import extract_text_pdf
-from .ppt_extractor import extract_text_pptx
+from .pdf_extractor import extract_pages_pdf
+from .ppt_extractor import extract_slides_pptx
 from .image_extractor import extract_text_image
 from .text_cleaner import clean_text
+from utils import metrics, db_utils
+from utils.file_utils import save_json
+from nlp_analysis.text_index import get_text_index
 
 MATERIALS_DIR = "data/materials"
 OUT_DIR = "data/processed_text"
 
-def process_file(path):
+def process_file_pages(path):
+    """
+    Cleaned text of a file plus the character offset where each page (or
+    slide) starts in it, so sentences can be traced back to their page.
+    """
     ext = os.path.splitext(path)[1].lower()
-    if ext == ".pdf":
-        text = extract_text_pdf(path)
-    elif ext in [".pptx", ".ppt"]:
-        text = extract_text_pptx(path)
-    elif ext in [".jpg", ".jpeg", ".png"]:
-        text = extract_text_image(path)
-    else:
-        text = ""
-    return clean_text(text)
+    with metrics.span("extract.process_file", nbytes=os.path.getsize(path)):
+        if ext == ".pdf":
+            pages = extract_pages_pdf(path)
+        elif ext in [".pptx", ".ppt"]:
+            pages = extract_slides_pptx(path)
+        elif ext in [".jpg", ".jpeg", ".png"]:
+            pages = [extract_text_image(path)]
+        else:
+            pages = []
+
+        parts, offsets, pos = [], [], 0
+        for page in pages:
+            offsets.append(pos)
+            cleaned = clean_text(page)
+            if cleaned:
+                parts.append(cleaned)
+                pos += len(cleaned) + 1  # joined with "\n"
+    return "\n".join(parts), offsets
+
+def process_file(path):
+    return process_file_pages(path)[0]
+
+def extract_entry(fpath):
+    """Processed-text entry for one material file."""
+    text, page_offsets = process_file_pages(fpath)
+    return {"filename": os.path.basename(fpath), "path": fpath, "text": text, "page_offsets": page_offsets}
+
+def subject_doc(subject, files):
+    """Processed-text document of a subject, files in a stable (filename) order."""
+    return {"subject": subject, "files": sorted(files, key=lambda f: f["filename"])}
+
+def save_subject(subject, files, out_dir=OUT_DIR):
+    """Writes data/processed_text/<subject>.json; `files` are extract_entry dicts."""
+    doc = subject_doc(subject, files)
+    out_file = os.path.join(out_dir, f"{subject}.json")
+    save_json(doc, out_file)
+    print("Saved processed text to", out_file)
+    # lexical index: only files whose text changed are re-indexed
+    get_text_index().update_subject(doc)
+    store = db_utils.get_store()
+    if store is not None:
+        db_utils.save_subject_files(store, subject, doc["files"])
+    return out_file
 
 def process_all_materials(materials_dir=MATERIALS_DIR, out_dir=OUT_DIR):
     os.makedirs(out_dir, exist_ok=True)
@@ -29,16 +70,12 @@ def process_all_materials(materials_dir=MATERIALS_DIR, out_dir=OUT_DIR):
         subj_path = os.path.join(materials_dir, subj_folder)
         if not os.path.isdir(subj_path):
             continue
-        doc = {"subject": subj_folder, "files": []}
+        files = []
         for fname in sorted(os.listdir(subj_path)):
             fpath = os.path.join(subj_path, fname)
             if fname == "metadata.json":
                 continue
             if os.path.isfile(fpath):
                 print("Extracting", fpath)
-                text = process_file(fpath)
-                doc["files"].append({"filename": fname, "path": fpath, "text": text})
-        out_file = os.path.join(out_dir, f"{subj_folder}.json")
-        with open(out_file, "w", encoding="utf-8") as wf:
-            json.dump(doc, wf, indent=2, ensure_ascii=False)
-        print("Saved processed text to", out_file)
+                files.append(extract_entry(fpath))
+        save_subject(subj_folder, files, out_dir)
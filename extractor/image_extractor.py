@@ -3,6 +3,7 @@ from PIL import Image
 import pytesseract
 import easyocr
 import os
+from utils import metrics
 
 # If on Windows and Tesseract installed at default path, uncomment and edit:
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
@@ -15,6 +16,7 @@ def _get_easyocr_reader():
         _reader = easyocr.Reader(['en'], gpu=False)
     return _reader
 
+@metrics.timed("extract.image")
 def extract_text_image(path):
     ext = os.path.splitext(path)[1].lower()
     # load using PIL
@@ -1,11 +1,12 @@
 # extractor/pdf_extractor.py
 import fitz  # pymupdf
+from utils import metrics
 
-def extract_text_pdf(path):
-    text_parts = []
+@metrics.timed("extract.pdf")
+def extract_pages_pdf(path):
+    """Text of every page, in order (empty string for pages without text)."""
     doc = fitz.open(path)
-    for page in doc:
-        text = page.get_text("text")
-        if text:
-            text_parts.append(text)
-    return "\n".join(text_parts)
+    return [page.get_text("text") or "" for page in doc]
+
+def extract_text_pdf(path):
+    return "\n".join(text for text in extract_pages_pdf(path) if text)
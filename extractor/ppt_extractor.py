@@ -1,11 +1,19 @@
 # extractor/ppt_extractor.py
 from pptx import Presentation
+from utils import metrics
 
-def extract_text_pptx(path):
+@metrics.timed("extract.pptx")
+def extract_slides_pptx(path):
+    """Text of every slide, in order."""
     prs = Presentation(path)
-    texts = []
+    slides = []
     for slide in prs.slides:
+        texts = []
         for shape in slide.shapes:
             if hasattr(shape, "text") and shape.text.strip():
                 texts.append(shape.text)
-    return "\n".join(texts)
+        slides.append("\n".join(texts))
+    return slides
+
+def extract_text_pptx(path):
+    return "\n".join(text for text in extract_slides_pptx(path) if text)
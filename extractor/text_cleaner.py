@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import re
+from utils import metrics
 
+@metrics.timed("extract.clean_text")
 def clean_text(text):
     if not text:
         return ""
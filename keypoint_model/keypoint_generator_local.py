@@ -1,34 +1,63 @@
 import os
+import sys
 import glob
-from utils.model_loader import load_local_model
-from utils.keypoint_logic import process_materials
+
+# run from the repo root so the shared utils package is importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from keypoint_model.utils.model_loader import load_local_model, load_draft_model
+from keypoint_model.utils.keypoint_logic import process_materials
+from utils.batch_generator import BatchGenerationScheduler
+from utils import profiling
 
 # === CONFIG ===
 INPUT_FOLDER = "./data/processed_text"                   # folder containing all JSON files
 OUTPUT_FOLDER = "outputs"                    # output folder for generated keypoints
 MODEL_ID = "microsoft/Phi-3-mini-4k-instruct"
 LOCAL_DIR = "models/phi3-mini"
+MAX_BATCH_SIZE = 8                           # questions generated together (1 = no batching)
+DRAFT_MODEL_ID = None                        # small model for assisted decoding (forces batch size 1)
+
+
+def main():
+    # === SETUP ===
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+    # === LOAD MODEL (cached if available) ===
+    generator = load_local_model(model_id=MODEL_ID, local_dir=LOCAL_DIR)
+    generate_kwargs = {}
+    if DRAFT_MODEL_ID:
+        generate_kwargs["assistant_model"] = load_draft_model(DRAFT_MODEL_ID)
+    elif MAX_BATCH_SIZE > 1:
+        generator = BatchGenerationScheduler.from_pipeline(
+            generator, max_batch_size=MAX_BATCH_SIZE, max_new_tokens=300, temperature=0.5
+        ).start()
+
+    # === FIND ALL INPUT JSON FILES ===
+    json_files = glob.glob(os.path.join(INPUT_FOLDER, "*.json"))
 
-# === SETUP ===
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    if not json_files:
+        print("❌ No JSON files found in 'materials/' folder!")
+    else:
+        print(f"📚 Found {len(json_files)} subject files in {INPUT_FOLDER}\n")
 
-# === LOAD MODEL (cached if available) ===
-generator = load_local_model(model_id=MODEL_ID, local_dir=LOCAL_DIR)
+    # === PROCESS EACH SUBJECT FILE ===
+    for file_path in json_files:
+        subject_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_path = os.path.join(OUTPUT_FOLDER, f"keypoints_{subject_name}.json")
+        cache_path = os.path.join(OUTPUT_FOLDER, "context_cache", f"{subject_name}.json")
 
-# === FIND ALL INPUT JSON FILES ===
-json_files = glob.glob(os.path.join(INPUT_FOLDER, "*.json"))
+        print(f"\n🧠 Generating keypoints for subject: {subject_name}")
+        process_materials(file_path, output_path, generator, cache_path=cache_path, **generate_kwargs)
 
-if not json_files:
-    print("❌ No JSON files found in 'materials/' folder!")
-else:
-    print(f"📚 Found {len(json_files)} subject files in {INPUT_FOLDER}\n")
+    if isinstance(generator, BatchGenerationScheduler):
+        generator.stop()
 
-# === PROCESS EACH SUBJECT FILE ===
-for file_path in json_files:
-    subject_name = os.path.splitext(os.path.basename(file_path))[0]
-    output_path = os.path.join(OUTPUT_FOLDER, f"keypoints_{subject_name}.json")
+    print("\n✅ All subjects processed successfully!")
 
-    print(f"\n🧠 Generating keypoints for subject: {subject_name}")
-    process_materials(file_path, output_path, generator)
 
-print("\n✅ All subjects processed successfully!")
+if __name__ == "__main__":
+    with profiling.from_argv("llm_keypoints"):
+        main()
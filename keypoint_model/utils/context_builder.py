@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from utils import metrics
+from utils.file_utils import save_json
+
+
+def split_sentences(text):
+    """Same naive splitter as nlp_analysis: fine for slides and docs."""
+    sents = re.split(r'(?<=[.!?])\s+|\n+', text)
+    return [s.strip() for s in sents if len(s.strip()) > 10]
+
+
+def sentence_windows(text, window=3):
+    """Groups consecutive sentences into non-overlapping windows."""
+    sents = split_sentences(text)
+    return [" ".join(sents[i:i + window]) for i in range(0, len(sents), window)]
+
+
+class ContextBuilder:
+    """
+    Picks the parts of the course material that matter for a question.
+
+    Every content file is cut into sentence windows which are embedded once.
+    For a question, files are ranked by their best window, and the best windows
+    of the top-k files are packed under a token budget measured with the LLM's
+    tokenizer. Packed contexts are cached in memory and, optionally, on disk;
+    the disk cache only keeps entries for the current content.
+    """
+
+    def __init__(self, embedder, tokenizer, token_budget=768, window=3, top_k_files=2, cache_path=None):
+        self.embedder = embedder
+        self.tokenizer = tokenizer
+        self.token_budget = token_budget
+        self.window = window
+        self.top_k_files = top_k_files
+        self.cache_path = cache_path
+
+        self.files = []
+        self.windows = []          # window text
+        self.window_file = None    # file index of each window
+        self.window_embeddings = None
+        self._token_counts = {}
+        self._fingerprint = ""
+        self._tokenizer_name = getattr(tokenizer, "name_or_path", "") or type(tokenizer).__name__
+        self._cache = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self._cache = json.load(f)
+
+    def index(self, contents, filenames):
+        """Splits and embeds all content files (call once per subject)."""
+        self.files = list(filenames)
+        self.windows, owners = [], []
+        for file_idx, text in enumerate(contents):
+            for w in sentence_windows(text, self.window):
+                self.windows.append(w)
+                owners.append(file_idx)
+        self.window_file = np.asarray(owners, dtype=np.int32)
+        self._token_counts = {}
+
+        if self.windows:
+            with metrics.span("embed.encode", items=len(self.windows)):
+                emb = self.embedder.encode(self.windows, batch_size=64, convert_to_numpy=True,
+                                           normalize_embeddings=True)
+            self.window_embeddings = emb.astype(np.float32, copy=False)
+        else:
+            self.window_embeddings = np.zeros((0, 1), dtype=np.float32)
+
+        digest = hashlib.sha1()
+        for name, text in zip(self.files, contents):
+            digest.update(name.encode("utf-8"))
+            digest.update(text.encode("utf-8"))
+        self._fingerprint = digest.hexdigest()
+        return self
+
+    def _count_tokens(self, idx):
+        if idx not in self._token_counts:
+            self._token_counts[idx] = len(self.tokenizer.encode(self.windows[idx], add_special_tokens=False))
+        return self._token_counts[idx]
+
+    def _cache_key(self, question):
+        raw = f"{self._fingerprint}|{self._tokenizer_name}|{self.token_budget}|{self.top_k_files}|{self.window}|{question}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def build(self, question):
+        """
+        Returns (context, files) for a question: the packed context text and
+        the filenames it was taken from, best file first.
+        """
+        key = self._cache_key(question)
+        if key in self._cache:
+            cached = self._cache[key]
+            return cached["context"], cached["files"]
+
+        if not self.windows:
+            return "", []
+
+        with metrics.span("embed.encode"):
+            q_emb = self.embedder.encode(question, convert_to_numpy=True, normalize_embeddings=True)
+        sims = self.window_embeddings @ q_emb.astype(np.float32)
+
+        # rank files by their best-matching window
+        file_best = np.full(len(self.files), -np.inf, dtype=np.float32)
+        np.maximum.at(file_best, self.window_file, sims)
+        top_files = [int(i) for i in np.argsort(-file_best)[:self.top_k_files] if np.isfinite(file_best[i])]
+
+        # pack best windows from those files until the token budget is used up
+        candidates = np.flatnonzero(np.isin(self.window_file, top_files))
+        candidates = candidates[np.argsort(-sims[candidates])]
+        chosen, used = [], 0
+        for idx in candidates:
+            n = self._count_tokens(int(idx))
+            if used + n > self.token_budget:
+                continue
+            chosen.append(int(idx))
+            used += n
+            if self.token_budget - used < 16:
+                break
+
+        # keep document order so the packed text still reads naturally
+        chosen.sort(key=lambda i: (top_files.index(int(self.window_file[i])), i))
+        context = "\n...\n".join(self.windows[i] for i in chosen)
+        files = [self.files[i] for i in top_files]
+
+        self._cache[key] = {"context": context, "files": files, "tokens": used, "fingerprint": self._fingerprint}
+        return context, files
+
+    def save_cache(self):
+        """Writes the cache, dropping contexts built from older versions of the content."""
+        if not self.cache_path:
+            return
+        self._cache = {k: v for k, v in self._cache.items() if v.get("fingerprint") == self._fingerprint}
+        save_json(self._cache, self.cache_path)
@@ -1,17 +1,24 @@
 import json
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer, util
-
-def generate_keypoints(question, content, generator):
-    """
-    Uses a local LLM to generate key points for the question from the content.
-    """
-    prompt = f"""
+from sentence_transformers import SentenceTransformer
+from transformers import StoppingCriteriaList
+from utils.stopping_criteria import TextStoppingCriteria, keypoint_stop_condition
+from utils import metrics
+from utils.file_utils import save_json
+from .context_builder import ContextBuilder
+
+MAX_BULLETS = 6             # stop generating once this many keypoints are written
+CONTEXT_TOKEN_BUDGET = 768  # prompt tokens spent on course content per question
+TOP_K_FILES = 2             # content files the context may be drawn from
+
+def build_keypoint_prompt(question, context):
+    """Builds the keypoint-extraction prompt for one question from its packed context."""
+    return f"""
 You are an academic assistant. Read the given course content and extract concise key points
 that a student must include to correctly answer the question.
 
 Course content:
-{content[:3000]}
+{context}
 
 Question:
 {question}
@@ -22,18 +29,50 @@ Output format:
 - Point 3
 """
 
-    response = generator(prompt, num_return_sequences=1)
-    text = response[0]["generated_text"]
-    # Clean output
+
+def clean_keypoint_output(text):
+    """Strips the echoed prompt from the generated text."""
     if "Output format:" in text:
         text = text.split("Output format:")[-1].strip()
     return text.strip()
 
 
-def process_materials(input_json_path, output_json_path, generator):
+def _reject_scheduler_kwargs(generate_kwargs):
+    """The batch scheduler fixes its generation settings at construction time."""
+    if generate_kwargs:
+        raise ValueError(f"BatchGenerationScheduler does not accept generate kwargs: {', '.join(generate_kwargs)}")
+
+
+def generate_keypoints(question, context, generator, max_bullets=MAX_BULLETS, **generate_kwargs):
+    """
+    Uses a local LLM to generate key points for the question from the context
+    selected by ContextBuilder.
+    Generation stops after `max_bullets` points or on a repetition loop.
+    Extra kwargs (e.g. assistant_model=draft) are passed through to generate;
+    the batch scheduler does not take any.
+    """
+    prompt = build_keypoint_prompt(question, context)
+    stop = keypoint_stop_condition(max_bullets)
+    if hasattr(generator, "submit"):
+        _reject_scheduler_kwargs(generate_kwargs)
+        return clean_keypoint_output(generator.generate(prompt, stop_condition=stop))
+
+    prompt_length = len(generator.tokenizer(prompt)["input_ids"])
+    criteria = StoppingCriteriaList([TextStoppingCriteria(generator.tokenizer, stop, prompt_length)])
+    with metrics.span("llm.generate"):
+        response = generator(prompt, num_return_sequences=1, stopping_criteria=criteria, **generate_kwargs)
+    return clean_keypoint_output(response[0]["generated_text"])
+
+
+def process_materials(input_json_path, output_json_path, generator, token_budget=CONTEXT_TOKEN_BUDGET,
+                      top_k_files=TOP_K_FILES, cache_path=None, **generate_kwargs):
     """
     Loads the LMS data from JSON, separates questions and content, and generates keypoints.
+    Each question gets the most relevant sentence windows of its top-k files,
+    packed under `token_budget` tokens of the generator's tokenizer.
     """
+    if hasattr(generator, "submit"):
+        _reject_scheduler_kwargs(generate_kwargs)
     print(f"📂 Loading data from {input_json_path} ...")
     with open(input_json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
@@ -62,28 +101,42 @@ def process_materials(input_json_path, output_json_path, generator):
 
     print(f"📘 Found {len(questions)} questions and {len(contents)} content sections")
 
-    # Embed content
+    # Embed sentence windows of every content file once
     embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    content_embeddings = embedder.encode(contents, convert_to_tensor=True)
+    builder = ContextBuilder(embedder, generator.tokenizer, token_budget=token_budget,
+                             top_k_files=top_k_files, cache_path=cache_path)
+    builder.index(contents, content_files)
 
-    results = []
+    related = []
+    for q in questions:
+        context, context_files = builder.build(q)
+        related.append((q, context, context_files[0] if context_files else "unknown"))
+    builder.save_cache()
 
-    for q in tqdm(questions, desc="🧠 Generating keypoints"):
-        q_emb = embedder.encode(q, convert_to_tensor=True)
-        sim = util.cos_sim(q_emb, content_embeddings)
-        best_idx = int(sim.argmax())
-        related_content = contents[best_idx]
-        related_file = content_files[best_idx]
-
-        keypoints = generate_keypoints(q, related_content, generator)
-
-        results.append({
-            "question": q,
-            "related_file": related_file,
-            "keypoints": keypoints
-        })
+    results = []
 
-    with open(output_json_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    if hasattr(generator, "submit"):
+        # Batch scheduler: queue every prompt up front so they run as padded batches
+        requests = [
+            generator.submit(build_keypoint_prompt(q, context), stop_condition=keypoint_stop_condition(MAX_BULLETS))
+            for q, context, _ in related
+        ]
+        for (q, _, related_file), req in tqdm(zip(related, requests), total=len(requests), desc="🧠 Generating keypoints"):
+            results.append({
+                "question": q,
+                "related_file": related_file,
+                "keypoints": clean_keypoint_output(req.result())
+            })
+    else:
+        for q, context, related_file in tqdm(related, desc="🧠 Generating keypoints"):
+            keypoints = generate_keypoints(q, context, generator, **generate_kwargs)
+
+            results.append({
+                "question": q,
+                "related_file": related_file,
+                "keypoints": keypoints
+            })
+
+    save_json(results, output_json_path)
 
     print(f"✅ Keypoints generated and saved to {output_json_path}")
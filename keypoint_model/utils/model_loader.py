@@ -37,3 +37,14 @@ def load_local_model(model_id="microsoft/Phi-3-mini-4k-instruct", local_dir="mod
     )
 
     return generator
+
+
+def load_draft_model(model_id, device_map="auto"):
+    """
+    Loads a small draft model for assisted (speculative) decoding.
+    Pass it as `assistant_model=` to generate; the draft proposes tokens and the
+    main model verifies them in one forward pass. Works with batch size 1 only,
+    and the draft should share the main model's tokenizer.
+    """
+    print(f"🧩 Loading draft model '{model_id}' for assisted decoding...")
+    return AutoModelForCausalLM.from_pretrained(model_id, device_map=device_map, torch_dtype="auto")
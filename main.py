@@ -1,10 +1,13 @@
 # main.py
 import sys
-from crawler.lms_scraper import scrape_lms
-from crawler.material_downloader import download_materials
-from extractor.content_formatter import process_all_materials
-from nlp_analysis.keypoint_extractor import generate_keypoints
-from evaluation.answer_analyzer import evaluate_answer_file
+from pipeline.dag import BuildGraph
+from utils import metrics, profiling
+
+REPORT_PATH = "data/run_report.json"
+PROMETHEUS_PATH = "data/run_report.prom"
+
+# stage modules are imported by the commands that need them, so
+# `status` answers without loading browsers or models
 
 def help_text():
     print("""
@@ -15,33 +18,84 @@ Usage:
   python main.py keypoints           -> generate keypoints (data/keypoints.json)
   python main.py eval <file> <subject> -> evaluate student answer file (image/pdf) for subject
   python main.py all                 -> run crawl -> download -> extract -> keypoints
+                                        (streamed: files are extracted as they download and
+                                         keypoints built as each subject completes)
+  python main.py all --sequential    -> same stages, one after another
+  python main.py status              -> show which stages are stale and why
+  python main.py build [stage] [--force]
+                                     -> run only the stale stages (up to <stage>): crawl, download,
+                                        extract, keypoints, knowledge_graph, model_answers, llm_keypoints
+  python main.py mark [stage ...]    -> record existing outputs as up to date without rebuilding
+
+  Add --metrics to any command to time every stage (downloads, extractors, encoders, LLM,
+  spaCy, grading) and write data/run_report.json and data/run_report.prom.
+  Add --profile to any command for a CPU hotspot report in data/profiles/
+  (--profile-memory adds tracemalloc snapshots, --profile-torch torch op timings).
 """)
 
-if __name__ == "__main__":
+def check_stages(graph, names):
+    """True when every name is a BuildGraph stage; otherwise prints the usage text."""
+    unknown = [n for n in names if n not in graph.stages]
+    if unknown:
+        print(f"❌ Unknown stage: {', '.join(unknown)} (choose from {', '.join(graph.order)})")
+        help_text()
+    return not unknown
+
+def run_command():
     if len(sys.argv) < 2:
         help_text()
-        sys.exit(0)
+        return
 
     cmd = sys.argv[1].lower()
-    if cmd == "crawl":
-        scrape_lms()
-    elif cmd == "download":
-        download_materials()
-    elif cmd == "extract":
-        process_all_materials()
-    elif cmd == "keypoints":
-        generate_keypoints()
+    if cmd in ("crawl", "download", "extract", "keypoints"):
+        # explicit commands always run, and are recorded for `status`
+        BuildGraph().run_stage(cmd)
     elif cmd == "eval":
         if len(sys.argv) < 4:
             print("python main.py eval <answer_file> <subject_name>")
         else:
+            from evaluation.answer_analyzer import evaluate_answer_file
             answer_file = sys.argv[2]
             subject = sys.argv[3]
             evaluate_answer_file(answer_file, subject)
     elif cmd == "all":
-        scrape_lms()
-        download_materials()
-        process_all_materials()
-        generate_keypoints()
+        graph = BuildGraph()
+        if "--sequential" in sys.argv:
+            for stage in ("crawl", "download", "extract", "keypoints"):
+                graph.run_stage(stage)
+        else:
+            from pipeline.streaming import run_all_streaming
+            run_all_streaming()
+            for stage in ("crawl", "download", "extract", "keypoints"):
+                graph.record(stage)
+    elif cmd == "status":
+        BuildGraph().print_status()
+    elif cmd == "build":
+        args = [a for a in sys.argv[2:] if not a.startswith("--")]
+        graph = BuildGraph()
+        if check_stages(graph, args[:1]):
+            graph.build(args[0] if args else None, force="--force" in sys.argv)
+    elif cmd == "mark":
+        graph = BuildGraph()
+        args = [a for a in sys.argv[2:] if not a.startswith("--")]
+        if not check_stages(graph, args):
+            return
+        for stage in (args or graph.order):
+            graph.record(stage)
+            print(f"✅ {stage} marked up to date")
     else:
         help_text()
+
+
+if __name__ == "__main__":
+    if "--metrics" in sys.argv:
+        sys.argv.remove("--metrics")
+        metrics.enable()
+    name = next((a.lower() for a in sys.argv[1:] if not a.startswith("--")), "main")
+    try:
+        with profiling.from_argv(name):
+            run_command()
+    finally:
+        if metrics.enabled():
+            metrics.print_summary()
+            metrics.write_report(REPORT_PATH, PROMETHEUS_PATH)
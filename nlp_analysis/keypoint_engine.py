@@ -0,0 +1,172 @@
+# nlp_analysis/keypoint_engine.py
+import re
+import numpy as np
+from utils import metrics
+
+BATCH_SIZE = 64
+DIVERSITY = 0.3       # MMR trade-off: 0 = pure centroid relevance, 1 = pure novelty
+OVERSAMPLE = 4        # candidates kept per file = quota * OVERSAMPLE
+KMEANS_ITERS = 20
+
+
+def module_of(filename):
+    """'..._Module-3-Week 6_...pdf' -> 'Module 3'; files without a module tag stand alone."""
+    m = re.search(r"module[\s_-]*(\d+)", filename, flags=re.IGNORECASE)
+    return f"Module {m.group(1)}" if m else filename
+
+
+def encode_batches(model, sentences, batch_size=BATCH_SIZE):
+    """Yields L2-normalized float32 embeddings, one fixed-size batch at a time."""
+    for start in range(0, len(sentences), batch_size):
+        batch = sentences[start:start + batch_size]
+        with metrics.span("embed.encode", items=len(batch)):
+            emb = model.encode(batch, batch_size=len(batch), convert_to_numpy=True, normalize_embeddings=True)
+        yield np.asarray(emb, dtype=np.float32)
+
+
+def mmr(embeddings, relevance, k, diversity=DIVERSITY, admit=None):
+    """
+    Maximal marginal relevance over normalized embeddings. `admit(i)` may
+    veto a candidate (quotas); vetoed candidates are skipped, not retried.
+    Returns the chosen row indices in selection order.
+    """
+    n = len(embeddings)
+    chosen = []
+    max_sim = np.full(n, -np.inf, dtype=np.float32)  # similarity to the closest chosen row
+    available = np.ones(n, dtype=bool)
+    while len(chosen) < k and available.any():
+        score = (1 - diversity) * relevance - diversity * np.where(np.isfinite(max_sim), max_sim, 0.0)
+        score[~available] = -np.inf
+        i = int(np.argmax(score))
+        available[i] = False
+        if admit is not None and not admit(i):
+            continue
+        chosen.append(i)
+        np.maximum(max_sim, embeddings @ embeddings[i], out=max_sim)
+    return chosen
+
+
+def spherical_kmeans(embeddings, k, iters=KMEANS_ITERS, seed=0):
+    """Cosine k-means with k-means++ seeding; returns the label of every row."""
+    n = len(embeddings)
+    rng = np.random.default_rng(seed)
+    centers = [embeddings[rng.integers(n)]]
+    for _ in range(1, k):
+        dist = 1 - np.max(embeddings @ np.stack(centers).T, axis=1)
+        dist = np.clip(dist, 0, None)
+        total = dist.sum()
+        centers.append(embeddings[rng.choice(n, p=dist / total) if total > 0 else rng.integers(n)])
+    centers = np.stack(centers).astype(np.float32)
+
+    labels = np.zeros(n, dtype=np.int64)
+    for it in range(iters):
+        new_labels = np.argmax(embeddings @ centers.T, axis=1)
+        if it and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = embeddings[labels == c]
+            if len(members):
+                center = members.sum(axis=0)
+                centers[c] = center / max(np.linalg.norm(center), 1e-12)
+    return labels
+
+
+class KeypointEngine:
+    """
+    Streaming keypoint selection for one subject.
+
+    Files are fed one at a time; their sentences are encoded in fixed-size
+    batches and folded into a running subject centroid. Each file only keeps
+    a small pool of diverse candidates (MMR against the file centroid), so
+    memory is bounded by the largest file rather than the whole subject.
+    `select` then picks the final keypoints from the pool against the
+    subject centroid with MMR, or one per k-means cluster, while respecting
+    per-file and per-module quotas.
+    """
+
+    def __init__(self, model, top_k=6, method="mmr", batch_size=BATCH_SIZE, per_file_quota=2,
+                 per_module_quota=None, diversity=DIVERSITY, oversample=OVERSAMPLE, module_key=module_of):
+        if method not in ("mmr", "kmeans"):
+            raise ValueError(f"Unknown keypoint selection method: {method}")
+        self.model = model
+        self.top_k = top_k
+        self.method = method
+        self.batch_size = batch_size
+        self.per_file_quota = per_file_quota
+        self.per_module_quota = per_module_quota
+        self.diversity = diversity
+        self.oversample = oversample
+        self.module_key = module_key
+
+        self._sum = None
+        self._count = 0
+        self._pool = []        # candidate sentences
+        self._pool_file = []   # filename of each candidate
+        self._pool_emb = []    # per-file arrays of candidate embeddings
+
+    def add_file(self, filename, sentences):
+        if not sentences:
+            return
+        emb = None
+        for start, batch in zip(range(0, len(sentences), self.batch_size),
+                                encode_batches(self.model, sentences, self.batch_size)):
+            if emb is None:
+                emb = np.empty((len(sentences), batch.shape[1]), dtype=np.float32)
+            emb[start:start + len(batch)] = batch
+
+        file_sum = emb.sum(axis=0)
+        self._sum = file_sum if self._sum is None else self._sum + file_sum
+        self._count += len(sentences)
+
+        keep = (self.per_file_quota or self.top_k) * self.oversample
+        centroid = file_sum / max(np.linalg.norm(file_sum), 1e-12)
+        picked = mmr(emb, emb @ centroid, keep, self.diversity)
+        self._pool += [sentences[i] for i in picked]
+        self._pool_file += [filename] * len(picked)
+        self._pool_emb.append(emb[picked])
+
+    def _quota_check(self):
+        per_file, per_module = {}, {}
+
+        def admit(i):
+            name = self._pool_file[i]
+            module = self.module_key(name)
+            if self.per_file_quota and per_file.get(name, 0) >= self.per_file_quota:
+                return False
+            if self.per_module_quota and per_module.get(module, 0) >= self.per_module_quota:
+                return False
+            per_file[name] = per_file.get(name, 0) + 1
+            per_module[module] = per_module.get(module, 0) + 1
+            return True
+        return admit
+
+    def select(self):
+        """Returns [{"sentence", "file", "module", "score"}], most central first."""
+        if not self._pool:
+            return []
+        emb = np.concatenate(self._pool_emb)
+        centroid = self._sum / max(np.linalg.norm(self._sum), 1e-12)
+        relevance = emb @ centroid
+        admit = self._quota_check()
+
+        if self.method == "mmr":
+            chosen = mmr(emb, relevance, self.top_k, self.diversity, admit)
+        else:
+            k = min(self.top_k, len(emb))
+            labels = spherical_kmeans(emb, k)
+            chosen = []
+            # biggest clusters first; each contributes its most central admissible sentence
+            for c in np.argsort(-np.bincount(labels, minlength=k), kind="stable"):
+                members = np.flatnonzero(labels == c)
+                for i in members[np.argsort(-relevance[members])]:
+                    if admit(int(i)):
+                        chosen.append(int(i))
+                        break
+
+        chosen.sort(key=lambda i: -relevance[i])
+        return [
+            {"sentence": self._pool[i], "file": self._pool_file[i],
+             "module": self.module_key(self._pool_file[i]), "score": float(relevance[i])}
+            for i in chosen
+        ]
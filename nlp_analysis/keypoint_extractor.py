@@ -1,7 +1,10 @@
 # nlp_analysis/keypoint_extractor.py
 import os, json, re
-from sentence_transformers import SentenceTransformer, util
-import numpy as np
+from sentence_transformers import SentenceTransformer
+from .keypoint_engine import KeypointEngine
+from .sentence_index import get_sentence_index
+from utils import metrics, db_utils
+from utils.file_utils import save_json
 
 MODEL_NAME = "all-MiniLM-L6-v2"
 MODEL = SentenceTransformer(MODEL_NAME)
@@ -14,16 +17,36 @@ def split_into_sentences(text):
     sents = [s.strip() for s in sents if len(s.strip())>10]
     return sents
 
-def top_k_by_centroid(sentences, k=5):
-    if not sentences:
-        return []
-    embeddings = MODEL.encode(sentences, convert_to_tensor=True)
-    centroid = embeddings.mean(dim=0)
-    sims = util.cos_sim(embeddings, centroid).cpu().numpy().ravel()
-    idxs = np.argsort(-sims)[:k]
-    return [sentences[i] for i in idxs]
+def top_k_by_centroid(sentences, k=5, method="mmr"):
+    # central but mutually distinct sentences (see KeypointEngine)
+    engine = KeypointEngine(MODEL, top_k=k, method=method, per_file_quota=None)
+    engine.add_file("", sentences)
+    return [kp["sentence"] for kp in engine.select()]
+
+def subject_keypoints(data, top_k=6, method="mmr", per_file_quota=2, per_module_quota=None):
+    """Keypoints of one processed subject ({"subject", "files"})."""
+    # files are encoded one at a time; only a small candidate pool per file is kept
+    engine = KeypointEngine(MODEL, top_k=top_k, method=method, per_file_quota=per_file_quota,
+                            per_module_quota=per_module_quota)
+    for file in data.get("files", []):
+        if file.get("text"):
+            engine.add_file(file.get("filename", ""), split_into_sentences(file["text"]))
+    return [kp["sentence"] for kp in engine.select()]
+
+def update_keypoints(subject, top, out_path=OUT_PATH):
+    """Replaces one subject's keypoints in keypoints.json, keeping the others."""
+    keypoints = {}
+    if os.path.exists(out_path) and os.path.getsize(out_path):
+        with open(out_path, "r", encoding="utf-8") as f:
+            keypoints = json.load(f)
+    keypoints[subject] = top
+    save_json(keypoints, out_path)
+    store = db_utils.get_store()
+    if store is not None:
+        db_utils.save_keypoints(store, subject, top)
 
-def generate_keypoints(processed_dir=PROCESSED_DIR, out_path=OUT_PATH, top_k=6):
+def generate_keypoints(processed_dir=PROCESSED_DIR, out_path=OUT_PATH, top_k=6, method="mmr",
+                       per_file_quota=2, per_module_quota=None):
     keypoints = {}
     if not os.path.exists(processed_dir):
         print("No processed text. Run: python main.py extract")
@@ -34,24 +57,25 @@ def generate_keypoints(processed_dir=PROCESSED_DIR, out_path=OUT_PATH, top_k=6):
         path = os.path.join(processed_dir, fname)
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        combined = "\n\n".join([file["text"] for file in data.get("files", []) if file.get("text")])
-        sentences = split_into_sentences(combined)
-        top = top_k_by_centroid(sentences, k=top_k)
+        top = subject_keypoints(data, top_k, method, per_file_quota, per_module_quota)
         keypoints[data["subject"]] = top
         print(f"Generated {len(top)} keypoints for subject {data['subject']}")
-    with open(out_path, "w", encoding="utf-8") as outf:
-        json.dump(keypoints, outf, indent=2, ensure_ascii=False)
+    save_json(keypoints, out_path)
+    store = db_utils.get_store()
+    if store is not None:
+        for subject, top in keypoints.items():
+            db_utils.save_keypoints(store, subject, top)
     print("Saved keypoints to", out_path)
 
+def search_sentences(question, subject, top_n=5):
+    """Best supporting sentences for a question from the whole subject text, with file/page."""
+    index = get_sentence_index(subject, MODEL, MODEL_NAME, PROCESSED_DIR)
+    if index is None:
+        return []
+    with metrics.span("embed.encode"):
+        q_emb = MODEL.encode(question, convert_to_numpy=True, normalize_embeddings=True)
+    return index.search(q_emb, top_n)
+
 def get_top_sentences_for_question(question, subject, top_n=5):
     # helper to find best matching sentences for a question
-    with open(OUT_PATH, "r", encoding="utf-8") as f:
-        kp = json.load(f)
-    if subject not in kp:
-        return []
-    subject_keypoints = kp[subject]
-    q_emb = MODEL.encode(question, convert_to_tensor=True)
-    s_emb = MODEL.encode(subject_keypoints, convert_to_tensor=True)
-    sims = util.cos_sim(q_emb, s_emb).cpu().numpy().ravel()
-    idxs = (-sims).argsort()[:top_n]
-    return [subject_keypoints[i] for i in idxs if sims[i] > 0.1]
+    return [hit["sentence"] for hit in search_sentences(question, subject, top_n)]
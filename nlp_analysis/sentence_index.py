@@ -0,0 +1,147 @@
+# nlp_analysis/sentence_index.py
+import os
+import re
+import json
+import bisect
+import hashlib
+import numpy as np
+from utils import metrics
+from utils.file_utils import save_json, atomic_open
+
+INDEX_DIR = "data/sentence_index"
+INDEX_VERSION = 1
+MIN_SCORE = 0.1
+
+
+def sentence_spans(text):
+    """(start offset, sentence) pairs; splits on sentence ends and line breaks."""
+    spans = []
+    for m in re.finditer(r"[^\n]+?(?:[.!?](?=\s)|$)", text, flags=re.MULTILINE):
+        sent = " ".join(m.group(0).split())
+        if len(sent) > 10:
+            spans.append((m.start(), sent))
+    return spans
+
+
+def fingerprint(data, model_name):
+    digest = hashlib.sha1(f"{INDEX_VERSION}|{model_name}".encode("utf-8"))
+    for file in data.get("files", []):
+        digest.update(file.get("filename", "").encode("utf-8"))
+        digest.update(file.get("text", "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SentenceIndex:
+    """
+    Every cleaned sentence of a subject with its embedding, source file and
+    page (1-based, when the processed text records page offsets).
+    Stored as <subject>.npz (float32 embeddings, file/page ids) next to a
+    <subject>.json with the sentences, filenames and content fingerprint.
+    """
+
+    def __init__(self, subject, sentences, files, sent_file, sent_page, embeddings, fingerprint=""):
+        self.subject = subject
+        self.sentences = sentences
+        self.files = files
+        self.sent_file = np.asarray(sent_file, dtype=np.int32)
+        self.sent_page = np.asarray(sent_page, dtype=np.int32)  # 0 = unknown
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.fingerprint = fingerprint
+        self.mtime = None  # processed_text mtime the in-memory copy was checked against
+
+    @classmethod
+    def build(cls, data, model, model_name="", batch_size=64):
+        sentences, sent_file, sent_page = [], [], []
+        files = [file.get("filename", "") for file in data.get("files", [])]
+        for file_idx, file in enumerate(data.get("files", [])):
+            offsets = file.get("page_offsets") or []
+            for start, sent in sentence_spans(file.get("text", "")):
+                sentences.append(sent)
+                sent_file.append(file_idx)
+                sent_page.append(bisect.bisect_right(offsets, start) if offsets else 0)
+
+        if sentences:
+            with metrics.span("embed.encode", items=len(sentences)):
+                emb = model.encode(sentences, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+        else:
+            emb = np.zeros((0, 1), dtype=np.float32)
+        return cls(data.get("subject", ""), sentences, files, sent_file, sent_page, emb,
+                   fingerprint(data, model_name))
+
+    def save(self, index_dir=INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        base = os.path.join(index_dir, self.subject)
+        # both files are replaced atomically and carry the fingerprint, so a crash between
+        # the two writes is detected on load instead of pairing old and new data
+        with atomic_open(base + ".npz") as f:
+            np.savez(f, embeddings=self.embeddings, sent_file=self.sent_file, sent_page=self.sent_page,
+                     fingerprint=np.array(self.fingerprint))
+        save_json({"subject": self.subject, "fingerprint": self.fingerprint,
+                   "files": self.files, "sentences": self.sentences}, base + ".json")
+
+    @classmethod
+    def load(cls, subject, index_dir=INDEX_DIR):
+        """Returns the stored index, or None if it does not exist or its two files disagree."""
+        base = os.path.join(index_dir, subject)
+        if not (os.path.exists(base + ".json") and os.path.exists(base + ".npz")):
+            return None
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with np.load(base + ".npz") as arrays:
+            if "fingerprint" in arrays and str(arrays["fingerprint"]) != meta.get("fingerprint", ""):
+                return None
+            return cls(meta["subject"], meta["sentences"], meta["files"], arrays["sent_file"],
+                       arrays["sent_page"], arrays["embeddings"], meta.get("fingerprint", ""))
+
+    @metrics.timed("search.sentence_index")
+    def search(self, q_emb, top_n=5, min_score=MIN_SCORE):
+        """
+        Top-n distinct sentences for a normalized question embedding, best
+        first. Repeated sentences (slide titles) are reported once, with the
+        location of their best-scoring occurrence.
+        """
+        if not self.sentences:
+            return []
+        sims = self.embeddings @ np.asarray(q_emb, dtype=np.float32).ravel()
+        n = min(top_n * 4, len(sims))
+        top = np.argpartition(-sims, n - 1)[:n]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        hits, seen = [], set()
+        for i in top:
+            if sims[i] <= min_score or len(hits) == top_n:
+                break
+            if self.sentences[i] in seen:
+                continue
+            seen.add(self.sentences[i])
+            hits.append({"sentence": self.sentences[i], "file": self.files[self.sent_file[i]],
+                         "page": int(self.sent_page[i]) or None, "score": float(sims[i])})
+        return hits
+
+
+_indexes = {}  # subject -> SentenceIndex, kept for the life of the process
+
+
+def get_sentence_index(subject, model, model_name="", processed_dir="data/processed_text", index_dir=INDEX_DIR):
+    """
+    Loads a subject's index from memory or disk, (re)building it when the
+    processed text changed since it was stored. Returns None for unknown subjects.
+    """
+    path = os.path.join(processed_dir, f"{subject}.json")
+    index = _indexes.get(subject)
+    if index is not None and os.path.exists(path) and index.mtime == os.path.getmtime(path):
+        return index
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    expected = fingerprint(data, model_name)
+    index = SentenceIndex.load(subject, index_dir)
+    if index is None or index.fingerprint != expected:
+        print(f"📚 Building sentence index for {subject}...")
+        index = SentenceIndex.build(data, model, model_name)
+        index.subject = subject
+        index.save(index_dir)
+    index.mtime = os.path.getmtime(path)
+    _indexes[subject] = index
+    return index
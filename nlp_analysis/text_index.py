@@ -0,0 +1,244 @@
+# nlp_analysis/text_index.py
+"""
+SQLite FTS5 full-text index over data/processed_text, at file and sentence
+level, ranked with BM25. Kept up to date by the extract stage: only files
+whose text hash changed are re-indexed.
+
+    python nlp_analysis/text_index.py                  -> index every processed subject
+    python nlp_analysis/text_index.py "<query>" [subject]
+"""
+import os
+import re
+import sys
+import json
+import glob
+import bisect
+import sqlite3
+import threading
+import hashlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from nlp_analysis.sentence_index import sentence_spans
+from utils import metrics
+
+INDEX_PATH = "data/text_index.sqlite"
+PROCESSED_DIR = "data/processed_text"
+DERIVED_SUFFIXES = ("_keywords.json", "_model.json")
+TOKENIZER = "porter unicode61"  # stemmed, so "replicas" finds "replica"
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "their", "this", "to", "was", "what", "when",
+    "where", "which", "who", "why", "with", "explain", "describe", "define", "discuss", "write", "short",
+    "note", "notes", "briefly", "list", "give", "between", "about",
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    UNIQUE (subject, filename)
+);
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    page INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sentences_file ON sentences (file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS file_fts USING fts5(text, tokenize='{TOKENIZER}');
+CREATE VIRTUAL TABLE IF NOT EXISTS sentence_fts USING fts5(text, tokenize='{TOKENIZER}');
+"""
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def match_query(text, mode="any"):
+    """
+    FTS5 query for free text: its non-stopword terms, quoted so punctuation
+    can't be read as query syntax, joined with OR ("any") or AND ("all").
+    Returns "" when nothing searchable is left.
+    """
+    terms = [t for t in re.findall(r"\w+", text.lower()) if t not in STOPWORDS and len(t) > 1]
+    terms = list(dict.fromkeys(terms))
+    return f" {'OR' if mode == 'any' else 'AND'} ".join(f'"{t}"' for t in terms)
+
+
+class TextIndex:
+    """
+    One SQLite database for all subjects. File rows and sentence rows share
+    their ids with the FTS5 tables (rowid), so BM25 hits join back to
+    subject, filename and page without storing the text twice. The
+    connection is shared between threads behind a lock (the streaming
+    pipeline saves subjects from several extract workers).
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------------
+
+    def _delete_file(self, file_id):
+        cur = self.conn
+        cur.execute("DELETE FROM sentence_fts WHERE rowid IN (SELECT id FROM sentences WHERE file_id = ?)", (file_id,))
+        cur.execute("DELETE FROM sentences WHERE file_id = ?", (file_id,))
+        cur.execute("DELETE FROM file_fts WHERE rowid = ?", (file_id,))
+        cur.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _insert_file(self, subject, file, digest):
+        text = file.get("text", "")
+        cur = self.conn.execute("INSERT INTO files (subject, filename, hash) VALUES (?, ?, ?)",
+                                (subject, file.get("filename", ""), digest))
+        file_id = cur.lastrowid
+        self.conn.execute("INSERT INTO file_fts (rowid, text) VALUES (?, ?)", (file_id, text))
+
+        offsets = file.get("page_offsets") or []
+        rows = []
+        for start, sent in sentence_spans(text):
+            page = bisect.bisect_right(offsets, start) if offsets else 0
+            rows.append((file_id, page, sent))
+        if rows:
+            first = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM sentences").fetchone()[0]
+            ids = range(first, first + len(rows))
+            self.conn.executemany("INSERT INTO sentences (id, file_id, page) VALUES (?, ?, ?)",
+                                  [(i, f, p) for i, (f, p, _) in zip(ids, rows)])
+            self.conn.executemany("INSERT INTO sentence_fts (rowid, text) VALUES (?, ?)",
+                                  [(i, s) for i, (_, _, s) in zip(ids, rows)])
+        return len(rows)
+
+    def update_subject(self, data):
+        """
+        Brings one processed subject ({"subject", "files"}) up to date:
+        new or changed files are (re)indexed, vanished files dropped.
+        Returns (reindexed, removed) filename lists.
+        """
+        subject = data.get("subject", "")
+        with self._lock:
+            return self._update_subject(subject, data.get("files", []))
+
+    def _update_subject(self, subject, files):
+        stored = {name: (file_id, digest) for file_id, name, digest in self.conn.execute(
+            "SELECT id, filename, hash FROM files WHERE subject = ?", (subject,))}
+        names = set()
+        reindexed = []
+        with metrics.span("index.fts_update", items=len(files)), self.conn:
+            for file in files:
+                name = file.get("filename", "")
+                names.add(name)
+                digest = content_hash(file.get("text", ""))
+                if name in stored:
+                    if stored[name][1] == digest:
+                        continue
+                    self._delete_file(stored[name][0])
+                self._insert_file(subject, file, digest)
+                reindexed.append(name)
+            removed = [name for name in stored if name not in names]
+            for name in removed:
+                self._delete_file(stored[name][0])
+        return reindexed, removed
+
+    def subjects(self):
+        return [row[0] for row in self._query("SELECT DISTINCT subject FROM files ORDER BY subject", ())]
+
+    def _query(self, sql, args):
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    # ------------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------------
+
+    def search_files(self, query, subject=None, top_n=5, mode="any"):
+        """[{"filename", "subject", "score"}], best first; score is -BM25 (higher is better)."""
+        q = match_query(query, mode)
+        if not q:
+            return []
+        sql = ("SELECT f.filename, f.subject, -bm25(file_fts) AS score FROM file_fts "
+               "JOIN files f ON f.id = file_fts.rowid WHERE file_fts MATCH ?")
+        args = [q]
+        if subject:
+            sql += " AND f.subject = ?"
+            args.append(subject)
+        sql += " ORDER BY bm25(file_fts) LIMIT ?"
+        args.append(top_n)
+        with metrics.span("search.fts"):
+            rows = self._query(sql, args)
+        return [{"filename": f, "subject": s, "score": score} for f, s, score in rows]
+
+    def search_sentences(self, query, subject=None, filename=None, top_n=10, mode="any", phrase=False):
+        """
+        [{"sentence", "filename", "subject", "page", "score"}], best first.
+        With phrase=True the query is matched as one exact (stemmed) phrase.
+        """
+        if phrase:
+            terms = re.findall(r"\w+", query.lower())
+            q = '"' + " ".join(terms) + '"' if terms else ""
+        else:
+            q = match_query(query, mode)
+        if not q:
+            return []
+        sql = ("SELECT sentence_fts.text, f.filename, f.subject, s.page, -bm25(sentence_fts) AS score "
+               "FROM sentence_fts JOIN sentences s ON s.id = sentence_fts.rowid "
+               "JOIN files f ON f.id = s.file_id WHERE sentence_fts MATCH ?")
+        args = [q]
+        if subject:
+            sql += " AND f.subject = ?"
+            args.append(subject)
+        if filename:
+            sql += " AND f.filename = ?"
+            args.append(filename)
+        sql += " ORDER BY bm25(sentence_fts) LIMIT ?"
+        args.append(top_n)
+        with metrics.span("search.fts"):
+            rows = self._query(sql, args)
+        return [{"sentence": t, "filename": f, "subject": s, "page": p, "score": score}
+                for t, f, s, p, score in rows]
+
+
+_INDEXES = {}
+
+
+def get_text_index(path=INDEX_PATH):
+    """Shared TextIndex per database path."""
+    index = _INDEXES.get(path)
+    if index is None:
+        index = _INDEXES[path] = TextIndex(path)
+    return index
+
+
+def index_all_subjects(processed_dir=PROCESSED_DIR, path=INDEX_PATH):
+    index = get_text_index(path)
+    for json_path in sorted(glob.glob(os.path.join(processed_dir, "*.json"))):
+        if json_path.endswith(DERIVED_SUFFIXES):
+            continue
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        reindexed, removed = index.update_subject(data)
+        print(f"🔎 {data.get('subject')}: {len(reindexed)} files indexed, {len(removed)} removed")
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        subject = sys.argv[2] if len(sys.argv) > 2 else None
+        for hit in get_text_index().search_sentences(sys.argv[1], subject):
+            print(f"{hit['score']:6.2f}  {hit['filename']} p{hit['page']}: {hit['sentence']}")
+    else:
+        index_all_subjects()
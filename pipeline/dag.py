@@ -0,0 +1,231 @@
+# pipeline/dag.py
+import os
+import json
+import glob
+import time
+import runpy
+import hashlib
+from utils.file_utils import save_json
+
+STATE_PATH = "data/pipeline_state.json"
+PROCESSED_DIR = "data/processed_text"
+DERIVED_SUFFIXES = ("_keywords.json", "_model.json")  # per-subject files that live next to the extracts
+
+
+def _files(pattern, recursive=False):
+    return sorted(p for p in glob.glob(pattern, recursive=recursive) if os.path.isfile(p))
+
+
+def processed_subjects():
+    return [p for p in _files(os.path.join(PROCESSED_DIR, "*.json")) if not p.endswith(DERIVED_SUFFIXES)]
+
+
+class FileHasher:
+    """sha1 of file contents, re-hashed only when size or mtime changed."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+
+    def digest(self, path):
+        st = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self.cache[path] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return self.cache[path][2]
+
+    def fingerprint(self, paths):
+        """One hash over (path, content hash) of every file; None when there are no files."""
+        if not paths:
+            return None
+        h = hashlib.sha1()
+        for path in paths:
+            h.update(path.replace(os.sep, "/").encode("utf-8"))
+            h.update(self.digest(path).encode("ascii"))
+        return h.hexdigest()
+
+
+class Stage:
+    """
+    One build step: `inputs()` / `outputs()` list the files it reads and
+    writes, `run()` does the work. External stages (crawl) have no local
+    inputs, so they are only considered stale when their outputs are missing.
+    """
+
+    def __init__(self, name, run, inputs=None, outputs=None, deps=(), external=False, description=""):
+        self.name = name
+        self.run = run
+        self.inputs = inputs or (lambda: [])
+        self.outputs = outputs or (lambda: [])
+        self.deps = tuple(deps)
+        self.external = external
+        self.description = description
+
+
+# --- stage actions (imported lazily: most of them load models) ---
+
+def _crawl():
+    from crawler.lms_scraper import scrape_lms
+    scrape_lms()
+
+def _download():
+    from crawler.material_downloader import download_materials
+    download_materials()
+
+def _extract():
+    from extractor.content_formatter import process_all_materials
+    process_all_materials()
+
+def _keypoints():
+    from nlp_analysis.keypoint_extractor import generate_keypoints
+    generate_keypoints()
+
+def _knowledge_graph():
+    from answer_evaluator.generate_keywords import process_all_subjects
+    process_all_subjects(PROCESSED_DIR, "./output", n_process=max(1, min(4, os.cpu_count() or 1)))
+
+def _model_answers():
+    from answer_evaluator.generate_model_answers import generate_model_answers
+    for path in _files(os.path.join(PROCESSED_DIR, "*_keywords.json")):
+        generate_model_answers(path, path[:-len("_keywords.json")] + "_model.json")
+
+def _llm_keypoints():
+    runpy.run_path(os.path.join("keypoint_model", "keypoint_generator_local.py"), run_name="__main__")
+
+
+STAGES = [
+    Stage("crawl", _crawl, outputs=lambda: _files("data/raw_lms_data.json"), external=True,
+          description="course list from the LMS"),
+    Stage("download", _download, deps=["crawl"],
+          inputs=lambda: _files("data/raw_lms_data.json"),
+          outputs=lambda: _files("data/materials/**/*", recursive=True),
+          description="course materials"),
+    Stage("extract", _extract, deps=["download"],
+          inputs=lambda: _files("data/materials/**/*", recursive=True),
+          outputs=processed_subjects,
+          description="processed text per subject"),
+    Stage("keypoints", _keypoints, deps=["extract"],
+          inputs=processed_subjects, outputs=lambda: _files("data/keypoints.json"),
+          description="embedding keypoints"),
+    Stage("knowledge_graph", _knowledge_graph, deps=["extract"],
+          inputs=processed_subjects, outputs=lambda: _files("output/knowledge_graph_store.json"),
+          description="keywords and relations per subject"),
+    Stage("model_answers", _model_answers, deps=["extract"],
+          inputs=lambda: _files(os.path.join(PROCESSED_DIR, "*_keywords.json")),
+          outputs=lambda: _files(os.path.join(PROCESSED_DIR, "*_model.json")),
+          description="extractive model answers"),
+    Stage("llm_keypoints", _llm_keypoints, deps=["extract"],
+          inputs=processed_subjects, outputs=lambda: _files("outputs/keypoints_*.json"),
+          description="LLM keypoints per question"),
+]
+
+
+class BuildGraph:
+    """
+    The pipeline stages with the input/output fingerprints of their last
+    successful run, kept in data/pipeline_state.json. A stage is stale when
+    its inputs or outputs differ from that run, or an upstream stage is stale.
+    """
+
+    def __init__(self, stages=STAGES, state_path=STATE_PATH):
+        self.stages = {s.name: s for s in stages}
+        self.order = [s.name for s in stages]  # already topological
+        self.state_path = state_path
+        self.state = {"stages": {}, "hashes": {}}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        self.hasher = FileHasher(self.state.setdefault("hashes", {}))
+
+    def save(self):
+        save_json(self.state, self.state_path)
+
+    def _own_reason(self, stage):
+        """Why a stage is stale on its own account, or None if up to date."""
+        record = self.state["stages"].get(stage.name)
+        if not stage.external and not stage.inputs():
+            return None  # nothing to build from
+        outputs = stage.outputs()
+        if not outputs:
+            return "outputs missing"
+        if stage.external:
+            return None
+        if record is None:
+            return "never built"
+        if self.hasher.fingerprint(stage.inputs()) != record["inputs"]:
+            return "inputs changed"
+        if self.hasher.fingerprint(outputs) != record["outputs"]:
+            return "outputs changed"
+        return None
+
+    def status(self):
+        """{stage: reason or None}, propagating staleness downstream."""
+        reasons = {}
+        for name in self.order:
+            stage = self.stages[name]
+            reason = self._own_reason(stage)
+            if reason is None:
+                stale_deps = [d for d in stage.deps if reasons.get(d)]
+                if stale_deps:
+                    reason = f"upstream stale ({', '.join(stale_deps)})"
+            reasons[name] = reason
+        return reasons
+
+    def record(self, name):
+        """Stores the current fingerprints of a stage after it ran."""
+        stage = self.stages[name]
+        self.state["stages"][name] = {
+            "inputs": self.hasher.fingerprint(stage.inputs()),
+            "outputs": self.hasher.fingerprint(stage.outputs()),
+            "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.save()
+
+    def run_stage(self, name):
+        """Runs one stage unconditionally and records it."""
+        start = time.perf_counter()
+        self.stages[name].run()
+        self.record(name)
+        print(f"✅ {name} done in {time.perf_counter() - start:.1f}s")
+
+    def _upstream(self, target):
+        needed, todo = set(), [target]
+        while todo:
+            name = todo.pop()
+            if name not in needed:
+                needed.add(name)
+                todo += self.stages[name].deps
+        return needed
+
+    def build(self, target=None, force=False):
+        """Runs the stale stages (all of them, or those `target` depends on) in order."""
+        if target is not None and target not in self.stages:
+            raise ValueError(f"Unknown stage: {target} (choose from {', '.join(self.order)})")
+        wanted = self._upstream(target) if target else set(self.order)
+        for name in self.order:
+            if name not in wanted:
+                continue
+            reason = "forced" if force else self.status()[name]
+            if reason is None:
+                print(f"⏭️ {name}: up to date")
+                continue
+            print(f"▶️ {name}: {reason}")
+            self.run_stage(name)
+
+    def print_status(self):
+        reasons = self.status()
+        print(f"{'stage':<16} {'state':<40} {'last built':<20} description")
+        for name in self.order:
+            record = self.state["stages"].get(name, {})
+            if reasons[name]:
+                state = f"stale: {reasons[name]}"
+            elif not self.stages[name].external and not self.stages[name].inputs():
+                state = "no inputs"
+            else:
+                state = "up to date"
+            print(f"{name:<16} {state:<40} {record.get('built_at', '-'):<20} {self.stages[name].description}")
+        self.save()  # keep the refreshed content hashes
@@ -0,0 +1,206 @@
+# pipeline/streaming.py
+import os
+import time
+import queue
+import threading
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from utils import metrics, profiling
+
+QUEUE_SIZE = 16                          # bounded queues give back-pressure between stages
+DOWNLOAD_WORKERS = 4
+EXTRACT_WORKERS = os.cpu_count() or 1
+KEYPOINT_WORKERS = 1                     # one embedding model in memory
+
+DONE = object()  # end-of-stream marker
+
+
+class StageStats:
+    """Busy time and item counts per stage, shared by all worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.busy = {}
+        self.items = {}
+
+    def record(self, stage, seconds, items=1):
+        with self._lock:
+            self.busy[stage] = self.busy.get(stage, 0.0) + seconds
+            self.items[stage] = self.items.get(stage, 0) + items
+
+    def report(self, wall):
+        print(f"\n{'stage':<12} {'items':>6} {'busy s':>8}")
+        for stage, busy in self.busy.items():
+            print(f"{stage:<12} {self.items[stage]:>6} {busy:>8.1f}")
+        print(f"{'wall clock':<12} {'':>6} {wall:>8.1f}  (sequential would be ~{sum(self.busy.values()):.1f})")
+
+
+def start_stage(name, inbox, handle, workers, outbox=None, out_workers=1):
+    """
+    Runs `handle(item)` on `workers` threads reading from `inbox` until DONE.
+    When every worker has stopped, DONE is forwarded to the `out_workers`
+    consumers of `outbox`. Returns the joiner thread.
+    """
+    def work():
+        while True:
+            item = inbox.get()
+            if item is DONE:
+                break
+            try:
+                handle(item)
+            except Exception as e:
+                print(f"❌ {name} failed on {item!r}: {e}")
+
+    threads = [threading.Thread(target=work, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+    for t in threads:
+        t.start()
+
+    def join():
+        for t in threads:
+            t.join()
+        if outbox is not None:
+            for _ in range(out_workers):
+                outbox.put(DONE)
+
+    joiner = threading.Thread(target=join, name=f"{name}-join", daemon=True)
+    joiner.start()
+    return joiner
+
+
+class SubjectTracker:
+    """
+    Collects extracted files per subject and says when a subject is complete:
+    the downloader has closed it and every file it announced has come back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._files = {}
+        self._closed = set()
+
+    def expect(self, subject):
+        with self._lock:
+            self._pending[subject] = self._pending.get(subject, 0) + 1
+
+    def _complete(self, subject):
+        if subject in self._closed and not self._pending.get(subject):
+            self._closed.discard(subject)
+            self._pending.pop(subject, None)
+            return self._files.pop(subject, [])
+        return None
+
+    def add(self, subject, entry):
+        """Returns the subject's files if this was its last one, else None."""
+        with self._lock:
+            self._pending[subject] -= 1
+            if entry is not None:
+                self._files.setdefault(subject, []).append(entry)
+            return self._complete(subject)
+
+    def close(self, subject):
+        with self._lock:
+            self._closed.add(subject)
+            return self._complete(subject)
+
+
+def _default_downloader(on_file, on_subject_done):
+    from crawler.material_downloader import download_materials
+    download_materials(on_file=on_file, on_subject_done=on_subject_done, workers=DOWNLOAD_WORKERS)
+
+
+def _default_keypoints(subject, data):
+    # imported lazily: loads the embedding model
+    from nlp_analysis.keypoint_extractor import subject_keypoints, update_keypoints
+    top = subject_keypoints(data)
+    update_keypoints(subject, top)
+    print(f"Generated {len(top)} keypoints for subject {subject}")
+
+
+def run_streaming(downloader=_default_downloader, extract=None, keypoints=_default_keypoints,
+                  extract_workers=EXTRACT_WORKERS, keypoint_workers=KEYPOINT_WORKERS, queue_size=QUEUE_SIZE):
+    """
+    download -> extract -> keypoints, connected by bounded queues.
+
+    `downloader(on_file, on_subject_done)` reports files as they land; each
+    file is extracted by a process pool right away; when a subject's last
+    file is extracted its processed JSON is written and its keypoints are
+    generated while the other stages keep going.
+    """
+    from extractor.content_formatter import extract_entry, save_subject, subject_doc
+
+    extract = extract or extract_entry
+    files_q = queue.Queue(queue_size)
+    subjects_q = queue.Queue(queue_size)
+    tracker = SubjectTracker()
+    stats = StageStats()
+    start = time.perf_counter()
+
+    def on_file(subject, path):
+        stats.record("download", 0.0)
+        tracker.expect(subject)
+        files_q.put((subject, path))
+
+    def on_subject_done(subject):
+        files_q.put((subject, None))
+
+    # workers time their extractor spans and send them back with each entry; profiled
+    # runs extract in the stage threads instead, since child processes aren't profiled
+    if profiling.active():
+        executor = contextlib.nullcontext()
+    else:
+        executor = ProcessPoolExecutor(extract_workers, initializer=metrics.init_worker,
+                                       initargs=(metrics.enabled(),))
+    with executor as pool:
+        def handle_file(item):
+            subject, path = item
+            if path is None:
+                files = tracker.close(subject)
+            else:
+                t0 = time.perf_counter()
+                entry = None
+                try:
+                    if pool is None:
+                        entry = extract(path)
+                    else:
+                        entry, spans = pool.submit(metrics.collected, extract, path).result()
+                        metrics.merge(spans)
+                except Exception as e:
+                    print(f"❌ Extraction failed for {path}: {e}")
+                stats.record("extract", time.perf_counter() - t0)
+                files = tracker.add(subject, entry)
+            if files == []:
+                print(f"⚠️ No files extracted for {subject}, skipping it.")
+            elif files is not None:
+                # files arrive in download-completion order; keypoints get the saved order
+                doc = subject_doc(subject, files)
+                save_subject(subject, doc["files"])
+                subjects_q.put((subject, doc))
+
+        def handle_subject(item):
+            t0 = time.perf_counter()
+            keypoints(*item)
+            stats.record("keypoints", time.perf_counter() - t0)
+
+        extract_stage = start_stage("extract", files_q, handle_file, extract_workers, subjects_q, keypoint_workers)
+        keypoint_stage = start_stage("keypoints", subjects_q, handle_subject, keypoint_workers)
+
+        t0 = time.perf_counter()
+        try:
+            downloader(on_file, on_subject_done)
+        finally:
+            stats.record("download", time.perf_counter() - t0, items=0)
+            for _ in range(extract_workers):
+                files_q.put(DONE)
+            extract_stage.join()
+            keypoint_stage.join()
+
+    stats.report(time.perf_counter() - start)
+    return stats
+
+
+def run_all_streaming():
+    """`python main.py all`: crawl first, then the streaming download/extract/keypoints pipeline."""
+    from crawler.lms_scraper import scrape_lms
+    scrape_lms()
+    run_streaming()
@@ -1,19 +1,36 @@
+import os
+import sys
 import nltk
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
 from nltk.util import ngrams
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy.optimize import linear_sum_assignment
+from collections import OrderedDict
+import numpy as np
+import hashlib
 import re
 
-# Download necessary data silently
-nltk.download("punkt", quiet=True)
-nltk.download("punkt_tab", quiet=True)
-nltk.download("averaged_perceptron_tagger", quiet=True)
-nltk.download("stopwords", quiet=True)
+# the shared utils package lives at the repo root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from utils import metrics
+
+# Download necessary data silently, only when it is not installed yet
+for resource, package in (("tokenizers/punkt", "punkt"), ("tokenizers/punkt_tab", "punkt_tab"),
+                          ("taggers/averaged_perceptron_tagger", "averaged_perceptron_tagger"),
+                          ("corpora/stopwords", "stopwords")):
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        nltk.download(package, quiet=True)
 
 model = SentenceTransformer("all-MiniLM-L6-v2")
 stop_words = set(stopwords.words("english"))
+SIM_THRESHOLD = 0.55  # minimum cosine similarity for a reference sentence to count as covered
 
 
 def extract_concepts(reference_text):
@@ -37,87 +54,162 @@ def extract_concepts(reference_text):
     return key_concepts
 
 
-def get_context_explanation(concept, reference_text):
-    """Find short context snippet from reference where concept occurs."""
-    sentences = sent_tokenize(reference_text)
-    related = [s for s in sentences if concept.lower() in s.lower()]
-    if not related:
-        return "no detailed context found"
-    snippet = related[0]
+def _short_snippet(sentence):
     # Clean & shorten to about 8–12 words
-    snippet = re.sub(r"\s+", " ", snippet)
+    snippet = re.sub(r"\s+", " ", sentence)
     words = snippet.split()
     if len(words) > 12:
         snippet = " ".join(words[:12]) + "..."
     return snippet
 
 
-def evaluate_answer(reference, student):
-    ref_sentences = list(dict.fromkeys(sent_tokenize(reference)))
-    stud_sentences = list(dict.fromkeys(sent_tokenize(student)))
-
-    ref_embeddings = model.encode(ref_sentences, convert_to_tensor=True)
-    stud_embeddings = model.encode(stud_sentences, convert_to_tensor=True)
-
-    covered, missing = [], []
-    used = set()
+class ReferenceProfile:
+    """
+    Everything evaluate_answer needs from a reference answer, computed once:
+    sentences, their embeddings, key concepts and the first reference
+    sentence mentioning each concept.
+    """
+
+    def __init__(self, reference):
+        self.reference = reference
+        self.sentences = list(dict.fromkeys(sent_tokenize(reference)))
+        with metrics.span("embed.encode", items=len(self.sentences)):
+            self.embeddings = model.encode(self.sentences, convert_to_numpy=True, normalize_embeddings=True)
+        self.concepts = extract_concepts(reference)
+        self.concept_sentence = {}
+        for concept in self.concepts:
+            for sent in self.sentences:
+                if concept.lower() in sent.lower():
+                    self.concept_sentence[concept] = sent.strip()
+                    break
 
-    for i, ref in enumerate(ref_sentences):
-        sim_scores = util.cos_sim(ref_embeddings[i], stud_embeddings)[0]
-        best_idx = int(sim_scores.argmax())
-        best_score = float(sim_scores[best_idx])
+    def context_explanation(self, concept):
+        """Short snippet of the first reference sentence mentioning the concept."""
+        sentence = self.concept_sentence.get(concept)
+        if sentence is None:
+            sentence = next((s for s in self.sentences if concept.lower() in s.lower()), None)
+        if sentence is None:
+            return "no detailed context found"
+        return _short_snippet(sentence)
+
+
+PROFILE_CACHE_SIZE = 256
+_profile_cache = OrderedDict()
+
+
+def get_reference_profile(reference):
+    """Returns the cached ReferenceProfile for a reference text (keyed by its hash)."""
+    key = hashlib.sha1(reference.encode("utf-8")).hexdigest()
+    profile = _profile_cache.get(key)
+    if profile is None:
+        profile = ReferenceProfile(reference)
+        _profile_cache[key] = profile
+        if len(_profile_cache) > PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+    else:
+        _profile_cache.move_to_end(key)
+    return profile
 
-        if best_idx not in used and best_score > 0.55:
-            covered.append((ref, round(best_score, 3)))
-            used.add(best_idx)
-        else:
-            missing.append((ref, round(best_score, 3)))
 
-    marks = round((len(covered) / len(ref_sentences)) * 10, 2)
+def get_context_explanation(concept, reference_text):
+    """Find short context snippet from reference where concept occurs."""
+    return get_reference_profile(reference_text).context_explanation(concept)
+
+
+def match_sentences(sim_matrix, threshold=SIM_THRESHOLD):
+    """
+    Optimal one-to-one matching of reference rows to student columns.
+    Only pairs above `threshold` can be matched. Marks count matched
+    sentences, so the Hungarian algorithm first maximises the number of
+    matches and only then their total similarity: every eligible pair is
+    worth a bonus larger than any possible similarity sum. The result does
+    not depend on the order of the reference sentences.
+    Returns {ref_idx: stud_idx} for matched reference sentences.
+    """
+    if sim_matrix.size == 0:
+        return {}
+    bonus = min(sim_matrix.shape) + 1
+    weights = np.where(sim_matrix > threshold, bonus + sim_matrix, 0.0)
+    rows, cols = linear_sum_assignment(weights, maximize=True)
+    return {int(r): int(c) for r, c in zip(rows, cols) if weights[r, c] > 0}
+
+
+@metrics.timed("grading.evaluate_answer")
+def evaluate_answer(reference, student, threshold=SIM_THRESHOLD):
+    """
+    Scores a student answer against a reference answer and returns a result dict.
+    `reference` may be the reference text or its ReferenceProfile; the profile is
+    cached, so grading many students on one question only prepares it once.
+    """
+    profile = reference if isinstance(reference, ReferenceProfile) else get_reference_profile(reference)
+    ref_sentences = profile.sentences
+    stud_sentences = list(dict.fromkeys(sent_tokenize(student)))
 
-    # ✅ Automatically detect key concepts
-    key_concepts = extract_concepts(reference)
+    if stud_sentences:
+        with metrics.span("embed.encode", items=len(stud_sentences)):
+            stud_embeddings = model.encode(stud_sentences, convert_to_numpy=True, normalize_embeddings=True)
+        sim_matrix = profile.embeddings @ stud_embeddings.T  # (n_ref, n_stud) cosine similarities
+    else:
+        sim_matrix = np.zeros((len(ref_sentences), 0), dtype=np.float32)
 
-    missing_concepts = [kc for kc in key_concepts if kc.lower() not in student.lower()]
-    covered_concepts = [kc for kc in key_concepts if kc.lower() in student.lower()]
+    matches = match_sentences(sim_matrix, threshold)
+    best_scores = sim_matrix.max(axis=1) if sim_matrix.shape[1] else np.zeros(len(ref_sentences))
 
-    # --- Print output ---
+    covered, missing = [], []
+    for i, ref in enumerate(ref_sentences):
+        if i in matches:
+            j = matches[i]
+            covered.append({"reference": ref, "student": stud_sentences[j], "similarity": round(float(sim_matrix[i, j]), 3)})
+        else:
+            missing.append({"reference": ref, "similarity": round(float(best_scores[i]), 3)})
+
+    marks = round((len(covered) / len(ref_sentences)) * 10, 2) if ref_sentences else 0.0
+
+    # ✅ Key concepts come precomputed with the reference profile
+    student_lower = student.lower()
+    missing_concepts = [kc for kc in profile.concepts if kc.lower() not in student_lower]
+    covered_concepts = [kc for kc in profile.concepts if kc.lower() in student_lower]
+
+    suggestions = []
+    for concept in missing_concepts:
+        # short contextual snippet from the reference, or a fallback
+        context_snippet = profile.concept_sentence.get(concept) or f"This concept relates to {concept} in the topic."
+        suggestions.append(f"You missed mentioning '{concept}', which relates to: {context_snippet}")
+
+    return {
+        "score": marks,
+        "covered": covered,
+        "missing": missing,
+        "covered_concepts": covered_concepts,
+        "missing_concepts": [
+            {"concept": c, "context": profile.context_explanation(c)} for c in missing_concepts
+        ],
+        "suggestions": suggestions,
+    }
+
+
+def print_report(result):
+    """Prints an evaluate_answer result in the console format."""
     print("\n" + "=" * 70)
     print("✅ Points Covered:")
-    for i, (text, score) in enumerate(covered, 1):
-        print(f"{i}. {text} (similarity: {score})")
+    for i, item in enumerate(result["covered"], 1):
+        print(f"{i}. {item['reference']} (similarity: {item['similarity']})")
 
     print("\n❌ Concepts Missed (with brief context):")
-    if missing_concepts:
-        for i, concept in enumerate(missing_concepts, 1):
-            explanation = get_context_explanation(concept, reference)
-            print(f"{i}. {concept} → {explanation}")
+    if result["missing_concepts"]:
+        for i, item in enumerate(result["missing_concepts"], 1):
+            print(f"{i}. {item['concept']} → {item['context']}")
     else:
         print("All main concepts covered!")
 
-        print("\n💡 What to Add More:")
-    if missing_concepts:
-        for concept in missing_concepts:
-            # find short contextual snippet from the reference
-            context_snippet = ""
-            for sent in sent_tokenize(reference):
-                if concept.lower() in sent.lower():
-                    context_snippet = sent.strip()
-                    break
-
-            # fallback if no direct context found
-            if not context_snippet:
-                context_snippet = f"This concept relates to {concept} in the topic."
-
-            # make a natural one-line suggestion dynamically
-            suggestion = f"You missed mentioning '{concept}', which relates to: {context_snippet}"
-
+    print("\n💡 What to Add More:")
+    if result["suggestions"]:
+        for suggestion in result["suggestions"]:
             print(f"- {suggestion}")
     else:
         print("No additional points needed — great coverage!")
 
-
-    print(f"\n🏁 Final Score: {marks} / 10")
+    print(f"\n🏁 Final Score: {result['score']} / 10")
     print("=" * 70 + "\n")
 
 
@@ -127,4 +219,4 @@ if __name__ == "__main__":
 
     student = """Distributed computing involves multiple machines working together to solve problems, improving scalability and fault tolerance. Frameworks like Hadoop and Spark use parallel processing for big data, while handling communication through message passing. Challenges include network delays, data consistency, and system failures that need careful management."""
 
-    evaluate_answer(reference, student)
+    print_report(evaluate_answer(reference, student))
@@ -1,50 +1,261 @@
-# pipeline_connect.py
-import subprocess
-import importlib.util
-import sys
-import test
-import os
+# qna_system/main_pipeline.py
+"""
+In-process answer evaluation: recognize → reference → evaluate.
 
+    with EvaluationPipeline(references={"What is HDFS?": "..."}) as pipe:
+        results = pipe.run([("s1.jpeg", "What is HDFS?"), ("s2.jpeg", "What is HDFS?")])
 
-import os
-os.chdir(os.path.dirname(__file__))  # switch to qna_system folder
+Handwriting is recognized for all images at once by the pooled async
+client, reference answers come from `references` / `default_reference`
+or are generated by the local QnA model (generate=True), and grading
+calls evaluate_answer directly. Texts stay in memory, and the HTR
+connection pool, the embedding model, the QnA scheduler and the
+per-reference profiles stay open / loaded for the life of the pipeline,
+so later run() calls only pay for the new work.
 
+    python qna_system/main_pipeline.py                      # Evaluate.jpeg vs reference_answer.txt
+    python qna_system/main_pipeline.py pairs.json [--generate] [--out results.json]
 
-# Step 1: Run test.py and get student answer
-print("📤 Getting student's written answer from test.py ...")
+pairs.json is a list of {"image": ..., "question": ..., "reference": optional};
+image paths are relative to the pairs file.
+"""
+import os
 import sys
-subprocess.run([sys.executable, "test.py"], check=True)
+import time
+import asyncio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from utils import metrics
+from utils.file_utils import load_json, save_json
+from utils.ocr_utils import HandwritingClient, HTR_URL, CONCURRENCY
+
+QNA_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGE_PATH = os.path.join(QNA_DIR, "Evaluate.jpeg")
+REFERENCE_PATH = os.path.join(QNA_DIR, "reference_answer.txt")
+STEPS = ("recognize", "reference", "evaluate")
+
+
+class EvaluationPipeline:
+    def __init__(self, references=None, default_reference=None, generate=False, htr_url=HTR_URL,
+                 concurrency=CONCURRENCY, threshold=None):
+        self.references = dict(references or {})
+        self.default_reference = default_reference
+        self.generate = generate
+        self.htr_url = htr_url
+        self.concurrency = concurrency
+        self.threshold = threshold
+        self._grader = None
+        self._scheduler = None
+        self._loop = None
+        self._client = None
+        self.last_timings = {}
+        self.reference_errors = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        """Closes the HTR connections and stops the QnA scheduler thread."""
+        if self._client is not None:
+            self._loop.run_until_complete(self._client.__aexit__(None, None, None))
+            self._client = None
+        if self._loop is not None:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self._loop = None
+        if self._scheduler is not None:
+            self._scheduler.stop()
+            self._scheduler = None
+
+    @property
+    def grader(self):
+        """qna_system.evaluate_answer, imported once (loads the embedding model)."""
+        if self._grader is None:
+            from qna_system import evaluate_answer
+            self._grader = evaluate_answer
+        return self._grader
+
+    # ── Step 1: recognize ────────────────────────────────────────────────
+    def recognize(self, images):
+        """
+        [(text or exception, seconds)] for every image, recognized concurrently.
+        The client and its event loop are created on first use and reused by
+        later calls, so pooled connections stay open between runs.
+        """
+        if self._client is None:
+            self._loop = asyncio.new_event_loop()
+            self._client = self._loop.run_until_complete(
+                HandwritingClient(self.htr_url, concurrency=self.concurrency).__aenter__())
+
+        async def one(image):
+            start = time.perf_counter()
+            try:
+                text = (await self._client.recognize(image)).strip()
+            except Exception as e:
+                text = e
+            return text, time.perf_counter() - start
+
+        async def run():
+            return await asyncio.gather(*(one(image) for image in images))
+        return self._loop.run_until_complete(run())
+
+    # ── Step 2: reference ────────────────────────────────────────────────
+    def _load_scheduler(self):
+        if self._scheduler is None:
+            from qna_system.qna import load_scheduler
+            print("🤖 Loading local QnA model for reference answers...")
+            self._scheduler = load_scheduler().start()
+        return self._scheduler
+
+    def prepare_references(self, questions):
+        """
+        Makes sure every question has a reference answer. Missing ones are
+        generated in one go (the scheduler batches them) when generate=True;
+        returns {question: seconds until its answer was ready}. Questions
+        whose generation failed are left out and their exception is kept in
+        `reference_errors` (they are retried on the next call).
+        """
+        self.reference_errors = {}
+        missing = [q for q in dict.fromkeys(questions) if q and q not in self.references]
+        if not missing or not self.generate:
+            return {}
+        from qna_system.qna import build_prompt
+        from utils.stopping_criteria import qna_stop_condition
+        scheduler = self._load_scheduler()
+        start = time.perf_counter()
+        requests = [(q, scheduler.submit(build_prompt(q), stop_condition=qna_stop_condition())) for q in missing]
+        seconds = {}
+        for question, request in requests:
+            try:
+                self.references[question] = request.result().strip()
+            except Exception as e:
+                self.reference_errors[question] = e
+            seconds[question] = time.perf_counter() - start
+        return seconds
+
+    def reference_for(self, question):
+        reference = self.references.get(question, self.default_reference)
+        if not reference:
+            raise KeyError(f"No reference answer for question: {question!r}")
+        return reference
+
+    # ── Step 3: evaluate ─────────────────────────────────────────────────
+    def evaluate(self, reference, student):
+        if self.threshold is None:
+            return self.grader.evaluate_answer(reference, student)
+        return self.grader.evaluate_answer(reference, student, self.threshold)
+
+    # ── All steps ────────────────────────────────────────────────────────
+    def run(self, pairs):
+        """
+        Grades (image, question) or (image, question, reference) pairs and
+        returns one dict per pair with the texts, the evaluate_answer result
+        (or an error) and per-step timings in seconds.
+        """
+        pairs = [tuple(p) for p in pairs]
+        for image, question, *rest in pairs:
+            if rest and rest[0]:
+                self.references.setdefault(question, rest[0])
+
+        start = time.perf_counter()
+        with metrics.span("pipeline.recognize", items=len(pairs)):
+            recognized = self.recognize([p[0] for p in pairs])
+        totals = {"recognize": time.perf_counter() - start}
+
+        start = time.perf_counter()
+        with metrics.span("pipeline.reference", items=len(pairs)):
+            generated_s = self.prepare_references([p[1] for p in pairs])
+        totals["reference"] = time.perf_counter() - start
+
+        results = []
+        evaluate_start = time.perf_counter()
+        for (image, question, *_), (student, recognize_s) in zip(pairs, recognized):
+            item = {"image": image if isinstance(image, str) else None, "question": question,
+                    "student_answer": None, "reference_answer": None, "result": None, "error": None,
+                    "timings": {"recognize": round(recognize_s, 3),
+                                "reference": round(generated_s.get(question, 0.0), 3),
+                                "evaluate": 0.0}}
+            results.append(item)
+            if isinstance(student, Exception):
+                item["error"] = f"recognize: {student}"
+                continue
+            item["student_answer"] = student
+            if question in self.reference_errors:
+                item["error"] = f"reference: {self.reference_errors[question]}"
+                continue
+            try:
+                item["reference_answer"] = self.reference_for(question)
+            except KeyError as e:
+                item["error"] = f"reference: {e.args[0]}"
+                continue
+            start = time.perf_counter()
+            try:
+                with metrics.span("pipeline.evaluate"):
+                    item["result"] = self.evaluate(item["reference_answer"], student)
+            except Exception as e:
+                item["error"] = f"evaluate: {e}"
+            item["timings"]["evaluate"] = round(time.perf_counter() - start, 3)
+        totals["evaluate"] = time.perf_counter() - evaluate_start
+        self.last_timings = {step: round(s, 3) for step, s in totals.items()}
+        return results
 
 
+def load_pairs(path):
+    """(image, question, reference) tuples from a pairs JSON file."""
+    base = os.path.dirname(os.path.abspath(path))
+    return [(os.path.join(base, p["image"]), p.get("question"), p.get("reference"))
+            for p in load_json(path)]
 
-# test.py saves recognized text in recognized_text.txt
-if not os.path.exists("recognized_text.txt"):
-    print("❌ No recognized_text.txt found! Ensure test.py writes output to file.")
-    sys.exit(1)
 
-with open("recognized_text.txt", "r", encoding="utf-8") as f:
-    student_answer = f.read().strip()
+def print_timings(results, totals):
+    print(f"\n{'image':<28} {'score':>6} " + " ".join(f"{s + ' s':>11}" for s in STEPS))
+    for r in results:
+        name = os.path.basename(r["image"] or "<bytes>")[:28]
+        score = f"{r['result']['score']:.2f}" if r["result"] else "—"
+        print(f"{name:<28} {score:>6} " + " ".join(f"{r['timings'][s]:>11.3f}" for s in STEPS))
+    print(f"{'total (wall)':<28} {'':>6} " + " ".join(f"{totals[s]:>11.3f}" for s in STEPS))
 
-print("\n🧾 Student Answer Loaded Successfully!\n")
 
-# Step 2: Get reference answer (already generated by your QnA system)
-if not os.path.exists("reference_answer.txt"):
-    print("❌ reference_answer.txt not found! Please save QnA output there.")
-    sys.exit(1)
+def main(argv):
+    generate = "--generate" in argv
+    out_path = argv[argv.index("--out") + 1] if "--out" in argv else None
+    args = [a for i, a in enumerate(argv) if not a.startswith("--") and (i == 0 or argv[i - 1] != "--out")]
 
-with open("reference_answer.txt", "r", encoding="utf-8") as f:
-    reference_answer = f.read().strip()
+    default_reference = None
+    if os.path.exists(REFERENCE_PATH):
+        with open(REFERENCE_PATH, "r", encoding="utf-8") as f:
+            default_reference = f.read().strip() or None
+    pairs = load_pairs(args[0]) if args else [(IMAGE_PATH, None, None)]
+    if default_reference is None and not generate and not any(p[2] for p in pairs):
+        print("❌ No reference answers: add them to the pairs file, save QnA output to "
+              "reference_answer.txt or pass --generate.")
+        sys.exit(1)
 
-print("\n📚 Reference Answer Loaded Successfully!\n")
+    print(f"📤 Evaluating {len(pairs)} answer(s) via {HTR_URL} ...")
+    with EvaluationPipeline(default_reference=default_reference, generate=generate) as pipe:
+        results = pipe.run(pairs)
 
-# Step 3: Call evaluate_answer.py to compute similarity
-print("⚖️  Evaluating student's answer...\n")
+    for r in results:
+        print(f"\n🧾 {os.path.basename(r['image'])} — {r['question'] or 'reference_answer.txt'}")
+        if r["error"]:
+            print(f"❌ {r['error']}")
+        else:
+            pipe.grader.print_report(r["result"])
+    print_timings(results, pipe.last_timings)
 
-# Import evaluate_answer dynamically and call the function
-spec = importlib.util.spec_from_file_location("evaluate_answer", "evaluate_answer.py")
-evaluate_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(evaluate_module)
+    if out_path:
+        save_json({"results": results, "timings": pipe.last_timings}, out_path)
+        print(f"\n💾 Saved {out_path}")
+    print("\n🏁 Evaluation Complete.")
+    return results
 
-evaluate_module.evaluate_answer(reference_answer, student_answer)
 
-print("\n🏁 Evaluation Complete.")
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,25 +1,24 @@
 # local_qna.py
-from transformers import AutoModelForCausalLM, AutoTokenizer, TextIteratorStreamer
+import os
+import sys
 import torch
-from threading import Thread
+from transformers import AutoModelForCausalLM, AutoTokenizer
 
-def main():
-    print("🤖 Local QnA Chat — No Internet, No API Keys")
-    print("Type 'exit' to quit.\n")
+# allow `python qna_system/qna.py` to import the shared utils package
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
 
-    # Load small local model
-    torch.set_num_threads(6)
-    model_name = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-        device_map="auto"
-    )
+from utils.batch_generator import BatchGenerationScheduler
+from utils.stopping_criteria import qna_stop_condition
 
-    def generate_response(query):
-        """Generates long, detailed academic-style answers."""
-        base_prompt = f"""
+MODEL_NAME = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+MAX_BATCH_SIZE = 8      # prompts generated together when several users ask at once
+BATCH_WINDOW = 0.05     # seconds to wait for more prompts before starting a batch
+
+
+def build_prompt(query):
+    return f"""
 <|system|>
 You are a knowledgeable and disciplined AI tutor.
 Your task is to write a **single long, well-structured academic answer** for a 10–15 mark university question.
@@ -39,28 +38,44 @@ Your answer must:
 <|assistant|>
 """
 
-        # Prepare input and streamer
-        inputs = tokenizer(base_prompt, return_tensors="pt").to(model.device)
-        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
-        generation_kwargs = dict(
-            **inputs,
-            streamer=streamer,
-            max_new_tokens=1500,  # reduced to prevent runaway loops
-            do_sample=True,
-            temperature=0.6,
-            top_p=0.9,
-            repetition_penalty=1.15,
-            pad_token_id=tokenizer.eos_token_id,
-            eos_token_id=tokenizer.eos_token_id
-        )
-
-        # Generate text in background thread
-        thread = Thread(target=model.generate, kwargs=generation_kwargs)
-        thread.start()
+
+def load_scheduler(model_name=MODEL_NAME, max_batch_size=MAX_BATCH_SIZE, batch_window=BATCH_WINDOW):
+    """Loads the local model and wraps it in a batching scheduler shared by all clients."""
+    torch.set_num_threads(6)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+        device_map="auto"
+    )
+    return BatchGenerationScheduler(
+        model,
+        tokenizer,
+        max_batch_size=max_batch_size,
+        batch_window=batch_window,
+        max_new_tokens=1500,  # hard cap; qna_stop_condition() normally ends generation earlier
+        do_sample=True,
+        temperature=0.6,
+        top_p=0.9,
+        repetition_penalty=1.15,
+        eos_token_id=tokenizer.eos_token_id
+    )
+
+
+def main():
+    print("🤖 Local QnA Chat — No Internet, No API Keys")
+    print("Type 'exit' to quit.\n")
+
+    scheduler = load_scheduler().start()
+
+    def generate_response(query):
+        """Generates long, detailed academic-style answers."""
+        # stop at the final 'Keywords:' line or when the model starts looping
+        request = scheduler.submit(build_prompt(query), stop_condition=qna_stop_condition())
 
         print("\n🧠 Bot:", end=" ", flush=True)
         full_output = ""
-        for new_text in streamer:
+        for new_text in request.stream():
             print(new_text, end="", flush=True)
             full_output += new_text
         print("\n")
@@ -68,19 +83,22 @@ Your answer must:
         return full_output.strip()
 
     # Main chat loop
-    while True:
-        query = input("\nYou: ").strip()
-        if query.lower() in ["exit", "quit"]:
-            print("👋 Exiting chat...")
-            break
-
-        response = generate_response(query)
-
-        # If too short, request continuation safely
-        if len(response) < 500:
-            print("\n🔁 Continuing explanation...\n")
-            response += "\n\nContinue in the same structured manner, completing any missing subtopics."
-            generate_response(response)
+    try:
+        while True:
+            query = input("\nYou: ").strip()
+            if query.lower() in ["exit", "quit"]:
+                print("👋 Exiting chat...")
+                break
+
+            response = generate_response(query)
+
+            # If too short, request continuation safely
+            if len(response) < 500:
+                print("\n🔁 Continuing explanation...\n")
+                response += "\n\nContinue in the same structured manner, completing any missing subtopics."
+                generate_response(response)
+    finally:
+        scheduler.stop()
 
 if __name__ == "__main__":
     print(torch.cuda.is_available())
@@ -0,0 +1,259 @@
+# utils/batch_generator.py
+import time
+import queue
+import threading
+import torch
+from utils import metrics
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+_END = object()
+
+
+class GenerationRequest:
+    """One prompt waiting in (or running through) the batch scheduler."""
+
+    def __init__(self, prompt, max_new_tokens, stop_condition=None):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.stop_condition = stop_condition  # callable(text) -> bool
+        self.token_ids = []
+        self.text = ""
+        self._prefix_offset = 0  # token_ids[_prefix_offset:_read_offset] is already in self.text
+        self._read_offset = 0
+        self.error = None
+        self.submitted_at = time.perf_counter()
+        self.finished_at = None
+        self._chunks = queue.Queue()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def num_tokens(self):
+        return len(self.token_ids)
+
+    def _append_token(self, token_id, tokenizer):
+        """
+        Incremental detokenization: decodes only the tokens not yet emitted,
+        plus the previously emitted chunk as left context (so word-boundary
+        spaces come out right), instead of the whole sequence on every step.
+        """
+        self.token_ids.append(token_id)
+        prefix = tokenizer.decode(self.token_ids[self._prefix_offset:self._read_offset], skip_special_tokens=True)
+        text = tokenizer.decode(self.token_ids[self._prefix_offset:], skip_special_tokens=True)
+        # hold back incomplete multi-byte characters until the next token completes them
+        if len(text) <= len(prefix) or text.endswith("�"):
+            return
+        delta = text[len(prefix):]
+        self.text += delta
+        self._prefix_offset = self._read_offset
+        self._read_offset = len(self.token_ids)
+        self._chunks.put(delta)
+
+    def _finish(self, error=None):
+        if self.done:
+            return
+        self.error = error
+        self.finished_at = time.perf_counter()
+        self._chunks.put(_END)
+        self._done.set()
+
+    def stream(self):
+        """Yields text pieces as they are generated (like TextIteratorStreamer)."""
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _END:
+                break
+            yield chunk
+        if self.error:
+            raise self.error
+
+    def result(self, timeout=None):
+        """Blocks until the request is finished and returns the generated text."""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Generation did not finish in time")
+        if self.error:
+            raise self.error
+        return self.text
+
+
+class _BatchStoppingCriteria(StoppingCriteria):
+    """
+    Tracks every row of a padded batch: feeds new tokens to its request and
+    stops rows individually on EOS, their own token limit or stop condition.
+    Needs a transformers version that accepts per-row stopping (>= 4.39).
+    """
+
+    def __init__(self, requests, tokenizer, eos_token_ids):
+        self.requests = requests
+        self.tokenizer = tokenizer
+        self.eos_token_ids = eos_token_ids
+        self.active = [True] * len(requests)
+
+    def __call__(self, input_ids, scores, **kwargs):
+        last_tokens = input_ids[:, -1].tolist()
+        for i, req in enumerate(self.requests):
+            if not self.active[i]:
+                continue
+            token_id = last_tokens[i]
+            if token_id in self.eos_token_ids:
+                self.active[i] = False
+            else:
+                req._append_token(token_id, self.tokenizer)
+                if req.num_tokens >= req.max_new_tokens:
+                    self.active[i] = False
+                elif req.stop_condition and req.stop_condition(req.text):
+                    self.active[i] = False
+            if not self.active[i]:
+                req._finish()
+        return torch.tensor([not a for a in self.active], dtype=torch.bool, device=input_ids.device)
+
+    def finish_remaining(self):
+        for req in self.requests:
+            req._finish()
+
+
+class BatchGenerationScheduler:
+    """
+    Collects prompts submitted from many threads over a short window and runs
+    them through `model.generate` as one left-padded batch.
+    Each request streams its own output and stops on its own conditions.
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size=8, batch_window=0.05,
+                 max_new_tokens=300, **generation_kwargs):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window  # seconds to wait for more prompts after the first
+        self.max_new_tokens = max_new_tokens
+        self.generation_kwargs = generation_kwargs
+
+        # decoder-only models must be padded on the left for batched generation
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        eos = generation_kwargs.get("eos_token_id", tokenizer.eos_token_id)
+        self._eos_token_ids = set(eos if isinstance(eos, (list, tuple)) else [eos])
+
+        self.stats = {"batches": 0, "requests": 0, "tokens": 0, "max_batch": 0}
+        self._pending = queue.Queue()
+        self._worker = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_pipeline(cls, generator, **kwargs):
+        """Wraps the model and tokenizer of an existing text-generation pipeline."""
+        return cls(generator.model, generator.tokenizer, **kwargs)
+
+    # ------------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------------
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._stopped.clear()
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._pending.put(None)
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------------
+    # Client API
+    # ------------------------------------------------------------------------
+
+    def submit(self, prompt, max_new_tokens=None, stop_condition=None):
+        """Queues a prompt and returns its GenerationRequest immediately."""
+        self.start()
+        request = GenerationRequest(prompt, max_new_tokens or self.max_new_tokens, stop_condition)
+        self._pending.put(request)
+        return request
+
+    def generate(self, prompt, max_new_tokens=None, stop_condition=None):
+        """Blocking helper: submit a prompt and wait for its text."""
+        return self.submit(prompt, max_new_tokens, stop_condition).result()
+
+    def __call__(self, prompt, max_new_tokens=None, stop_condition=None, **kwargs):
+        """Drop-in for a text-generation pipeline call (returns the full text)."""
+        text = self.generate(prompt, max_new_tokens, stop_condition)
+        return [{"generated_text": prompt + text}]
+
+    # ------------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------------
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                req = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is None:
+                self._pending.put(None)  # let the main loop see the stop signal
+                break
+            batch.append(req)
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            first = self._pending.get()
+            if first is None:
+                continue
+            self._generate_batch(self._collect_batch(first))
+
+        # fail anything still queued so callers don't hang
+        while True:
+            try:
+                req = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if req is not None:
+                req._finish(error=RuntimeError("Scheduler stopped"))
+
+    def _generate_batch(self, batch):
+        criteria = _BatchStoppingCriteria(batch, self.tokenizer, self._eos_token_ids)
+        # everything that can raise is inside the try: an exception escaping here would
+        # end the worker thread and leave every caller blocked in result()
+        try:
+            inputs = self.tokenizer(
+                [req.prompt for req in batch], return_tensors="pt", padding=True
+            ).to(self.model.device)
+            with metrics.span("llm.generate", items=len(batch)), torch.inference_mode():
+                self.model.generate(
+                    **inputs,
+                    max_new_tokens=max(req.max_new_tokens for req in batch),
+                    stopping_criteria=StoppingCriteriaList([criteria]),
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    **self.generation_kwargs
+                )
+        except Exception as e:
+            print(f"❌ Batch generation failed: {e}")
+            for req in batch:
+                req._finish(error=e)
+            return
+
+        criteria.finish_remaining()
+        self.stats["batches"] += 1
+        self.stats["requests"] += len(batch)
+        self.stats["tokens"] += sum(req.num_tokens for req in batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
@@ -0,0 +1,246 @@
+# utils/db_utils.py
+"""
+Storage layer for pipeline state: extracted files, keypoints, knowledge
+graph entries and grading results, keyed by subject / filename / student so
+a partial update only touches the documents that changed.
+
+Two backends share one interface:
+  FileStore   one small JSON document per key under data/store/
+  MongoStore  MongoDB collections with bulk upserts and key indexes
+              (pass a mongomock client to run without a mongod)
+
+Stages mirror their results here when STUDIQ_STORE is set:
+  STUDIQ_STORE=file                      -> FileStore(STUDIQ_STORE_DIR or data/store)
+  STUDIQ_STORE=mongodb                   -> MongoStore(STUDIQ_MONGO_URI, STUDIQ_MONGO_DB)
+"""
+import os
+import glob
+import atexit
+from urllib.parse import quote, unquote
+from utils.file_utils import save_json, load_json
+
+STORE_DIR = "data/store"
+MONGO_URI = "mongodb://localhost:27017"
+MONGO_DB = "studiq"
+BULK_SIZE = 1000  # operations per bulk_write
+
+# collection -> fields that identify one document
+KEYS = {
+    "files": ("subject", "filename"),          # extracted text + page offsets
+    "keypoints": ("subject",),                 # {"subject", "keypoints": [...]}
+    "kg_files": ("subject", "filename"),       # {"hash", "ranked_keywords", "relations"} per file
+    "grades": ("subject", "student_id"),       # {"evaluations": [...]} per student
+}
+
+
+def _key(collection, doc):
+    try:
+        return tuple(doc[field] for field in KEYS[collection])
+    except KeyError as e:
+        raise ValueError(f"{collection} documents need {KEYS[collection]}; missing {e}") from None
+
+
+class FileStore:
+    """
+    <root>/<collection>/<subject>/<rest of key>.json, names URL-quoted.
+    Upserting one file or one student rewrites only that document.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def _dir(self, collection, subject):
+        return os.path.join(self.root, collection, quote(subject, safe=" "))
+
+    def _path(self, collection, key):
+        if len(key) == 1:
+            return os.path.join(self.root, collection, quote(key[0], safe=" ") + ".json")
+        return os.path.join(self._dir(collection, key[0]), "__".join(quote(str(k), safe=" ") for k in key[1:]) + ".json")
+
+    def upsert(self, collection, docs):
+        n = 0
+        for doc in docs:
+            path = self._path(collection, _key(collection, doc))
+            stored = load_json(path) or {}
+            merged = {**stored, **doc}
+            if merged != stored:  # unchanged documents are not rewritten
+                save_json(merged, path)
+            n += 1
+        return n
+
+    def find(self, collection, subject=None, **match):
+        """Documents of a collection, optionally for one subject and matching key fields."""
+        if len(KEYS[collection]) == 1:
+            paths = [self._path(collection, (subject,))] if subject else \
+                sorted(glob.glob(os.path.join(self.root, collection, "*.json")))
+        elif subject:
+            paths = sorted(glob.glob(os.path.join(self._dir(collection, subject), "*.json")))
+        else:
+            paths = sorted(glob.glob(os.path.join(self.root, collection, "*", "*.json")))
+        docs = (load_json(p) for p in paths)
+        return [d for d in docs if d is not None and all(d.get(k) == v for k, v in match.items())]
+
+    def delete(self, collection, subject, keep=None):
+        """Removes a subject's documents, except those whose second key field is in `keep`."""
+        field = KEYS[collection][-1]
+        keep = set(keep or ()) if len(KEYS[collection]) > 1 else set()
+        removed = 0
+        for doc in self.find(collection, subject):
+            if doc.get(field) not in keep:
+                os.remove(self._path(collection, _key(collection, doc)))
+                removed += 1
+        return removed
+
+    def subjects(self, collection="files"):
+        base = os.path.join(self.root, collection)
+        if not os.path.isdir(base):
+            return []
+        names = [n[:-5] if n.endswith(".json") else n for n in os.listdir(base)]
+        return sorted(unquote(n) for n in names)
+
+    def files_with_keyword(self, subject, keyword):
+        return [d["filename"] for d in self.find("kg_files", subject)
+                if any(kw["keyword"] == keyword for kw in d.get("ranked_keywords", []))]
+
+
+class MongoStore:
+    """
+    One MongoDB collection per KEYS entry, with a unique index on the key
+    fields (plus student_id and keyword lookups). Writes are unordered
+    bulk upserts of BULK_SIZE operations.
+    """
+
+    def __init__(self, uri=MONGO_URI, db_name=MONGO_DB, client=None):
+        if client is None:
+            from pymongo import MongoClient
+            client = MongoClient(uri)
+        self.client = client
+        self.db = client[db_name]
+        self.ensure_indexes()
+
+    def close(self):
+        self.client.close()
+
+    def ensure_indexes(self):
+        for collection, fields in KEYS.items():
+            self.db[collection].create_index([(f, 1) for f in fields], unique=True)
+        self.db["grades"].create_index([("student_id", 1)])
+        self.db["kg_files"].create_index([("subject", 1), ("ranked_keywords.keyword", 1)])
+
+    def upsert(self, collection, docs):
+        from pymongo import UpdateOne
+        fields = KEYS[collection]
+        ops, n = [], 0
+        for doc in docs:
+            ops.append(UpdateOne(dict(zip(fields, _key(collection, doc))), {"$set": doc}, upsert=True))
+            if len(ops) >= BULK_SIZE:
+                self.db[collection].bulk_write(ops, ordered=False)
+                n += len(ops)
+                ops = []
+        if ops:
+            self.db[collection].bulk_write(ops, ordered=False)
+            n += len(ops)
+        return n
+
+    def find(self, collection, subject=None, **match):
+        query = dict(match)
+        if subject:
+            query["subject"] = subject
+        return list(self.db[collection].find(query, {"_id": 0}).sort([(f, 1) for f in KEYS[collection]]))
+
+    def delete(self, collection, subject, keep=None):
+        query = {"subject": subject}
+        if keep and len(KEYS[collection]) > 1:
+            query[KEYS[collection][-1]] = {"$nin": list(keep)}
+        return self.db[collection].delete_many(query).deleted_count
+
+    def subjects(self, collection="files"):
+        return sorted(self.db[collection].distinct("subject"))
+
+    def files_with_keyword(self, subject, keyword):
+        cursor = self.db["kg_files"].find({"subject": subject, "ranked_keywords.keyword": keyword},
+                                          {"_id": 0, "filename": 1})
+        return sorted(d["filename"] for d in cursor)
+
+
+_stores = {}  # one store per backend/location per process, closed at exit
+
+
+def get_store(kind=None):
+    """
+    The store selected by STUDIQ_STORE (or `kind`), or None when unset.
+    Stores are cached, so every stage in a process shares one MongoClient
+    and the indexes are only ensured once.
+    """
+    kind = (kind or os.environ.get("STUDIQ_STORE", "")).lower()
+    if not kind:
+        return None
+    if kind == "file":
+        key = (kind, os.environ.get("STUDIQ_STORE_DIR", STORE_DIR))
+    elif kind in ("mongo", "mongodb"):
+        key = ("mongodb", os.environ.get("STUDIQ_MONGO_URI", MONGO_URI), os.environ.get("STUDIQ_MONGO_DB", MONGO_DB))
+    else:
+        raise ValueError(f"Unknown STUDIQ_STORE backend: {kind}")
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = FileStore(key[1]) if key[0] == "file" else MongoStore(key[1], key[2])
+    return store
+
+
+@atexit.register
+def close_stores():
+    for store in _stores.values():
+        if hasattr(store, "close"):
+            store.close()
+    _stores.clear()
+
+
+# ------------------------------------------------------------------------
+# Stage helpers
+# ------------------------------------------------------------------------
+
+def save_subject_files(store, subject, files):
+    """Upserts a subject's extracted files and drops the ones no longer present."""
+    n = store.upsert("files", ({**f, "subject": subject} for f in files))
+    store.delete("files", subject, keep=[f["filename"] for f in files])
+    return n
+
+
+def load_subject(store, subject):
+    """The subject in the data/processed_text/<subject>.json layout."""
+    files = [{k: v for k, v in d.items() if k != "subject"} for d in store.find("files", subject)]
+    return {"subject": subject, "files": sorted(files, key=lambda f: f["filename"])}
+
+
+def save_keypoints(store, subject, keypoints):
+    store.upsert("keypoints", [{"subject": subject, "keypoints": keypoints}])
+
+
+def load_keypoints(store):
+    """{subject: keypoints}, like data/keypoints.json."""
+    return {d["subject"]: d["keypoints"] for d in store.find("keypoints")}
+
+
+def save_kg_files(store, subject, entries, filenames):
+    """
+    Upserts the rebuilt files' graph entries {filename: {"hash",
+    "ranked_keywords", "relations"}} and drops files not in `filenames`.
+    """
+    n = store.upsert("kg_files", ({"subject": subject, "filename": name, **entry} for name, entry in entries.items()))
+    store.delete("kg_files", subject, keep=filenames)
+    return n
+
+
+def load_kg(store, subject):
+    """The subject in the knowledge_graph.json layout."""
+    return {
+        "subject": subject,
+        "files": [{"filename": d["filename"], "ranked_keywords": d.get("ranked_keywords", []),
+                   "relations": d.get("relations", [])} for d in store.find("kg_files", subject)],
+    }
+
+
+def save_grades(store, subject, results):
+    """`results` are evaluate_batch records {"student", "evaluations"}."""
+    return store.upsert("grades", ({"subject": subject, "student_id": r["student"], "evaluations": r["evaluations"]}
+                                   for r in results))
@@ -1,13 +1,115 @@
 # utils/file_utils.py
-import json, os
+"""
+JSON output layer for every stage. Writes are atomic (temp file in the
+same directory + os.replace), so a crash mid-write leaves the previous
+file intact, and keeps the permissions a plain open() would give. Output
+is indented like the committed data files unless STUDIQ_JSON_COMPACT=1;
+paths ending in .gz / .zst are compressed. orjson is used when installed.
+"""
+import os
+import json
+import stat
+import gzip
+import tempfile
+import contextlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COMPACT = os.environ.get("STUDIQ_JSON_COMPACT", "0") == "1"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def dumps(obj, compact=None):
+    """UTF-8 JSON bytes; compact=None uses the STUDIQ_JSON_COMPACT default."""
+    compact = COMPACT if compact is None else compact
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass  # types orjson rejects (e.g. >64-bit ints) go through the json module
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _compress(data, path):
+    if path.endswith(".gz"):
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if path.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return data
+
+
+def _decompress(data, path):
+    if path.endswith(".gz"):
+        return gzip.decompress(data)
+    if path.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def _umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+UMASK = _umask()
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode="wb"):
+    """
+    File object for writing `path` atomically: data goes to a temp file next
+    to it and replaces `path` only if the block finishes without an error.
+    The file keeps the mode of the file it replaces; a new file gets
+    0o666 & ~umask, like open(). (mkstemp alone would leave it at 0600.)
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode_bits = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode_bits = 0o666 & ~UMASK
+        os.chmod(tmp, mode_bits)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+def save_json(obj, path, compact=None):
+    """Atomically writes `obj` as JSON (compressed for .gz / .zst paths)."""
+    data = _compress(dumps(obj, compact), path)
+    with atomic_open(path) as f:
+        f.write(data)
+    return path
 
-def save_json(obj, path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False)
 
 def load_json(path):
     if not os.path.exists(path):
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        return loads(_decompress(f.read(), path))
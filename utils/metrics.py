@@ -0,0 +1,278 @@
+# utils/metrics.py
+"""
+Lightweight run instrumentation: spans record latency, item counts and bytes
+per named operation ("extract.pdf", "embed.encode", ...), summarized as
+counts, items/sec and p50/p95 latency in a JSON run report or Prometheus
+text. Disabled unless STUDIQ_METRICS=1 or enable() is called; a disabled
+span is a shared no-op object and a disabled @timed call is one flag check.
+
+Process pools: start workers with `initializer=metrics.init_worker,
+initargs=(metrics.enabled(),)` and run tasks through `metrics.collected`
+(or return `metrics.collect()` yourself), then `metrics.merge` the raw
+stats in the parent. spaCy's nlp.pipe(n_process>1) workers are not
+instrumented; "spacy.parse" is timed in the parent as docs come back.
+"""
+import os
+import time
+import random
+import threading
+import functools
+from utils.file_utils import save_json, atomic_open
+
+RESERVOIR_SIZE = 4096  # latency samples kept per span for percentiles
+
+
+class _Stat:
+    __slots__ = ("count", "total", "max", "items", "bytes", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.items = 0
+        self.bytes = 0
+        self.samples = []
+
+
+class Registry:
+    def __init__(self):
+        self.enabled = os.environ.get("STUDIQ_METRICS", "") not in ("", "0")
+        self.started = time.time()
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+
+    def record(self, name, seconds, items=1, nbytes=0):
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = self._stats[name] = _Stat()
+            stat.count += 1
+            stat.total += seconds
+            stat.max = max(stat.max, seconds)
+            stat.items += items
+            stat.bytes += nbytes
+            if len(stat.samples) < RESERVOIR_SIZE:
+                stat.samples.append(seconds)
+            else:
+                j = self._rng.randrange(stat.count)
+                if j < RESERVOIR_SIZE:
+                    stat.samples[j] = seconds
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self.started = time.time()
+
+    def drain(self):
+        """Raw stats {name: (count, total, max, items, bytes, samples)}, clearing them."""
+        with self._lock:
+            stats, self._stats = self._stats, {}
+        return {name: (s.count, s.total, s.max, s.items, s.bytes, s.samples) for name, s in stats.items()}
+
+    def merge(self, raw):
+        """Adds raw stats from drain() (e.g. from a worker process)."""
+        with self._lock:
+            for name, (count, total, mx, items, nbytes, samples) in raw.items():
+                stat = self._stats.get(name)
+                if stat is None:
+                    stat = self._stats[name] = _Stat()
+                stat.count += count
+                stat.total += total
+                stat.max = max(stat.max, mx)
+                stat.items += items
+                stat.bytes += nbytes
+                stat.samples.extend(samples)
+                if len(stat.samples) > RESERVOIR_SIZE:
+                    stat.samples = self._rng.sample(stat.samples, RESERVOIR_SIZE)
+
+    def snapshot(self):
+        """{name: summary dict}, sorted by total time."""
+        with self._lock:
+            stats = {name: (s.count, s.total, s.max, s.items, s.bytes, sorted(s.samples))
+                     for name, s in self._stats.items()}
+        out = {}
+        for name, (count, total, mx, items, nbytes, samples) in sorted(stats.items(), key=lambda kv: -kv[1][1]):
+            out[name] = {
+                "count": count,
+                "total_s": round(total, 6),
+                "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": round(_quantile(samples, 0.50) * 1000, 3),
+                "p95_ms": round(_quantile(samples, 0.95) * 1000, 3),
+                "max_ms": round(mx * 1000, 3),
+                "items": items,
+                "items_per_s": round(items / total, 2) if total else None,
+                "bytes": nbytes,
+                "bytes_per_s": round(nbytes / total, 1) if total and nbytes else None,
+            }
+        return out
+
+
+def _quantile(sorted_samples, q):
+    if not sorted_samples:
+        return 0.0
+    pos = q * (len(sorted_samples) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (pos - lo)
+
+
+REGISTRY = Registry()
+
+
+class _Span:
+    __slots__ = ("name", "items", "bytes", "_start")
+
+    def __init__(self, name, items, nbytes):
+        self.name = name
+        self.items = items
+        self.bytes = nbytes
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRY.record(self.name, time.perf_counter() - self._start, self.items, self.bytes)
+        return False
+
+
+class _NoopSpan:
+    """Returned while disabled; callers may still set .items / .bytes on it."""
+    items = 0
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def enable(on=True):
+    REGISTRY.enabled = on
+
+
+def enabled():
+    return REGISTRY.enabled
+
+
+def span(name, items=1, nbytes=0):
+    """
+    Context manager timing a block:
+        with metrics.span("embed.encode", items=len(texts)):
+            ...
+    Set `.items` / `.bytes` on the returned object when they are only known
+    at the end (e.g. downloaded size).
+    """
+    if not REGISTRY.enabled:
+        return _NOOP
+    return _Span(name, items, nbytes)
+
+
+def timed(name, items=None):
+    """
+    Decorator version of span. `items(*args, **kwargs)` may compute the item
+    count from the call arguments; by default each call is one item.
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return fn(*args, **kwargs)
+            n = items(*args, **kwargs) if items else 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                REGISTRY.record(name, time.perf_counter() - start, n)
+        return inner
+    return wrap
+
+
+def timed_iter(name, iterable, nbytes=None):
+    """
+    Re-yields `iterable`, recording how long each item took to produce
+    (e.g. docs coming out of nlp.pipe). `nbytes(item)` may size each item.
+    """
+    if not REGISTRY.enabled:
+        yield from iterable
+        return
+    it = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            return
+        REGISTRY.record(name, time.perf_counter() - start, 1, nbytes(item) if nbytes else 0)
+        yield item
+
+
+def init_worker(on):
+    """Process-pool initializer: a clean registry (forked workers inherit the parent's) and the parent's switch."""
+    REGISTRY.reset()
+    REGISTRY.enabled = on
+
+
+def collect():
+    """The spans recorded in this process since the last collect(), for merge() in the parent."""
+    return REGISTRY.drain() if REGISTRY.enabled else None
+
+
+def merge(raw):
+    if raw:
+        REGISTRY.merge(raw)
+
+
+def collected(fn, *args, **kwargs):
+    """Runs fn in a pool worker and returns (result, collect())."""
+    return fn(*args, **kwargs), collect()
+
+
+def report():
+    return {
+        "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(REGISTRY.started)),
+        "duration_s": round(time.time() - REGISTRY.started, 3),
+        "metrics": REGISTRY.snapshot(),
+    }
+
+
+def prometheus_text(prefix="studiq"):
+    """The snapshot in Prometheus text exposition format."""
+    snap = REGISTRY.snapshot()
+    lines = [f"# TYPE {prefix}_span_seconds summary"]
+    for name, m in snap.items():
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'{prefix}_span_seconds{{span="{label}",quantile="0.5"}} {m["p50_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_span_seconds{{span="{label}",quantile="0.95"}} {m["p95_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_span_seconds_sum{{span="{label}"}} {m["total_s"]:.6f}')
+        lines.append(f'{prefix}_span_seconds_count{{span="{label}"}} {m["count"]}')
+    for metric, key in (("items_total", "items"), ("bytes_total", "bytes")):
+        lines.append(f"# TYPE {prefix}_{metric} counter")
+        for name, m in snap.items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{prefix}_{metric}{{span="{label}"}} {m[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path="data/run_report.json", prometheus_path=None):
+    """Writes the JSON run report (and optionally the Prometheus text file)."""
+    save_json(report(), path)
+    if prometheus_path:
+        with atomic_open(prometheus_path, "w") as f:
+            f.write(prometheus_text())
+    print(f"📊 Run report saved to {path}" + (f" and {prometheus_path}" if prometheus_path else ""))
+
+
+def print_summary():
+    snap = REGISTRY.snapshot()
+    if not snap:
+        return
+    print(f"\n{'span':<28} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'items/s':>10}")
+    for name, m in snap.items():
+        rate = f"{m['items_per_s']:.1f}" if m["items_per_s"] is not None else "-"
+        print(f"{name:<28} {m['count']:>7} {m['total_s']:>9.2f} {m['p50_ms']:>9.2f} {m['p95_ms']:>9.2f} {rate:>10}")
@@ -0,0 +1,170 @@
+# utils/ocr_utils.py
+"""
+Async client for the remote handwriting-recognition app (a Gradio
+`predict` endpoint). A request is a POST to /gradio_api/call/predict that
+returns an event id, followed by a GET on .../predict/<event_id> that
+streams the result as server-sent events.
+
+    texts = recognize_images(["a.jpeg", "b.jpeg"])           # sync wrapper
+    async with HandwritingClient() as client:                 # or inside asyncio
+        texts = await client.recognize_many(paths)
+
+Connections are pooled, at most `concurrency` images are in flight, and
+transport errors / 5xx responses / streams that end without a result are
+retried with exponential backoff.
+"""
+import os
+import json
+import base64
+import asyncio
+import mimetypes
+
+from utils import metrics
+
+HTR_URL = os.environ.get("STUDIQ_HTR_URL", "https://d2796a1eb3fff8f536.gradio.live")
+API_PATH = "/gradio_api/call/predict"
+CONCURRENCY = 4
+RETRIES = 3
+BACKOFF = 0.5   # seconds before the first retry, doubled after each attempt
+TIMEOUT = 120   # seconds per request, including the whole result stream
+
+
+class RecognitionError(Exception):
+    """The endpoint reported an error, or the stream ended without a result."""
+
+
+def image_payload(image, name=None):
+    """Gradio FileData request body for an image path or raw bytes."""
+    if isinstance(image, (bytes, bytearray)):
+        data, name = bytes(image), name or "answer.jpeg"
+    else:
+        with open(image, "rb") as f:
+            data = f.read()
+        name = name or os.path.basename(image)
+    mime = mimetypes.guess_type(name)[0] or "image/jpeg"
+    return {
+        "data": [{
+            "path": None,
+            "url": f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}",
+            "meta": {"_type": "gradio.FileData"},
+            "orig_name": name,
+            "is_stream": False,
+        }]
+    }
+
+
+async def iter_sse(chunks):
+    """
+    Incremental server-sent-events parser: consumes byte chunks as they
+    arrive and yields (event, data) once per blank-line-terminated event.
+    Multi-line data fields are joined with newlines; comments are skipped.
+    """
+    buffer = b""
+    event, data = "message", []
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            cut = buffer.find(b"\n")
+            if cut < 0:
+                break
+            line, buffer = buffer[:cut].rstrip(b"\r").decode("utf-8", errors="replace"), buffer[cut + 1:]
+            if not line:
+                if data:
+                    yield event, "\n".join(data)
+                event, data = "message", []
+            elif line.startswith(":"):
+                continue
+            else:
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "event":
+                    event = value
+                elif field == "data":
+                    data.append(value)
+    if data:
+        yield event, "\n".join(data)
+
+
+def _result_text(data):
+    """The recognized text from a `complete` payload: ["text"] or {"data": ["text"]}."""
+    parsed = json.loads(data)
+    if isinstance(parsed, dict):
+        parsed = parsed.get("data")
+    if not parsed:
+        raise RecognitionError(f"Empty result: {data[:200]}")
+    return parsed[0]
+
+
+class HandwritingClient:
+    def __init__(self, base_url=HTR_URL, concurrency=CONCURRENCY, retries=RETRIES, backoff=BACKOFF,
+                 timeout=TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._client = None
+        self._slots = None
+
+    async def __aenter__(self):
+        import httpx
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self._client = httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+        return False
+
+    async def _recognize_once(self, payload):
+        response = await self._client.post(API_PATH, json=payload)
+        response.raise_for_status()
+        event_id = response.json().get("event_id")
+        if not event_id:
+            raise RecognitionError(f"No event_id in response: {response.text[:200]}")
+
+        async with self._client.stream("GET", f"{API_PATH}/{event_id}") as stream:
+            stream.raise_for_status()
+            async for event, data in iter_sse(stream.aiter_bytes()):
+                if event == "complete":
+                    return _result_text(data)
+                if event == "error":
+                    raise RecognitionError(f"Endpoint error: {data[:200]}")
+                if event == "message" and '"data"' in data:
+                    # older Gradio streams send the result without an event name
+                    return _result_text(data)
+        raise RecognitionError("Stream ended without a result")
+
+    async def recognize(self, image, name=None):
+        """Recognized text of one image (path or bytes)."""
+        import httpx
+        payload = image_payload(image, name)
+        for attempt in range(self.retries + 1):
+            try:
+                # the slot is held per attempt, so backoff sleeps don't block other images
+                async with self._slots:
+                    with metrics.span("htr.recognize"):
+                        return await self._recognize_once(payload)
+            except (httpx.TransportError, httpx.HTTPStatusError, RecognitionError) as e:
+                client_error = isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500
+                if client_error or attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def recognize_many(self, images, return_exceptions=True):
+        """
+        Recognized texts in input order. With return_exceptions=True a failed
+        image yields its exception instead of cancelling the others.
+        """
+        return await asyncio.gather(*(self.recognize(image) for image in images),
+                                    return_exceptions=return_exceptions)
+
+
+def recognize_images(images, base_url=HTR_URL, **kwargs):
+    """Blocking wrapper around HandwritingClient.recognize_many."""
+    async def run():
+        async with HandwritingClient(base_url, **kwargs) as client:
+            return await client.recognize_many(images)
+    return asyncio.run(run())
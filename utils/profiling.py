@@ -0,0 +1,236 @@
+# utils/profiling.py
+"""
+Opt-in profiling for the command line entry points.
+
+    --profile          cProfile CPU profile of the whole command
+    --profile-memory   + tracemalloc snapshots (top allocation sites, growth, peak)
+    --profile-torch    + torch profiler op timings and thread settings for model calls
+
+Each run writes <name>-<timestamp>.txt (sorted hotspot report) and the raw
+.prof file (for snakeviz / pstats) to data/profiles/, plus the tracemalloc
+snapshot and a Chrome trace of the torch ops when those are enabled.
+Either extra flag implies --profile.
+
+cProfile only sees the thread that enables it, so every thread started
+during the run gets its own profiler (via threading.setprofile) and all of
+them are merged into one report. Child processes are not profiled: while
+a profile is active, callers that would fan out to processes check
+active() and run in-process instead (nlp.pipe n_process=1, streaming
+extraction in the stage threads).
+"""
+import os
+import io
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import contextlib
+
+PROFILE_DIR = "data/profiles"
+TOP_N = 30                # rows per report section
+TRACEMALLOC_FRAMES = 10   # stack depth kept per allocation
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_active = None  # the Profiler currently running, if any
+
+
+def active():
+    """True while a Profiler is running (callers then avoid worker processes)."""
+    return _active is not None
+
+
+def pop_flags(argv=None):
+    """
+    Removes the profiling flags from argv (sys.argv by default) so commands
+    parse their own arguments unchanged. Returns the options, or None.
+    """
+    argv = sys.argv if argv is None else argv
+    found = {flag: flag in argv for flag in ("--profile", "--profile-memory", "--profile-torch")}
+    for flag, present in found.items():
+        if present:
+            argv.remove(flag)
+    if not any(found.values()):
+        return None
+    return {"memory": found["--profile-memory"], "torch_ops": found["--profile-torch"]}
+
+
+class Profiler:
+    """Context manager profiling the enclosed block and writing the report on exit."""
+
+    def __init__(self, name, out_dir=PROFILE_DIR, memory=False, torch_ops=False, top_n=TOP_N):
+        self.name = name
+        self.out_dir = out_dir
+        self.memory = memory
+        self.torch_ops = torch_ops
+        self.top_n = top_n
+        self.base = None
+        self._cpu = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._torch = None
+        self._mem_start = None
+
+    def __enter__(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.base = os.path.join(self.out_dir, f"{self.name}-{stamp}")
+        if self.memory:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._mem_start = tracemalloc.take_snapshot()
+        if self.torch_ops:
+            self._torch = _start_torch_profiler()
+        self._wall = time.perf_counter()
+        self._cpu_time = time.process_time()
+        global _active
+        _active = self
+        threading.setprofile(self._start_thread)
+        self._cpu.enable()
+        return self
+
+    def _start_thread(self, frame, event, arg):
+        """First profile event of a new thread: give it its own cProfile (which replaces this hook)."""
+        prof = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append(prof)
+        prof.enable()
+
+    def __exit__(self, *exc):
+        global _active
+        self._cpu.disable()
+        threading.setprofile(None)
+        _active = None
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu_time
+
+        stats = self._merged_stats()
+        sections = [self._header(wall, cpu), self._cpu_sections(stats)]
+        if self._torch is not None:
+            sections.append(self._torch_section())
+        if self.memory:
+            sections.append(self._memory_section())
+
+        stats.dump_stats(self.base + ".prof")
+        with open(self.base + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n\n".join(sections) + "\n")
+        print(f"🔬 Profile saved to {self.base}.txt (raw: {self.base}.prof)")
+        return False
+
+    # ------------------------------------------------------------------------
+    # Report sections
+    # ------------------------------------------------------------------------
+
+    def _header(self, wall, cpu):
+        return "\n".join([
+            f"Profile: {self.name}",
+            f"Command: {' '.join(sys.argv)}",
+            f"Started: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time() - wall))}",
+            f"Wall time: {wall:.3f}s   CPU time: {cpu:.3f}s",
+            f"Threads: main + {len(self._thread_profiles)} started during the run, merged "
+            f"(threads started earlier and child processes are not profiled)",
+        ])
+
+    def _merged_stats(self):
+        """One pstats.Stats over the main thread and every thread started during the run."""
+        stats = pstats.Stats(self._cpu)
+        with self._lock:
+            profiles = list(self._thread_profiles)
+        for prof in profiles:
+            try:
+                stats.add(prof)
+            except TypeError:
+                pass  # thread ended before recording any call
+        return stats
+
+    def _cpu_sections(self, stats):
+        rows = []
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append((filename, line, func, ncalls, tottime, cumtime))
+
+        def table(title, sorted_rows):
+            lines = [title, f"{'cum s':>9} {'self s':>9} {'calls':>9}  function"]
+            for filename, line, func, ncalls, tottime, cumtime in sorted_rows[:self.top_n]:
+                lines.append(f"{cumtime:>9.3f} {tottime:>9.3f} {ncalls:>9}  {func}  ({_short_path(filename)}:{line})")
+            return "\n".join(lines)
+
+        own = [r for r in rows if r[0].startswith(ROOT_DIR)]
+        out = [
+            table("== Project hotspots (cumulative) ==", sorted(own, key=lambda r: -r[5])),
+            table("== Self time, all code ==", sorted(rows, key=lambda r: -r[4])),
+        ]
+        buf = io.StringIO()
+        stats.stream = buf
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        stats.stream = sys.stdout
+        out.append("== pstats (cumulative) ==\n" + buf.getvalue().strip())
+        return "\n\n".join(out)
+
+    def _memory_section(self):
+        end = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        end.dump(self.base + ".tracemalloc")
+
+        lines = ["== Memory (tracemalloc) ==",
+                 f"current {current / 2**20:.1f} MiB   peak {peak / 2**20:.1f} MiB",
+                 "", "Top allocation sites at exit:"]
+        for stat in end.statistics("lineno")[:self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 2**20:>9.2f} MiB {stat.count:>9}  {_short_path(frame.filename)}:{frame.lineno}")
+        lines += ["", "Growth during the run:"]
+        for stat in end.compare_to(self._mem_start, "lineno")[:self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size_diff / 2**20:>+9.2f} MiB {stat.count_diff:>+9}  "
+                         f"{_short_path(frame.filename)}:{frame.lineno}")
+        return "\n".join(lines)
+
+    def _torch_section(self):
+        import torch
+        self._torch.stop()
+        trace_path = self.base + ".torch.json"
+        self._torch.export_chrome_trace(trace_path)
+        lines = ["== Torch ==",
+                 f"intra-op threads {torch.get_num_threads()}   inter-op threads {torch.get_num_interop_threads()}",
+                 f"chrome trace: {trace_path}", ""]
+        averages = self._torch.key_averages()
+        if len(averages):
+            lines.append(averages.table(sort_by="self_cpu_time_total", row_limit=self.top_n))
+        else:
+            lines.append("(no torch ops recorded)")
+        return "\n".join(lines)
+
+
+def _start_torch_profiler():
+    try:
+        import torch
+        from torch.profiler import profile, ProfilerActivity
+    except ImportError:
+        print("⚠️ torch not installed; --profile-torch ignored")
+        return None
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    prof = profile(activities=activities)
+    prof.start()
+    return prof
+
+
+def _short_path(filename):
+    if filename.startswith(ROOT_DIR):
+        return os.path.relpath(filename, ROOT_DIR)
+    marker = "site-packages" + os.sep
+    return filename.split(marker, 1)[1] if marker in filename else filename
+
+
+def from_argv(name, argv=None):
+    """
+    A Profiler when the profiling flags are on the command line (they are
+    removed from argv), else a no-op context:
+        with profiling.from_argv("keypoints"):
+            main()
+    """
+    options = pop_flags(argv)
+    if options is None:
+        return contextlib.nullcontext()
+    return Profiler(name, **options)
@@ -0,0 +1,110 @@
+# utils/stopping_criteria.py
+"""
+Text-level stop conditions for local LLM generation.
+
+A stop condition is any callable `condition(text) -> bool` that is given the
+text generated so far (prompt excluded). They plug straight into
+`BatchGenerationScheduler.submit(..., stop_condition=...)`, and
+`TextStoppingCriteria` adapts them for `model.generate` / pipelines.
+"""
+import re
+import torch
+from transformers import StoppingCriteria
+
+BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+\S")
+
+
+class RepetitionStop:
+    """Stops once the trailing word n-gram has already appeared `max_repeats` times."""
+
+    def __init__(self, n=8, max_repeats=3):
+        self.n = n
+        self.max_repeats = max_repeats
+
+    def __call__(self, text):
+        words = text.lower().split()
+        if len(words) < self.n * self.max_repeats:
+            return False
+        tail = words[-self.n:]
+        first = tail[0]
+        seen = 0
+        for i in range(len(words) - self.n + 1):
+            if words[i] == first and words[i:i + self.n] == tail:
+                seen += 1
+                if seen >= self.max_repeats:
+                    return True
+        return False
+
+
+class BulletLimitStop:
+    """Stops after `max_bullets` complete bullet / numbered lines."""
+
+    def __init__(self, max_bullets=6):
+        self.max_bullets = max_bullets
+
+    def __call__(self, text):
+        if "\n" not in text:
+            return False
+        # only lines terminated by a newline are complete
+        complete_lines = text.split("\n")[:-1]
+        bullets = sum(1 for line in complete_lines if BULLET_RE.match(line))
+        return bullets >= self.max_bullets
+
+
+class MarkerLineStop:
+    """Stops once a line starting with `marker` (e.g. 'Keywords:') has been completed."""
+
+    def __init__(self, marker="Keywords:"):
+        self.marker = marker.lower()
+
+    def __call__(self, text):
+        lowered = text.lower()
+        idx = lowered.rfind(self.marker)
+        if idx == -1:
+            return False
+        line_start = lowered.rfind("\n", 0, idx) + 1
+        if lowered[line_start:idx].strip(" *#"):
+            return False
+        return "\n" in lowered[idx:]
+
+
+def any_of(*conditions):
+    """Combines stop conditions; stops when any of them fires."""
+    conditions = [c for c in conditions if c is not None]
+
+    def condition(text):
+        return any(c(text) for c in conditions)
+
+    return condition
+
+
+def qna_stop_condition():
+    """Default stops for long-form QnA answers: repetition loops or the final Keywords line."""
+    return any_of(RepetitionStop(), MarkerLineStop("Keywords:"))
+
+
+def keypoint_stop_condition(max_bullets=6):
+    """Default stops for keypoint lists: repetition loops or enough bullets."""
+    return any_of(RepetitionStop(), BulletLimitStop(max_bullets))
+
+
+class TextStoppingCriteria(StoppingCriteria):
+    """
+    Applies a text stop condition inside `model.generate` (or a pipeline call
+    through `stopping_criteria=`). `prompt_length` is the number of prompt
+    tokens in each row; everything after it is treated as generated text.
+    It is passed in rather than inferred from the first call, because with
+    assisted decoding that call can already include several accepted tokens.
+    """
+
+    def __init__(self, tokenizer, condition, prompt_length):
+        self.tokenizer = tokenizer
+        self.condition = condition
+        self.prompt_length = prompt_length
+
+    def __call__(self, input_ids, scores, **kwargs):
+        stops = []
+        for row in input_ids:
+            text = self.tokenizer.decode(row[self.prompt_length:], skip_special_tokens=True)
+            stops.append(bool(self.condition(text)))
+        return torch.tensor(stops, dtype=torch.bool, device=input_ids.device)